@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Company, Department, Employee, Attendance, LeaveRequest, Holiday, UserProfile
+from .models import Company, Department, Employee, Attendance, LeaveRequest, Holiday, UserProfile, DeviceSyncCursor, PushPayload, DailyAttendance, PdfJob
 
 # employees/admin.py
+from datetime import timedelta
 from django.contrib import admin, messages
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
@@ -110,3 +111,55 @@ class AttendanceAdmin(admin.ModelAdmin):
 
 admin.site.register(Holiday)
 
+
+@admin.register(DeviceSyncCursor)
+class DeviceSyncCursorAdmin(admin.ModelAdmin):
+    list_display = ('department', 'last_timestamp', 'last_synced_at')
+    list_filter = ('department__company',)
+    search_fields = ('department__name',)
+    list_select_related = ('department', 'department__company')
+    actions = ['rewind_7_days', 'rewind_full']
+
+    @admin.action(description="Rewind cursor by 7 days")
+    def rewind_7_days(self, request, queryset):
+        for cursor in queryset:
+            if cursor.last_timestamp:
+                cursor.rewind(cursor.last_timestamp - timedelta(days=7))
+        self.message_user(request, f"{queryset.count()} cursor(s) rewound by 7 days.")
+
+    @admin.action(description="Rewind cursor to beginning (full resync)")
+    def rewind_full(self, request, queryset):
+        for cursor in queryset:
+            cursor.rewind()
+        self.message_user(request, f"{queryset.count()} cursor(s) reset. Next sync will replay the full device log.")
+
+
+
+@admin.register(PushPayload)
+class PushPayloadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'received_at', 'processed_at', 'error')
+    list_filter = ('processed_at',)
+    readonly_fields = ('body', 'received_at', 'processed_at', 'error')
+
+
+@admin.register(PdfJob)
+class PdfJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'company', 'status', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('cache_key', 'params', 'host', 'file', 'filename', 'error', 'created_at', 'finished_at')
+
+
+@admin.register(DailyAttendance)
+class DailyAttendanceAdmin(admin.ModelAdmin):
+    # rollup রো হাতে এডিট হবে না, raw Attendance বদলালে নিজে থেকে আপডেট হয়
+    list_display = ('employee', 'local_date', 'first_in', 'last_out', 'punch_count', 'late', 'worked', 'overtime')
+    list_filter = ('company', 'local_date')
+    search_fields = ('employee__name',)
+    list_select_related = ('employee',)
+    date_hierarchy = 'local_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
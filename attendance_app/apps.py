@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class AttendanceAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'attendance_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
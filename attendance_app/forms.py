@@ -105,6 +105,10 @@ class DepartmentForm(forms.ModelForm):
                 "class": "w-full border rounded px-3 py-2",
                 "placeholder": "Device Port (optional)",
             }),
+            "device_serial": forms.TextInput(attrs={
+                "class": "w-full border rounded px-3 py-2",
+                "placeholder": "Device SN for push mode (optional)",
+            }),
             "in_time": forms.TimeInput(attrs={
                 "type": "time",
                 "class": "w-full border rounded px-3 py-2",
@@ -134,12 +138,12 @@ class AttendanceForm(forms.ModelForm):
         status = cleaned_data.get('status')
 
         if employee and timestamp and status:
-            date = timestamp.date()
+            date = local_date_for(timestamp)
 
             # আজকের দিনের সকল attendance status বের করি
             attendance_qs = Attendance.objects.filter(
                 employee=employee,
-                timestamp__date=date
+                **local_date_filter(date, date)
             )
 
             # যদি edit mode হয়, তাহলে নিজের টা বাদ দিয়ে হিসাব করব
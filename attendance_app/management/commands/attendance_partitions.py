@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from attendance_app.utils.partitions import (add_months, create_partition, detach_partition, is_partitioned,
+                                             is_supported, list_partitions, month_start, partition_name)
+
+
+class Command(BaseCommand):
+    help = ("Manage the monthly Attendance partitions on PostgreSQL: create upcoming months ahead of time "
+            "and detach (archive) months older than --retain. Run it from cron once a month.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help="Months after the current one to create.")
+        parser.add_argument('--retain', type=int,
+                            help="Keep this many months (including the current one); detach older ones.")
+        parser.add_argument('--drop', action='store_true', help="Drop detached partitions instead of keeping "
+                                                                "them as standalone tables.")
+        parser.add_argument('--list', action='store_true', help="Only list partitions.")
+        parser.add_argument('--dry-run', action='store_true', help="Print what would change.")
+
+    def handle(self, *args, **options):
+        if not is_supported(connection):
+            self.stdout.write(f"Attendance partitioning needs PostgreSQL ({connection.vendor} in use); nothing to do.")
+            return
+        if not is_partitioned(connection):
+            raise CommandError("Attendance table is not partitioned; run `manage.py migrate attendance_app` first.")
+        if options['ahead'] < 0 or (options['retain'] is not None and options['retain'] < 1):
+            raise CommandError("--ahead must be >= 0 and --retain >= 1.")
+
+        partitions = list_partitions(connection)
+        if options['list']:
+            for name, month, estimate in partitions:
+                self.stdout.write(f"{name}\t{month:%Y-%m}\t~{estimate} rows" if month
+                                  else f"{name}\tDEFAULT\t~{estimate} rows")
+            return
+
+        current = month_start(timezone.localdate())
+        existing = {month for _, month, _ in partitions if month}
+        dry_run = options['dry_run']
+
+        for n in range(options['ahead'] + 1):
+            month = add_months(current, n)
+            if month in existing:
+                continue
+            if dry_run:
+                self.stdout.write(f"Would create {partition_name(month)}")
+                continue
+            with transaction.atomic():
+                moved = create_partition(connection, month)
+            self.stdout.write(f"Created {partition_name(month)}" + (f" ({moved} rows moved from DEFAULT)"
+                                                                    if moved else ""))
+
+        if options['retain'] is None:
+            return
+        cutoff = add_months(current, 1 - options['retain'])
+        for month in sorted(m for m in existing if m < cutoff):
+            action = "drop" if options['drop'] else "detach"
+            if dry_run:
+                self.stdout.write(f"Would {action} {partition_name(month)}")
+                continue
+            # প্রতি মাস আলাদা transaction: মাঝপথে থামলে আগেরগুলো ঠিক থাকে
+            with transaction.atomic():
+                detach_partition(connection, month, drop=options['drop'])
+            self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {partition_name(month)}")
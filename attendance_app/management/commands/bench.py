@@ -0,0 +1,156 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance_app.models import Attendance, Department, Employee
+from attendance_app.utils.attendance_helpers import generate_attendance_table
+from attendance_app.utils.benchmark import FakeDevice, bench_companies, measure
+from attendance_app.utils.zk_emulator import EmulatedDevice, ZKEmulator
+from attendance_app.utils.zk_import import import_attendance
+from attendance_app.views import get_monthly_report_context
+from payroll.views import get_salary_summary_data
+
+SCENARIOS = ['import', 'push', 'dashboard', 'monthly_report', 'attendance_table', 'salary_summary']
+
+
+class Command(BaseCommand):
+    help = ("Time the hot paths on the `seed_benchmark` companies; prints wall time, query count "
+            "and peak memory per company and scenario as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument('--company', type=int, nargs='+', help="Only these benchmark company ids.")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per scenario.")
+        parser.add_argument('--month', help="Report/salary month YYYY-MM (default: last month).")
+        parser.add_argument('--output', help="Write the JSON here instead of stdout.")
+        parser.add_argument('--zk-emulator', action='store_true',
+                            help="import: go through pyzk over loopback TCP (zk_emulator) instead of "
+                                 "the in-memory fake device.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be positive.")
+        try:
+            month = (datetime.strptime(options['month'], '%Y-%m').date() if options['month']
+                     else (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1))
+        except ValueError:
+            raise CommandError("--month must be YYYY-MM.")
+
+        companies = bench_companies().select_related('owner')
+        if options['company']:
+            companies = companies.filter(id__in=options['company'])
+        if not companies:
+            raise CommandError("No benchmark companies found; run `manage.py seed_benchmark` first.")
+
+        self.zk_emulator = options['zk_emulator']
+        self.emulators = []
+        results = []
+        try:
+            for company in companies:
+                info = {
+                    'company_id': company.pk,
+                    'employees': Employee.objects.filter(company=company).count(),
+                    'punches': Attendance.objects.filter(company=company).count(),
+                }
+                for scenario in options['scenario']:
+                    func, rollback = getattr(self, f'prepare_{scenario}')(company, month)
+                    results.append({**info, 'scenario': scenario, **measure(func, options['repeat'], rollback)})
+                    self.stderr.write(f"{company.name}: {scenario} {results[-1]['wall_ms']['median']} ms")
+        finally:
+            for emulator in self.emulators:
+                emulator.stop()
+
+        report = json.dumps({
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'zk_emulator': self.zk_emulator,
+            'month': month.strftime('%Y-%m'),
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(report)
+        else:
+            self.stdout.write(report)
+
+    # প্রতিটা prepare_* রিটার্ন করে (func, rollback)
+    def _request(self, company, params):
+        request = RequestFactory().get('/', params)
+        request.user = company.owner
+        return request
+
+    def _client(self, company):
+        client = Client()
+        client.force_login(company.owner)
+        return client
+
+    def _month_range(self, month):
+        end = (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        return month, end
+
+    def _today_punches(self, company):
+        """আজকের In/Out, প্রতি employee (ডিপার্টমেন্টের শিফট ধরে)।"""
+        rng = random.Random(company.pk)
+        today = timezone.localdate()
+        for uid, in_time, out_time in (Employee.objects.filter(company=company)
+                                       .values_list('device_user_id', 'department__in_time',
+                                                    'department__out_time')):
+            for clock in (in_time, out_time):
+                yield uid, datetime.combine(today, clock) + timedelta(minutes=rng.randint(-15, 30))
+
+    def prepare_import(self, company, month):
+        departments = Department.objects.filter(company=company).prefetch_related('employees')
+        devices = FakeDevice.load(departments, timezone.localdate(), random.Random(company.pk))
+        if not self.zk_emulator:
+            return (lambda: import_attendance(devices, zk_class=FakeDevice)), True
+
+        # একই লগ, কিন্তু আসল pyzk ক্লায়েন্ট দিয়ে loopback TCP তে
+        for device in devices:
+            users, punches = FakeDevice.logs[device['ip']]
+            emulator = ZKEmulator(EmulatedDevice([(u.user_id, u.name) for u in users],
+                                                 [(p.user_id, p.timestamp) for p in punches])).start()
+            self.emulators.append(emulator)
+            device['ip'], device['port'] = emulator.host, emulator.port
+        return (lambda: import_attendance(devices)), True
+
+    def prepare_push(self, company, month):
+        client = self._client(company)
+        body = json.dumps([{'uid': uid, 'time': ts.strftime('%Y-%m-%d %H:%M:%S')}
+                           for uid, ts in self._today_punches(company)])
+
+        # queue মোডে ভিউ শুধু একটা INSERT করে; আসল কাজ (ingest) মাপতে সরাসরি মোড
+        def run():
+            with override_settings(ATTENDANCE_PUSH_QUEUE=False):
+                response = client.post(reverse('attendance_app:zkteco_push'), body, content_type='application/json')
+            assert response.status_code == 200, response.content
+        return run, True
+
+    def prepare_dashboard(self, company, month):
+        client = self._client(company)
+
+        def run():
+            response = client.get(reverse('attendance_app:dashboard'))
+            assert response.status_code == 200, response.status_code
+        return run, False
+
+    def prepare_monthly_report(self, company, month):
+        start, end = self._month_range(month)
+        request = self._request(company, {'start_date': start.isoformat(), 'end_date': end.isoformat()})
+        return (lambda: get_monthly_report_context(request)), False
+
+    def prepare_attendance_table(self, company, month):
+        start, end = self._month_range(month)
+        employees = Employee.objects.filter(company=company).select_related('department')
+        return (lambda: generate_attendance_table(employees, start, end)), False
+
+    def prepare_salary_summary(self, company, month):
+        request = self._request(company, {})
+        return (lambda: get_salary_summary_data(request, month.strftime('%Y-%m'))), False
@@ -0,0 +1,105 @@
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from attendance_app.models import PushPayload
+from attendance_app.utils.ingest import store_push_punches
+
+logger = logging.getLogger(__name__)
+
+# এর বেশি সময় claim করা অথচ প্রসেস না হওয়া payload (worker মারা গেছে) আবার নেওয়া যায়
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class Command(BaseCommand):
+    help = "Drain queued ZKTeco push payloads into Attendance in large batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Payloads per batch.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help="Delete processed payloads older than this many days (0 = keep).")
+
+    def handle(self, *args, **options):
+        while True:
+            drained = self.drain(options['batch_size'])
+            if options['purge_days']:
+                cutoff = timezone.now() - timedelta(days=options['purge_days'])
+                PushPayload.objects.filter(processed_at__lt=cutoff).delete()
+            if not options['loop']:
+                break
+            if not drained:
+                time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        """Queue খালি না হওয়া পর্যন্ত ব্যাচে প্রসেস; মোট কত payload হলো রিটার্ন করে।"""
+        total = 0
+        while True:
+            batch = self.claim_batch(batch_size)
+            if batch is None:
+                return total
+            if not batch:
+                continue  # অন্য worker আগে নিয়ে নিয়েছে
+
+            entries, bad = [], {}
+            for payload in batch:
+                try:
+                    entries.extend(json.loads(payload.body))
+                except ValueError as e:
+                    bad[payload.pk] = str(e)
+
+            try:
+                counts = store_push_punches(entries)
+            except Exception:
+                # কোনো একটা payload নষ্ট হলে পুরো ব্যাচ আটকাবে না: একটা একটা করে চেষ্টা
+                counts = self.drain_one_by_one(batch, bad)
+
+            processed_at = timezone.now()
+            ok_ids = [p.pk for p in batch if p.pk not in bad]
+            PushPayload.objects.filter(pk__in=ok_ids).update(processed_at=processed_at)
+            for pk, error in bad.items():
+                logger.error(f"❌ Push payload #{pk} rejected: {error}")
+                PushPayload.objects.filter(pk=pk).update(processed_at=processed_at, error=error)
+
+            total += len(batch)
+            self.stdout.write(
+                f"{len(batch)} payload(s): {counts['accepted']} accepted, "
+                f"{counts['duplicates']} duplicates, {counts['unknown']} unknown users, {len(bad)} rejected"
+            )
+
+    def claim_batch(self, batch_size):
+        """
+        পরের batch_size টা payload এ নিজের token বসিয়ে নেয় (render_pdf_jobs এর status flip এর মতো);
+        যেগুলোতে বসাতে পারল শুধু সেগুলোই রিটার্ন। Queue খালি হলে None।
+        """
+        claimable = (PushPayload.objects
+                     .filter(processed_at__isnull=True)
+                     .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=timezone.now() - CLAIM_TIMEOUT)))
+        ids = list(claimable.order_by('id').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return None
+        token = uuid.uuid4().hex
+        # UPDATE এর WHERE আবার মেলানো হয়, তাই একসাথে দুই worker একই রো পায় না
+        claimable.filter(pk__in=ids).update(claim=token, claimed_at=timezone.now())
+        return list(PushPayload.objects.filter(claim=token, processed_at__isnull=True).order_by('id'))
+
+    def drain_one_by_one(self, batch, bad):
+        counts = {'accepted': 0, 'duplicates': 0, 'unknown': 0}
+        for payload in batch:
+            if payload.pk in bad:
+                continue
+            try:
+                result = store_push_punches(json.loads(payload.body))
+            except Exception as e:
+                bad[payload.pk] = str(e)
+                continue
+            for key in counts:
+                counts[key] += result[key]
+        return counts
@@ -0,0 +1,56 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance_app.models import PdfJob
+from attendance_app.utils.pdf_jobs import render_job
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Render queued PDF jobs into PDF_JOBS_ROOT in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue.")
+        parser.add_argument('--interval', type=float, default=2, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help="Delete finished jobs and their files older than this many days (0 = keep).")
+
+    def handle(self, *args, **options):
+        while True:
+            rendered = self.drain()
+            if options['purge_days']:
+                self.purge(timezone.now() - timedelta(days=options['purge_days']))
+            if not options['loop']:
+                break
+            if not rendered:
+                time.sleep(options['interval'])
+
+    def drain(self):
+        """কিউ খালি না হওয়া পর্যন্ত একটা একটা করে রেন্ডার; কয়টা হলো রিটার্ন করে।"""
+        total = 0
+        while True:
+            job = PdfJob.objects.filter(status=PdfJob.QUEUED).order_by('id').first()
+            if job is None:
+                return total
+            # একাধিক ওয়ার্কার চললে যে আগে status বদলাতে পারবে সে-ই নেবে
+            if not PdfJob.objects.filter(pk=job.pk, status=PdfJob.QUEUED).update(status=PdfJob.RUNNING):
+                continue
+
+            started = time.monotonic()
+            ok = render_job(job)
+            total += 1
+            if ok:
+                self.stdout.write(f"PDF #{job.pk} {job.kind} rendered in {time.monotonic() - started:.1f}s")
+            else:
+                logger.error(f"❌ PDF #{job.pk} {job.kind} failed: {job.error}")
+
+    def purge(self, cutoff):
+        for job in PdfJob.objects.filter(finished_at__lt=cutoff):
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
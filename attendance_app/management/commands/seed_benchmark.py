@@ -0,0 +1,44 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance_app.utils.benchmark import delete_bench_data, seed_company
+
+
+class Command(BaseCommand):
+    help = "Create synthetic companies, employees and months of punches/leaves/holidays for `bench`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1, help="Companies per employee count.")
+        parser.add_argument('--employees', type=int, nargs='+', default=[50],
+                            help="Employee counts (one company each), e.g. --employees 50 500 2000.")
+        parser.add_argument('--departments', type=int, default=4, help="Departments per company.")
+        parser.add_argument('--months', type=int, default=2,
+                            help="Months of history, from the 1st of the oldest month up to today.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (same seed, same data).")
+        parser.add_argument('--reset', action='store_true', help="Delete existing benchmark companies first.")
+
+    def handle(self, *args, **options):
+        if options['departments'] < 1 or options['months'] < 1 or min(options['employees']) < 1:
+            raise CommandError("--departments, --months and --employees must be positive.")
+
+        if options['reset']:
+            self.stdout.write(f"Deleted {delete_bench_data()} benchmark row(s).")
+
+        end_date = timezone.localdate()
+        start_date = end_date.replace(day=1)
+        for _ in range(options['months'] - 1):
+            start_date = (start_date - timedelta(days=1)).replace(day=1)
+
+        rng = random.Random(options['seed'])
+        for count in options['employees']:
+            for _ in range(options['companies']):
+                started = time.monotonic()
+                company, punches = seed_company(count, options['departments'], start_date, end_date, rng)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{company.name} (#{company.pk}): {count} employees, {punches} punches "
+                    f"{start_date}..{end_date} in {time.monotonic() - started:.1f}s"
+                ))
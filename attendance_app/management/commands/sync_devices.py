@@ -0,0 +1,130 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance_app.models import Department
+from attendance_app.utils.zk_import import import_attendance, DEVICE_TIMEOUT
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SyncLocked(Exception):
+    pass
+
+
+@contextmanager
+def file_lock(path):
+    """
+    OS-level exclusive lock; প্রসেস মরে গেলেও লক নিজে থেকেই ছেড়ে যায় (stale lock নেই)।
+    অন্য কেউ ধরে থাকলে SyncLocked।
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fh = open(path, 'a+')
+    try:
+        try:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            raise SyncLocked(path)
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        fh.close()
+
+
+class Command(BaseCommand):
+    help = "Sync attendance from every Department that has a ZK device IP/port configured."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help="Only sync departments of this Company id.")
+        parser.add_argument('--parallel', type=int, default=1, help="Number of devices to sync at once.")
+        parser.add_argument('--timeout', type=int, default=DEVICE_TIMEOUT, help="Per-device ZK timeout (seconds).")
+        parser.add_argument('--deadline', type=float, help="Global deadline for one run (seconds).")
+        parser.add_argument('--loop', action='store_true', help="Keep running, one sync every --interval seconds.")
+        parser.add_argument('--interval', type=int, default=3600, help="Seconds between runs in --loop mode.")
+        parser.add_argument(
+            '--lock-file',
+            default=os.path.join(settings.BASE_DIR, 'tmp', 'sync_devices.lock'),
+            help="Lock file that prevents overlapping runs.",
+        )
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError("--interval must be positive.")
+
+        interval = options['interval']
+        next_run = time.monotonic()
+        while True:
+            self.run_once(options)
+            if not options['loop']:
+                break
+
+            # Drift-corrected: পরের রান শুরুর সময় থেকে নয়, শিডিউল থেকে হিসাব হয়
+            next_run += interval
+            current = time.monotonic()
+            if current > next_run:
+                missed = int((current - next_run) // interval) + 1
+                self.stderr.write(f"Run overran the interval, skipping {missed} slot(s).")
+                next_run += missed * interval
+            time.sleep(next_run - current)
+
+    def discover_devices(self, company_id=None):
+        qs = (Department.objects
+              .select_related('company')
+              .filter(device_ip__isnull=False, device_port__isnull=False)
+              .order_by('company_id', 'id'))
+        if company_id:
+            qs = qs.filter(company_id=company_id)
+        return [{'ip': d.device_ip, 'port': d.device_port, 'department': d} for d in qs]
+
+    def run_once(self, options):
+        try:
+            with file_lock(options['lock_file']):
+                devices = self.discover_devices(options['company'])
+                if not devices:
+                    self.stdout.write("No departments with a device IP/port configured.")
+                    return
+
+                started = time.monotonic()
+                results = import_attendance(
+                    devices,
+                    parallel=options['parallel'],
+                    timeout=options['timeout'],
+                    deadline=options['deadline'],
+                )
+                self.print_summary(results, time.monotonic() - started)
+        except SyncLocked:
+            self.stderr.write(self.style.WARNING(
+                f"Another sync is still running (lock: {options['lock_file']}), skipping this run."
+            ))
+
+    def print_summary(self, results, total):
+        width = max([len(r['department']) for r in results] + [10])
+        self.stdout.write(f"{'Department'.ljust(width)}  {'Status':7}  {'Time':>8}  Message")
+        for r in results:
+            style = self.style.SUCCESS if r['status'] == 'success' else self.style.ERROR
+            self.stdout.write(style(
+                f"{r['department'].ljust(width)}  {r['status']:7}  {r.get('elapsed', 0):7.2f}s  {r['message']}"
+            ))
+        ok = sum(1 for r in results if r['status'] == 'success')
+        self.stdout.write(f"{ok}/{len(results)} devices synced in {total:.2f}s")
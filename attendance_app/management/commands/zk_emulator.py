@@ -0,0 +1,70 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance_app.models import Department
+from attendance_app.utils.zk_emulator import EmulatedDevice, ZKEmulator, synthetic_logs
+
+
+class Command(BaseCommand):
+    help = ("Serve fake ZK devices on localhost (TCP+UDP, pyzk protocol) for sync tests and load tests. "
+            "Runs until Ctrl+C.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=4370, help="First port; device N listens on port+N.")
+        parser.add_argument('--devices', type=int, default=1, help="Number of synthetic devices.")
+        parser.add_argument('--users', type=int, default=50, help="Users per synthetic device.")
+        parser.add_argument('--days', type=int, default=30, help="Days of punches, ending today.")
+        parser.add_argument('--punches-per-day', type=int, default=2)
+        parser.add_argument('--company', type=int,
+                            help="Serve one device per Department of this company, users = its employees.")
+        parser.add_argument('--assign', action='store_true',
+                            help="With --company: point each Department's device_ip/port at its emulator "
+                                 "(dev/benchmark databases only).")
+        parser.add_argument('--latency', type=float, default=0.0, help="Seconds before every reply.")
+        parser.add_argument('--disconnect-after', type=int,
+                            help="Drop the connection after this many commands in a session.")
+
+    def handle(self, *args, **options):
+        if options['assign'] and not options['company']:
+            raise CommandError("--assign needs --company.")
+
+        start = timezone.localdate() - timedelta(days=options['days'] - 1)
+        if options['company']:
+            departments = list(Department.objects.filter(company_id=options['company'])
+                               .prefetch_related('employees').order_by('id'))
+            if not departments:
+                raise CommandError(f"Company #{options['company']} has no departments.")
+            devices = [(dept, [(str(e.device_user_id), e.name) for e in dept.employees.all()])
+                       for dept in departments]
+        else:
+            devices = [(None, [(str(n * 100000 + i), f"User {i}") for i in range(1, options['users'] + 1)])
+                       for n in range(options['devices'])]
+
+        emulators = []
+        try:
+            for n, (dept, users) in enumerate(devices):
+                punches = synthetic_logs([user_id for user_id, _ in users], start, options['days'],
+                                         options['punches_per_day'])
+                device = EmulatedDevice(users, punches, latency=options['latency'],
+                                        disconnect_after=options['disconnect_after'])
+                emulator = ZKEmulator(device, host=options['host'], port=options['port'] + n).start()
+                emulators.append(emulator)
+                label = dept.name if dept else f"device {n + 1}"
+                if dept and options['assign']:
+                    dept.device_ip, dept.device_port = emulator.host, emulator.port
+                    dept.save(update_fields=['device_ip', 'device_port'])
+                self.stdout.write(f"{label}: {emulator.host}:{emulator.port} "
+                                  f"({len(users)} users, {len(users) * options['days'] * options['punches_per_day']} punches)")
+
+            self.stdout.write(self.style.SUCCESS("ZK emulator running, Ctrl+C to stop."))
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for emulator in emulators:
+                emulator.stop()
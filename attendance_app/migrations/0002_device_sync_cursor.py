@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-18 02:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_serial', models.PositiveIntegerField(default=0)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('department', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sync_cursor', to='attendance_app.department')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0002_device_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.TextField()),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0003_push_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='device_serial',
+            field=models.CharField(blank=True, help_text='Push mode (ADMS/iclock) device serial number (SN)', max_length=50, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='devicesynccursor',
+            name='attlog_stamp',
+            field=models.CharField(blank=True, default='', help_text='iclock push ডিভাইসের শেষ ATTLOG Stamp', max_length=32),
+        ),
+    ]
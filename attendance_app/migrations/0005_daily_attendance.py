@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:06
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0004_iclock_device_serial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('local_date', models.DateField()),
+                ('first_in', models.DateTimeField()),
+                ('last_out', models.DateTimeField(blank=True, null=True)),
+                ('punch_count', models.PositiveIntegerField(default=0)),
+                ('late', models.DurationField(default=datetime.timedelta)),
+                ('worked', models.DurationField(default=datetime.timedelta)),
+                ('overtime', models.DurationField(default=datetime.timedelta)),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendances', to='attendance_app.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendances', to='attendance_app.employee')),
+                ('first_punch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='attendance_app.attendance')),
+            ],
+            options={
+                'ordering': ['local_date', 'employee_id'],
+                'indexes': [models.Index(fields=['company', 'local_date'], name='attendance__company_453470_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyattendance',
+            constraint=models.UniqueConstraint(fields=('employee', 'local_date'), name='uniq_daily_employee_date'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, time, date
+
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def _metrics(day, first_in, last_out, shift):
+    # utils.rollup.day_metrics এর কপি (মাইগ্রেশন অ্যাপ কোডের উপর নির্ভর করবে না)
+    in_t, out_t = shift
+    expected = timezone.make_aware(datetime.combine(day, in_t))
+    length = datetime.combine(date(2000, 1, 1), out_t) - datetime.combine(date(2000, 1, 1), in_t)
+    if out_t < in_t:
+        length += timedelta(days=1)
+    late = max(first_in - expected, timedelta())
+    worked = timedelta()
+    if last_out:
+        worked = max(last_out - max(first_in, expected), timedelta())
+    return late, worked, max(worked - length, timedelta())
+
+
+def backfill(apps, schema_editor):
+    Attendance = apps.get_model('attendance_app', 'Attendance')
+    Employee = apps.get_model('attendance_app', 'Employee')
+    DailyAttendance = apps.get_model('attendance_app', 'DailyAttendance')
+
+    default_shift = (time(10, 30), time(20, 30))
+    employees = {}
+    for emp_id, company_id, in_t, out_t in Employee.objects.values_list(
+            'id', 'company_id', 'department__in_time', 'department__out_time'):
+        employees[emp_id] = (company_id, (in_t or default_shift[0], out_t or default_shift[1]))
+
+    batch = []
+
+    def flush_day(key, punches):
+        emp_id, day = key
+        company_id, shift = employees[emp_id]
+        first_in, first_id = punches[0]
+        last_out = punches[-1][0] if len(punches) > 1 else None
+        late, worked, overtime = _metrics(day, first_in, last_out, shift)
+        batch.append(DailyAttendance(
+            company_id=company_id, employee_id=emp_id, local_date=day,
+            first_in=first_in, last_out=last_out, first_punch_id=first_id,
+            punch_count=len(punches), late=late, worked=worked, overtime=overtime,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            DailyAttendance.objects.bulk_create(batch, ignore_conflicts=True)
+            batch.clear()
+
+    # employee, timestamp অর্ডারে স্ট্রিম করলে একই দিনের পাঞ্চ পাশাপাশি আসে
+    current_key, punches = None, []
+    rows = (Attendance.objects.order_by('employee_id', 'timestamp')
+            .values_list('id', 'employee_id', 'timestamp')
+            .iterator(chunk_size=5000))
+    for rec_id, emp_id, ts in rows:
+        key = (emp_id, timezone.localtime(ts).date())
+        if key != current_key:
+            if punches:
+                flush_day(current_key, punches)
+            current_key, punches = key, []
+        punches.append((ts, rec_id))
+    if punches:
+        flush_day(current_key, punches)
+    if batch:
+        DailyAttendance.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0005_daily_attendance'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
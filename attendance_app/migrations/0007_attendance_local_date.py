@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0006_backfill_daily_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='local_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'local_date'], name='attendance__employe_135c8b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['company', 'local_date'], name='attendance__company_32451d_idx'),
+        ),
+    ]
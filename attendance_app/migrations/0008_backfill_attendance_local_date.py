@@ -0,0 +1,19 @@
+from django.db import migrations
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    # TruncDate USE_TZ এ TIME_ZONE (Asia/Dhaka) অনুযায়ী তারিখ দেয়; পুরোটা একটা UPDATE এ হয়
+    Attendance = apps.get_model('attendance_app', 'Attendance')
+    Attendance.objects.filter(local_date__isnull=True).update(local_date=TruncDate('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0007_attendance_local_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
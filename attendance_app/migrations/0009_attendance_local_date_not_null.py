@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0008_backfill_attendance_local_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='local_date',
+            field=models.DateField(editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance_app', '0009_attendance_local_date_not_null'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('params', models.JSONField(default=dict)),
+                ('host', models.CharField(blank=True, default='', max_length=255)),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('file', models.FileField(blank=True, upload_to='pdfs/')),
+                ('filename', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pdf_jobs', to='attendance_app.company')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0010_pdf_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyattendance',
+            name='first_punch',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='attendance_app.attendance'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+import re
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'attendance_app_attendance'
+OLD = f'{TABLE}_unpartitioned'
+MONTHS_AHEAD = 3
+
+
+# utils.partitions এর কপি (মাইগ্রেশন অ্যাপ কোডের উপর নির্ভর করবে না)
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return "'%s'" % timezone.make_aware(datetime(month.year, month.month, 1)).isoformat()
+
+
+def partition(apps, schema_editor):
+    """
+    Attendance কে timestamp এর উপর মাসিক range পার্টিশনড টেবিলে বদলায় (শুধু PostgreSQL)।
+    PK (id, timestamp) হয় (পার্টিশন কী PK/unique এ থাকতেই হয়); Django র কাছে pk এখনো id।
+    ইনডেক্স আর constraint গুলো আগের নামেই আবার তৈরি হয়, যাতে পরের মাইগ্রেশন সেগুলো খুঁজে পায়।
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD}"')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{OLD}" INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")')
+
+        # যেসব মাসে ডাটা আছে + চলতি মাস থেকে MONTHS_AHEAD মাস; বাকিটা DEFAULT এ
+        cursor.execute(f'SELECT DISTINCT date_trunc(\'month\', "timestamp" AT TIME ZONE %s)::date FROM "{OLD}"',
+                       [settings.TIME_ZONE])
+        months = {row[0] for row in cursor.fetchall()}
+        current = timezone.localdate().replace(day=1)
+        months.update(_add_months(current, n) for n in range(MONTHS_AHEAD + 1))
+        for month in sorted(months):
+            cursor.execute(f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" '
+                           f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(_add_months(month, 1))})')
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD}"')
+
+        cursor.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                       "WHERE conrelid = %s::regclass AND contype IN ('u', 'f')", [OLD])
+        constraints = cursor.fetchall()
+        cursor.execute("SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x WHERE x.indrelid = %s::regclass "
+                       "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)", [OLD])
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f'SELECT COALESCE(MAX("id"), 0) FROM "{OLD}"')
+        max_id = cursor.fetchone()[0]
+        cursor.execute(f'DROP TABLE "{OLD}"')  # পুরনো identity sequence ও সাথে যায়
+
+        # পার্টিশনড টেবিলে identity কলাম (PG < 17) হয় না, তাই owned sequence (serial এর মতো)
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}"."id"')
+        cursor.execute(f'SELECT setval(\'"{TABLE}_id_seq"\', %s, %s)', [max(max_id, 1), max_id > 0])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN "id" SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ("id", "timestamp")')
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+        for definition in indexes:
+            cursor.execute(re.sub(rf' ON (ONLY )?("?\w+"?\.)?"?{OLD}"? ', f' ON "{TABLE}" ', definition, count=1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0011_dailyattendance_first_punch_no_db_constraint'),
+    ]
+
+    # পার্টিশনড টেবিল আগের স্কিমার সাথেও চলে, তাই রিভার্সে কিছু করার নেই
+    operations = [
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:01
+
+import os
+
+import attendance_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_public_files(apps, schema_editor):
+    # আগের PDF গুলো MEDIA_ROOT/pdfs/ এ ছিল (/media/ দিয়ে সবার জন্য খোলা); মুছে দেওয়া, জব আবার চাইলে নতুন করে রেন্ডার হবে
+    PdfJob = apps.get_model('attendance_app', 'PdfJob')
+    for job in PdfJob.objects.exclude(file=''):
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, job.file.name))
+        except OSError:
+            pass
+        job.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0012_partition_attendance'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_public_files, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pdfjob',
+            name='file',
+            field=models.FileField(blank=True, storage=attendance_app.models.PdfJobStorage(), upload_to='pdfs/'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0013_pdf_job_private_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='devicesynccursor',
+            name='last_serial',
+        ),
+        migrations.AddField(
+            model_name='devicesynccursor',
+            name='last_user_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance_app', '0014_device_sync_cursor_user_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushpayload',
+            name='claim',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='pushpayload',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
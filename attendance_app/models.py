@@ -1,5 +1,11 @@
+import os
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # সপ্তাহের দিনের জন্য অপশন টুপল
 WEEKDAYS = [
@@ -58,6 +64,10 @@ class Department(models.Model):
 
     device_ip = models.GenericIPAddressField(blank=True, null=True)
     device_port = models.IntegerField(blank=True, null=True)
+    device_serial = models.CharField(
+        max_length=50, blank=True, null=True, unique=True,
+        help_text="Push mode (ADMS/iclock) device serial number (SN)"
+    )
 
     in_time = models.TimeField(default='10:30', help_text="Office start time")
     out_time = models.TimeField(default='20:30', help_text="Office end time")
@@ -92,9 +102,72 @@ class Employee(models.Model):
     def __str__(self):
         return f"{self.name} ({self.company.name if self.company else 'No Company'})"
 
+class DeviceSyncCursor(models.Model):
+    """
+    প্রতি ডিভাইসের (Department) সিঙ্ক watermark।
+    শেষ ইনজেস্ট হওয়া পাঞ্চের timestamp আর ওই সেকেন্ডে যাদের পাঞ্চ নেওয়া হয়েছে তাদের user_id রাখা হয়,
+    পরের সিঙ্কে শুধু এর পরের রেকর্ড প্রসেস হবে। (pyzk এর uid ইউজারের ইন্টারনাল আইডি, লগের সিরিয়াল নয়,
+    তাই একই সেকেন্ডে পরে লগ হওয়া অন্য ইউজারের পাঞ্চ uid দিয়ে আলাদা করা যায় না।)
+    """
+    department = models.OneToOneField(
+        Department,
+        on_delete=models.CASCADE,
+        related_name='sync_cursor',
+    )
+    last_timestamp = models.DateTimeField(blank=True, null=True)
+    last_user_ids = models.JSONField(default=list, blank=True)
+    attlog_stamp = models.CharField(max_length=32, blank=True, default='',
+                                    help_text="iclock push ডিভাইসের শেষ ATTLOG Stamp")
+    last_synced_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.department} @ {self.last_timestamp or 'beginning'}"
+
+    def is_new(self, timestamp, user_id):
+        if self.last_timestamp is None:
+            return True
+        if timestamp != self.last_timestamp:
+            return timestamp > self.last_timestamp
+        return str(user_id) not in self.last_user_ids
+
+    def advance(self, punches):
+        """ইনজেস্ট হওয়া নতুন (user_id, timestamp) পাঞ্চ দিয়ে watermark এগোনো (save করে না)।"""
+        if not punches:
+            return
+        newest = max(ts for _, ts in punches)
+        boundary = {str(user_id) for user_id, ts in punches if ts == newest}
+        if newest == self.last_timestamp:
+            boundary.update(self.last_user_ids)
+        self.last_timestamp, self.last_user_ids = newest, sorted(boundary)
+
+    def rewind(self, to=None):
+        """to=None হলে পুরো হিস্টরি আবার সিঙ্ক হবে।"""
+        self.last_timestamp = to
+        self.last_user_ids = []
+        self.save(update_fields=['last_timestamp', 'last_user_ids'])
+
+
 from django.db import models
 from django.core.exceptions import ValidationError
 
+
+def local_date_for(timestamp):
+    """timestamp এর লোকাল (TIME_ZONE) তারিখ; naive হলে লোকাল টাইম ধরা হয়।"""
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timezone.localtime(timestamp).date()
+
+
+def local_date_filter(start_date, end_date):
+    """
+    Attendance এর [start_date, end_date] লোকাল তারিখের filter kwargs।
+    একই রেঞ্জ timestamp দিয়েও দেওয়া, যাতে PostgreSQL এ (timestamp এ মাসিক পার্টিশন) শুধু ওই মাসগুলো স্ক্যান হয়।
+    """
+    lower = timezone.make_aware(datetime.combine(start_date, time.min))
+    upper = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return {'local_date__range': (start_date, end_date), 'timestamp__gte': lower, 'timestamp__lt': upper}
+
+
 class Attendance(models.Model):
     STATUS_CHOICES = [
         ('In', 'In'),
@@ -114,6 +187,9 @@ class Attendance(models.Model):
         related_name='attendances',
     )
     timestamp = models.DateTimeField(db_index=True)
+    # timestamp__date লুকআপ প্রতি রো তে timezone কনভার্শন চালায়, ইনডেক্স ধরে না;
+    # তাই লোকাল তারিখ আলাদা কলামে রাখা (save/bulk ingest এ সেট হয়)
+    local_date = models.DateField(editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
 
     def __str__(self):
@@ -130,6 +206,11 @@ class Attendance(models.Model):
         # save এর সময়ও company ensure করি (signals ছাড়াই কাজ হবে)
         if self.employee and not self.company:
             self.company = getattr(self.employee, 'company', None)
+        if self.timestamp:
+            self.local_date = local_date_for(self.timestamp)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'timestamp' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'local_date'}
         super().save(*args, **kwargs)
 
     class Meta:
@@ -145,6 +226,8 @@ class Attendance(models.Model):
             models.Index(fields=['employee', 'timestamp']),
             models.Index(fields=['company', 'timestamp']),
             models.Index(fields=['status', 'timestamp']),
+            models.Index(fields=['employee', 'local_date']),
+            models.Index(fields=['company', 'local_date']),
         ]
         # তোমার রিপোর্টিং সুবিধা মতো বদলাতে পারো
         ordering = ['-timestamp']
@@ -152,6 +235,137 @@ class Attendance(models.Model):
         verbose_name_plural = "Attendances"
 
 
+class DailyAttendance(models.Model):
+    """
+    (employee, local date) প্রতি একটা rollup রো: First In / Last Out আর তার থেকে হিসাব।
+    raw Attendance বদলালে utils.rollup.refresh_daily_attendance দিয়ে আপডেট হয়;
+    রিপোর্টগুলো raw পাঞ্চ না পড়ে এখান থেকে পড়ে।
+
+    late/worked/overtime কর্মদিবস ধরে হিসাব করা (ডিপার্টমেন্টের শিফট অনুযায়ী);
+    ছুটির দিনের পুরো কাজ ওভারটাইম কিনা সেটা রিপোর্ট নিজে ঠিক করে।
+    """
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='daily_attendances',
+        null=True,
+        blank=True,
+    )
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='daily_attendances',
+    )
+    local_date = models.DateField()
+    first_in = models.DateTimeField()
+    last_out = models.DateTimeField(blank=True, null=True)  # একটাই পাঞ্চ হলে None
+    # DB লেভেলের FK নেই: পার্টিশনড Attendance এ id একা ইউনিক নয় (PK = id, timestamp);
+    # SET_NULL Django ই করে, detach করা মাসের জন্য utils.partitions
+    first_punch = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+    )
+    punch_count = models.PositiveIntegerField(default=0)
+    late = models.DurationField(default=timedelta)
+    worked = models.DurationField(default=timedelta)
+    overtime = models.DurationField(default=timedelta)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['employee', 'local_date'],
+                name='uniq_daily_employee_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'local_date']),
+        ]
+        ordering = ['local_date', 'employee_id']
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.local_date} ({self.punch_count} punches)"
+
+
+class PushPayload(models.Model):
+    """
+    zkteco_push_view এ আসা raw payload (staging queue)।
+    ডিভাইস সাথে সাথে 202 পায়; drain_push_queue কমান্ড ব্যাচে Attendance এ তোলে।
+    """
+    body = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    error = models.TextField(blank=True, default='')
+    # কোন drain_push_queue worker নিয়েছে (একই payload দুই worker এ না যায়)
+    claim = models.CharField(max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Push #{self.pk} @ {self.received_at:%Y-%m-%d %H:%M:%S}"
+
+
+class PdfJobStorage(FileSystemStorage):
+    """PDF জবের ফাইল MEDIA_ROOT এর বাইরে (PDF_JOBS_ROOT); /media/ দিয়ে নয়, শুধু pdf_job_status দিয়ে সার্ভ হয়।"""
+
+    @property
+    def base_location(self):
+        return settings.PDF_JOBS_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        return None
+
+
+class PdfJob(models.Model):
+    """
+    ব্যাকগ্রাউন্ডে রেন্ডার হওয়া PDF (utils.pdf_jobs)।
+    cache_key = (kind, company, normalized params, data version); একই key তে done জব থাকলে
+    ফাইলটাই সার্ভ হয়, ডাটা বদলালে version বদলে যায় তাই নতুন জব।
+    """
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='pdf_jobs',
+        null=True,
+        blank=True,
+    )
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    params = models.JSONField(default=dict)
+    host = models.CharField(max_length=255, blank=True, default='')  # লোগো/স্ট্যাটিক URL এর জন্য
+    cache_key = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    file = models.FileField(upload_to='pdfs/', storage=PdfJobStorage(), blank=True)
+    filename = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"PDF #{self.pk} {self.kind} ({self.status})"
+
 
 class LeaveRequest(models.Model):
     LEAVE_TYPES = [
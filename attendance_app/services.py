@@ -1,4 +1,6 @@
-from django.db import transaction, IntegrityError
+from contextlib import nullcontext
+
+from django.db import connection, transaction, IntegrityError
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
@@ -46,3 +48,74 @@ def activate_employee_with_limit(*, employee: Employee) -> Employee:
         employee.is_active = True
         employee.save(update_fields=["is_active"])
     return employee
+
+
+def _device_name(user):
+    """ডিভাইসের নাম; খালি হলে pyzk "NN-<id>" বসায়, সেটাকে নাম ধরা হয় না।"""
+    name = (getattr(user, "name", "") or "").strip()
+    return "" if not name or name == f"NN-{user.user_id}" else name
+
+
+def sync_device_users(*, company, department, device_users, sub_user=None) -> dict:
+    """
+    ডিভাইসের ইউজার লিস্ট কোম্পানির Employee দের সাথে মিলিয়ে নেয়, ইউজার প্রতি কোয়েরি ছাড়া।
+    - কোম্পানির Employee একটা কোয়েরিতে; কিছু না বদলালে এটুকুই
+    - নতুন ইউজার bulk_create (create_employee_with_limit এর মতো company লক করে, সাবস্ক্রিপশনের
+      employee limit এর মধ্যে যতজন ধরে; বাকিরা skipped, তাদের পাঞ্চ 'unknown' হয়ে যায়)
+    - ডিভাইসে নাম বদলালে bulk_update
+    Returns: {'created', 'renamed', 'skipped', 'skipped_ids', 'limit_error'}; skipped_ids = যাদের বানানো
+    গেল না তাদের device_user_id (limit বাড়লে পরের সিঙ্কে বানানো হবে, তাই তাদের পাঞ্চ এখনো "synced" নয়)।
+    """
+    result = {"created": 0, "renamed": 0, "skipped": 0, "skipped_ids": [], "limit_error": None}
+
+    device_names = {}
+    for u in device_users:
+        try:
+            device_names[int(u.user_id)] = _device_name(u)
+        except (TypeError, ValueError):
+            continue  # device_user_id IntegerField; সংখ্যা না হলে ম্যাপ করা যায় না
+
+    existing = {e.device_user_id: e for e in
+                Employee.objects.filter(company=company).only("id", "device_user_id", "name")}
+
+    renamed = []
+    for uid, name in device_names.items():
+        emp = existing.get(uid)
+        if emp and name and emp.name != name:
+            emp.name = name
+            renamed.append(emp)
+    if renamed:
+        Employee.objects.bulk_update(renamed, ["name"])
+        result["renamed"] = len(renamed)
+
+    new_ids = [uid for uid in device_names if uid not in existing]
+    if not new_ids:
+        return result
+
+    # create_employee_with_limit এর মতো company রো লক করে গোনা। SQLite এ row lock নেই, আর
+    # read-then-write transaction প্যারালাল সিঙ্কে "database is locked" দেয়; সেখানে লক ছাড়াই।
+    locking = connection.features.has_select_for_update
+    with transaction.atomic() if locking else nullcontext():
+        try:
+            if company is None:
+                raise ValidationError("Company is required.")
+            if locking:
+                company.__class__.objects.select_for_update().get(pk=company.pk)
+            limit = get_employee_limit_for(company, user=sub_user)
+            current = Employee.objects.filter(company=company, is_active=True).count()
+            allowed = max(limit - current, 0)
+        except ValidationError as e:
+            result["limit_error"] = "; ".join(e.messages)
+            allowed = 0
+
+        Employee.objects.bulk_create([
+            Employee(company=company, department=department, device_user_id=uid,
+                     name=device_names[uid] or f"User {uid}")
+            for uid in new_ids[:allowed]
+        ], ignore_conflicts=True)  # একই সময়ে আরেকটা সিঙ্ক একই ইউজার বানালে unique_together আটকায়
+    result["created"] = min(allowed, len(new_ids))
+    result["skipped_ids"] = new_ids[allowed:]
+    result["skipped"] = len(result["skipped_ids"])
+    if result["skipped"] and not result["limit_error"]:
+        result["limit_error"] = f"Employee limit reached ({current + result['created']}/{limit})."
+    return result
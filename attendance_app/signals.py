@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, Company, DailyAttendance, Department, Employee, Holiday
+from .utils.rollup import refresh_daily_attendance, recalculate_daily_attendance
+from .utils.versions import bump_company_version
+from .utils.dashboard_stats import reset_trend_buckets
+from .utils.company_calendar import invalidate_company_calendar
+
+# bulk_create/bulk_update এ সিগনাল যায় না, সেই পাথগুলো (ingest) নিজে refresh_daily_attendance ডাকে;
+# এখানে শুধু ফর্ম/অ্যাডমিন থেকে একটা একটা করে এডিট ধরা হয়।
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_day(sender, instance, raw=False, **kwargs):
+    # এডিটে পাঞ্চ অন্য দিনে সরে গেলে পুরনো দিনটাও রিফ্রেশ করতে হবে
+    instance._rollup_old_key = None
+    if instance.pk and not raw:
+        instance._rollup_old_key = (sender.objects.filter(pk=instance.pk)
+                                    .values_list('employee_id', 'local_date').first())
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.employee_id, instance.local_date)}
+    if getattr(instance, '_rollup_old_key', None):
+        keys.add(instance._rollup_old_key)
+    refresh_daily_attendance(keys)
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_rollup_on_delete(sender, instance, **kwargs):
+    refresh_daily_attendance({(instance.employee_id, instance.local_date)})
+
+
+@receiver(pre_save, sender=Department)
+def remember_department_shift(sender, instance, raw=False, **kwargs):
+    instance._old_shift = None
+    if instance.pk and not raw:
+        instance._old_shift = sender.objects.filter(pk=instance.pk).values_list('in_time', 'out_time').first()
+
+
+@receiver(post_save, sender=Department)
+def recalculate_on_shift_change(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    old = getattr(instance, '_old_shift', None)
+    current = sender.objects.filter(pk=instance.pk).values_list('in_time', 'out_time').first()
+    if old and old != current:
+        recalculate_daily_attendance(DailyAttendance.objects.filter(employee__department=instance))
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_department(sender, instance, raw=False, **kwargs):
+    instance._old_department_id = None
+    if instance.pk and not raw:
+        instance._old_department_id = (sender.objects.filter(pk=instance.pk)
+                                       .values_list('department_id', flat=True).first())
+
+
+@receiver(post_save, sender=Employee)
+def recalculate_on_department_change(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    if getattr(instance, '_old_department_id', None) != instance.department_id:
+        recalculate_daily_attendance(DailyAttendance.objects.filter(employee=instance))
+        # পুরনো দিনগুলো আগের ডিপার্টমেন্টের বাকেটে গোনা আছে
+        reset_trend_buckets(instance.company_id)
+
+
+@receiver(post_delete, sender=Employee)
+def reset_trend_on_employee_delete(sender, instance, **kwargs):
+    # rollup রো cascade এ মুছে যায় (refresh ছাড়া), তাই ট্রেন্ড বাকেট নতুন করে
+    reset_trend_buckets(instance.company_id)
+
+
+# কোম্পানি ক্যালেন্ডার cache (utils.company_calendar): holiday/weekly off/শিফট বদলালে নতুন করে বানাতে হবে
+@receiver([post_save, post_delete], sender=Holiday, dispatch_uid='calendar-holiday')
+@receiver([post_save, post_delete], sender=Department, dispatch_uid='calendar-department')
+def invalidate_calendar_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    company_id = instance.company_id
+
+    def invalidate():
+        invalidate_company_calendar(company_id)
+        # ট্রেন্ডের late শুধু কর্মদিবসে গোনা, তাই বাকেটও
+        reset_trend_buckets(company_id)
+
+    # commit এর পরে, যাতে মাঝখানে অন্য রিকোয়েস্ট পুরনো ক্যালেন্ডার আবার ক্যাশে না রাখে
+    transaction.on_commit(invalidate)
+
+
+# রিপোর্ট/PDF ক্যাশের ডাটা version (utils.versions)। Attendance এর পরিবর্তন rollup রিফ্রেশ থেকেই bump হয়;
+# বাকি যেসব মডেল রিপোর্টে আসে সেগুলো এখানে। অন্য অ্যাপের মডেল lazy "app.Model" sender দিয়ে।
+VERSIONED_MODELS = [
+    'attendance_app.Company', 'attendance_app.Department', 'attendance_app.Employee',
+    'attendance_app.LeaveRequest', 'attendance_app.Holiday',
+    'payroll.EmployeeSalary', 'payroll.SalarySummary', 'payroll.PayrollMonth',
+    'userapp.EmployeeProfile',
+]
+
+
+def bump_version_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    company_id = instance.pk if sender is Company else getattr(instance, 'company_id', None)
+    if company_id is None and getattr(instance, 'employee_id', None):
+        # EmployeeSalary/EmployeeProfile: company employee থেকে
+        company_id = Employee.objects.filter(pk=instance.employee_id).values_list('company_id', flat=True).first()
+    # None = কোম্পানি-নিরপেক্ষ রিপোর্ট (যেমন প্রোফাইল লিস্ট)
+    bump_company_version(company_id, None)
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_change, sender=_model, dispatch_uid=f'version-save-{_model}')
+    post_delete.connect(bump_version_on_change, sender=_model, dispatch_uid=f'version-delete-{_model}')
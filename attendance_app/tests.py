@@ -0,0 +1,1053 @@
+import csv
+import json
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import make_aware
+
+from attendance_app.management.commands.sync_devices import file_lock
+from attendance_app.models import (
+    Company, Department, DeviceSyncCursor, Employee, Attendance, DailyAttendance, Holiday, LeaveRequest, PdfJob,
+    PushPayload, UserProfile, local_date_filter,
+)
+from attendance_app.services import sync_device_users
+from attendance_app.utils.company_calendar import CACHE_KEY
+from attendance_app.utils.day_status import (
+    build_day_status, PRESENT, HOLIDAY, WEEKLY_OFF, LEAVE, ABSENT, WORKDAY,
+)
+from attendance_app.utils import dashboard_stats
+from attendance_app.utils.dashboard_stats import trend_buckets
+from attendance_app.utils.exports import Workbook, XLSX_CONTENT_TYPE
+from attendance_app.utils.ingest import _insert_new, ingest_punches, store_push_punches
+from attendance_app.utils.iclock import parse_attlog
+from attendance_app.utils.intervals import CalendarIndex, IntervalIndex
+from attendance_app.utils.partitions import add_months, create_partition, list_partitions, partition_name
+from attendance_app.utils.pdf_jobs import can_view_job, job_for_request
+from attendance_app.utils.zk_emulator import EmulatedDevice, ZKEmulator, synthetic_logs
+from attendance_app.utils import zk_import
+from attendance_app.utils.zk_import import import_attendance
+from attendance_project.middleware import BudgetExceeded, request_metrics, shared_tracemalloc
+from subscription_app.models import SubscriptionPlan, UserSubscription
+from zk import ZK
+from attendance_app.views import (attendance_list_export, dashboard_stream, monthly_work_time_pdf,
+                                  monthly_work_time_report, zkteco_push_view)
+
+
+class FakeZKUser:
+    def __init__(self, user_id, name):
+        self.user_id = str(user_id)
+        self.name = name
+
+
+class FakeZKPunch:
+    def __init__(self, uid, user_id, timestamp):
+        self.uid = uid
+        self.user_id = str(user_id)
+        self.timestamp = timestamp
+
+
+class FakeZK:
+    """pyzk ZK এর মতো ইন্টারফেস; হার্ডওয়্যার ছাড়াই সিঙ্ক টেস্ট করার জন্য।"""
+    devices = {}
+
+    def __init__(self, ip, port=4370, timeout=10, **kwargs):
+        self.ip = ip
+        self.timeout = timeout
+
+    def connect(self):
+        device = self.devices[self.ip]
+        if device.get('hold'):
+            device['hold'].wait()
+        if device.get('offline'):
+            raise ConnectionError(f"can't reach device {self.ip}")
+        return self
+
+    def disable_device(self):
+        pass
+
+    def enable_device(self):
+        pass
+
+    def disconnect(self):
+        if self.devices[self.ip].get('finished'):
+            self.devices[self.ip]['finished'].set()
+
+    def get_users(self):
+        return self.devices[self.ip]['users']
+
+    def get_attendance(self):
+        return list(self.devices[self.ip]['logs'])
+
+
+def subscribe(company, employee_limit=20):
+    """company র owner আর active সাবস্ক্রিপশন (ডিভাইস সিঙ্কে নতুন employee এর limit এর জন্য)।"""
+    company.owner = User.objects.create_user(f"owner{company.pk}")
+    company.save(update_fields=['owner'])
+    plan = SubscriptionPlan.objects.create(name=f"Plan {company.pk}", price=Decimal('100'),
+                                           employee_limit=employee_limit)
+    UserSubscription.objects.create(user=company.owner, plan=plan, end_date=date.today() + timedelta(days=30))
+
+
+class ImportAttendanceTests(TransactionTestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        subscribe(self.company)
+        self.departments = []
+        FakeZK.devices = {}
+        for i in range(3):
+            dept = Department.objects.create(company=self.company, name=f"Branch {i}",
+                                             device_ip=f"10.0.0.{i}", device_port=4370)
+            self.departments.append(dept)
+            FakeZK.devices[dept.device_ip] = {
+                'users': [FakeZKUser(100 + i, f"Emp {i}")],
+                'logs': [
+                    FakeZKPunch(1, 100 + i, datetime(2025, 12, 2, 9, 0)),
+                    FakeZKPunch(2, 100 + i, datetime(2025, 12, 2, 9, 3)),
+                    FakeZKPunch(3, 100 + i, datetime(2025, 12, 2, 18, 0)),
+                ],
+            }
+
+    def _devices(self):
+        return [{'ip': d.device_ip, 'port': d.device_port, 'department': d} for d in self.departments]
+
+    def test_parallel_matches_sequential_results(self):
+        FakeZK.devices['10.0.0.1']['offline'] = True
+
+        results = import_attendance(self._devices(), parallel=3, zk_class=FakeZK)
+
+        self.assertEqual([r['department'] for r in results], [d.name for d in self.departments])
+        self.assertEqual([r['status'] for r in results], ['success', 'error', 'success'])
+        # First In + Last Out, 9:03 debounce এ বাদ
+        self.assertEqual(Attendance.objects.count(), 4)
+        self.assertEqual(Employee.objects.filter(company=self.company).count(), 2)
+
+    def test_global_deadline_reports_slow_device(self):
+        slow = FakeZK.devices['10.0.0.2']
+        slow['hold'], slow['finished'] = threading.Event(), threading.Event()
+
+        results = import_attendance(self._devices(), parallel=3, deadline=0.5, zk_class=FakeZK)
+
+        self.assertEqual([r['status'] for r in results], ['success', 'success', 'error'])
+        self.assertIn("deadline", results[2]['message'])
+        # deadline এর পরে ডিভাইস সাড়া দিলেও worker কিছু লেখে না, cursor ও নড়ে না
+        slow['hold'].set()
+        self.assertTrue(slow['finished'].wait(5))
+        self.assertFalse(Attendance.objects.filter(employee__department=self.departments[2]).exists())
+        self.assertFalse(DeviceSyncCursor.objects.filter(department=self.departments[2]).exists())
+
+    def test_deadline_applies_to_a_slow_device_in_sequential_mode(self):
+        slow = FakeZK.devices['10.0.0.0']
+        slow['hold'], slow['finished'] = threading.Event(), threading.Event()
+
+        results = import_attendance(self._devices(), parallel=1, deadline=0.5, zk_class=FakeZK)
+
+        self.assertEqual([r['status'] for r in results], ['error'] * 3)
+        slow['hold'].set()
+        self.assertTrue(slow['finished'].wait(5))
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(DeviceSyncCursor.objects.exists())
+
+    def test_device_failing_right_after_the_deadline_keeps_its_own_error(self):
+        failing = FakeZK.devices['10.0.0.1']
+        failing['hold'], failing['offline'] = threading.Event(), True
+        real_wait = zk_import.wait
+
+        def wait(futures, timeout=None):
+            result = real_wait(futures, timeout=timeout)
+            if timeout is not None:
+                # deadline পার, কিন্তু gate বন্ধের আগেই ডিভাইসটা connection error এ শেষ
+                failing['hold'].set()
+                real_wait([futures[1]])
+            return result
+
+        with mock.patch('attendance_app.utils.zk_import.wait', wait):
+            results = import_attendance(self._devices(), parallel=3, deadline=0.5, zk_class=FakeZK)
+
+        self.assertEqual([r['status'] for r in results], ['success', 'error', 'success'])
+        self.assertIn("can't reach device", results[1]['message'])
+
+    def test_second_run_only_ingests_new_records(self):
+        import_attendance(self._devices()[:1], zk_class=FakeZK)
+        FakeZK.devices['10.0.0.0']['logs'].append(FakeZKPunch(4, 100, datetime(2025, 12, 2, 19, 0)))
+
+        results = import_attendance(self._devices()[:1], zk_class=FakeZK)
+
+        self.assertIn("1 new punches", results[0]['message'])
+        out = Attendance.objects.get(employee__device_user_id=100, status='Out')
+        self.assertEqual(out.timestamp.hour, 13)  # 19:00 Asia/Dhaka
+
+    def test_cursor_boundary_keeps_other_users_in_the_same_second(self):
+        device = FakeZK.devices['10.0.0.0']
+        import_attendance(self._devices()[:1], zk_class=FakeZK)
+        # শেষ সেকেন্ডেই (18:00) আরেকজনের পাঞ্চ পরে লগ হলো; তার device uid ছোট
+        device['users'].append(FakeZKUser(200, "Late Logger"))
+        device['logs'].append(FakeZKPunch(0, 200, datetime(2025, 12, 2, 18, 0)))
+
+        result = import_attendance(self._devices()[:1], zk_class=FakeZK)[0]
+
+        self.assertIn("1 new punches, 3 already synced", result['message'])
+        self.assertTrue(Attendance.objects.filter(employee__device_user_id=200).exists())
+        cursor = DeviceSyncCursor.objects.get(department=self.departments[0])
+        self.assertEqual(cursor.last_user_ids, ['100', '200'])
+        self.assertIn("0 new punches", import_attendance(self._devices()[:1], zk_class=FakeZK)[0]['message'])
+
+    def test_punches_of_users_over_the_limit_are_synced_once_the_limit_allows(self):
+        subscription = UserSubscription.objects.get(user=self.company.owner)
+        subscription.plan = SubscriptionPlan.objects.create(name="Tiny", price=Decimal('10'), employee_limit=0)
+        subscription.save()
+        device = FakeZK.devices['10.0.0.0']
+        device['users'].append(FakeZKUser(200, "Later"))
+        device['logs'].append(FakeZKPunch(4, 200, datetime(2025, 12, 2, 8, 0)))
+
+        import_attendance(self._devices()[:1], zk_class=FakeZK)
+        self.assertFalse(Attendance.objects.exists())
+
+        subscription.plan = SubscriptionPlan.objects.create(name="Big", price=Decimal('10'), employee_limit=10)
+        subscription.save()
+        import_attendance(self._devices()[:1], zk_class=FakeZK)
+
+        self.assertEqual(Attendance.objects.filter(employee__device_user_id=200).count(), 1)
+        self.assertEqual(Attendance.objects.filter(employee__device_user_id=100).count(), 2)
+        cursor = DeviceSyncCursor.objects.get(department=self.departments[0])
+        self.assertEqual(cursor.last_timestamp, make_aware(datetime(2025, 12, 2, 18, 0)))
+
+    def test_user_sync_is_bulk_and_respects_employee_limit(self):
+        UserSubscription.objects.filter(user=self.company.owner).update(
+            plan=SubscriptionPlan.objects.create(name="Tiny", price=Decimal('10'), employee_limit=2))
+        dept = self.departments[0]
+        FakeZK.devices[dept.device_ip]['users'] = [FakeZKUser(100 + i, f"Emp {i}") for i in range(3)]
+        FakeZK.devices[dept.device_ip]['logs'] = [FakeZKPunch(i + 1, 100 + i, datetime(2025, 12, 2, 9, 0))
+                                                  for i in range(3)]
+
+        result = import_attendance(self._devices()[:1], zk_class=FakeZK)[0]
+
+        self.assertEqual(result['status'], 'success')
+        self.assertIn("1 device users not added", result['message'])
+        self.assertEqual(sync_device_users(company=self.company, department=dept,
+                                           device_users=FakeZK.devices[dept.device_ip]['users'])['skipped_ids'], [102])
+        self.assertEqual(sorted(Employee.objects.values_list('device_user_id', flat=True)), [100, 101])
+        self.assertEqual(Attendance.objects.count(), 2)  # limit এর বাইরের ইউজারের পাঞ্চ unknown
+
+        # পরের সিঙ্কে কিছু না বদলালে ইউজার সিঙ্ক একটা কোয়েরি; ডিভাইসে নাম বদলালে bulk_update
+        users = FakeZK.devices[dept.device_ip]['users'][:2]
+        with self.assertNumQueries(1):
+            sync_device_users(company=self.company, department=dept, device_users=users)
+        users[0].name = "Rahim"
+        self.assertEqual(sync_device_users(company=self.company, department=dept, device_users=users)['renamed'], 1)
+        self.assertTrue(Employee.objects.filter(device_user_id=100, name="Rahim").exists())
+
+
+
+class ZKEmulatorTests(TestCase):
+    """আসল pyzk ক্লায়েন্ট, localhost এর ZK ইমুলেটরের বিরুদ্ধে।"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        subscribe(self.company)
+        self.users = [(str(100 + i), f"Emp {i}") for i in range(5)]
+        self.punches = [(user_id, datetime(2025, 12, 2, hour, i)) for i, (user_id, _) in enumerate(self.users)
+                        for hour in (9, 18)]
+
+    def _sync(self, device):
+        with ZKEmulator(device) as emu:
+            dept = Department.objects.create(company=self.company, name=f"Branch {emu.port}",
+                                             device_ip=emu.host, device_port=emu.port)
+            return import_attendance([{'ip': emu.host, 'port': emu.port, 'department': dept}], timeout=5)[0]
+
+    def test_sync_over_tcp(self):
+        result = self._sync(EmulatedDevice(self.users, self.punches))
+
+        self.assertEqual(result['status'], 'success', result['message'])
+        self.assertEqual(Employee.objects.filter(company=self.company).count(), 5)
+        self.assertEqual(Attendance.objects.filter(company=self.company).count(), 10)
+
+    def test_dropped_connection_is_an_error_result(self):
+        result = self._sync(EmulatedDevice(self.users, self.punches, disconnect_after=4))
+
+        self.assertEqual(result['status'], 'error')
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_sync_devices_command_and_lock(self):
+        lock_file = f"{tempfile.mkdtemp()}/sync.lock"
+        self.addCleanup(shutil.rmtree, lock_file.rsplit('/', 1)[0])
+        with ZKEmulator(EmulatedDevice(self.users, self.punches)) as emu:
+            Department.objects.create(company=self.company, name="Branch", device_ip=emu.host, device_port=emu.port)
+            out, err = StringIO(), StringIO()
+            with file_lock(lock_file):
+                call_command('sync_devices', lock_file=lock_file, timeout=5, stdout=out, stderr=err)
+            self.assertIn("Another sync is still running", err.getvalue())
+            self.assertFalse(Attendance.objects.exists())
+
+            call_command('sync_devices', lock_file=lock_file, timeout=5, parallel=2, stdout=out, stderr=err)
+
+        self.assertIn("1/1 devices synced", out.getvalue())
+        self.assertEqual(Attendance.objects.filter(company=self.company).count(), 10)
+
+    def test_large_log_is_read_in_chunks_over_udp(self):
+        ids = [user_id for user_id, _ in self.users]
+        # ৪০ বাইট × ২০০০ রেকর্ড > UDP এর ১৬K চাংক
+        device = EmulatedDevice(self.users, list(synthetic_logs(ids, date(2025, 12, 1), 200)))
+        with ZKEmulator(device) as emu:
+            conn = ZK(emu.host, port=emu.port, timeout=5, force_udp=True, ommit_ping=True).connect()
+            records = conn.get_attendance()
+            conn.disconnect()
+
+        self.assertEqual(len(records), 2000)
+        self.assertEqual((records[-1].user_id, records[-1].timestamp), ('104', datetime(2026, 6, 18, 18, 4, 1)))
+
+class IClockTests(TestCase):
+    """ADMS push প্রোটোকল (/iclock/...): ডিভাইস serial দিয়ে চেনা হয়।"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        self.dept = Department.objects.create(company=self.company, name="HQ", device_serial="SN123")
+        self.emp = Employee.objects.create(company=self.company, department=self.dept, name="Rahim",
+                                           device_user_id=7)
+
+    def test_parse_attlog_skips_broken_lines(self):
+        lines = [b"7\t2025-12-02 09:00:00\t0\t1\t0\n", "\t2025-12-02 09:00:00\n", "8\tyesterday\n", "9\n",
+                 " 8 \t2025-12-02 18:30:05\t1\n"]
+        self.assertEqual(list(parse_attlog(lines)), [('7', datetime(2025, 12, 2, 9, 0)),
+                                                     ('8', datetime(2025, 12, 2, 18, 30, 5))])
+
+    def test_handshake_sends_stamp_and_server_timezone(self):
+        body = self.client.get('/iclock/cdata', {'SN': 'SN123'}).content.decode()
+        self.assertIn("GET OPTION FROM: SN123", body)
+        self.assertIn("ATTLOGStamp=None", body)
+        self.assertIn("TimeZone=6", body.splitlines())  # Asia/Dhaka
+
+        with override_settings(TIME_ZONE='Asia/Kolkata'):
+            body = self.client.get('/iclock/cdata', {'SN': 'SN123'}).content.decode()
+        self.assertIn("TimeZone=330", body.splitlines())
+
+        self.assertEqual(self.client.get('/iclock/cdata', {'SN': 'nope'}).status_code, 403)
+
+    def test_attlog_post_ingests_and_moves_cursor(self):
+        body = "7\t2025-12-02 09:00:00\t0\t1\n7\t2025-12-02 18:00:00\t1\t1\nbroken\n99\t2025-12-02 10:00:00\n"
+        response = self.client.post('/iclock/cdata?SN=SN123&table=ATTLOG&Stamp=42', body,
+                                    content_type='text/plain')
+
+        self.assertEqual(response.content.decode(), "OK: 3")
+        self.assertEqual(Attendance.objects.filter(employee=self.emp).count(), 2)
+        cursor = DeviceSyncCursor.objects.get(department=self.dept)
+        self.assertEqual(cursor.attlog_stamp, '42')
+        self.assertEqual(cursor.last_timestamp, make_aware(datetime(2025, 12, 2, 18, 0)))
+        self.assertIn("ATTLOGStamp=42", self.client.get('/iclock/cdata', {'SN': 'SN123'}).content.decode())
+
+        # অন্য টেবিল শুধু OK
+        response = self.client.post('/iclock/cdata?SN=SN123&table=OPERLOG', "x", content_type='text/plain')
+        self.assertEqual(response.content.decode(), "OK")
+
+    def test_getrequest_and_devicecmd(self):
+        self.assertEqual(self.client.get('/iclock/getrequest', {'SN': 'SN123'}).content.decode(), "OK")
+        self.assertEqual(self.client.get('/iclock/getrequest', {'SN': 'nope'}).status_code, 403)
+        self.assertEqual(self.client.post('/iclock/devicecmd?SN=SN123', "ID=1&Return=0",
+                                          content_type='text/plain').content.decode(), "OK")
+
+
+class PushQueueTests(TestCase):
+    """JSON push API (zkteco_push_view) আর তার queue (drain_push_queue)।"""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        dept = Department.objects.create(company=self.company, name="HQ")
+        self.emp = Employee.objects.create(company=self.company, department=dept, name="Rahim", device_user_id=7)
+
+    def _push(self, entries):
+        request = RequestFactory().post('/api/zkteco/push/', json.dumps(entries), content_type='application/json')
+        return zkteco_push_view(request)
+
+    def _drain(self):
+        out = StringIO()
+        call_command('drain_push_queue', purge_days=0, stdout=out)
+        return out.getvalue()
+
+    def test_store_push_punches_counts(self):
+        entries = [{'uid': 7, 'time': '2025-12-02 09:00:00'}, {'uid': '7', 'time': '2025-12-02 18:00:00'},
+                   {'uid': 7, 'time': '2025-12-02 09:00:00'}, {'uid': 99, 'time': '2025-12-02 09:00:00'}]
+        self.assertEqual(store_push_punches(entries), {'accepted': 2, 'duplicates': 1, 'unknown': 1})
+        self.assertEqual(store_push_punches(entries[:2]), {'accepted': 0, 'duplicates': 2, 'unknown': 0})
+        self.assertEqual(sorted(Attendance.objects.values_list('status', flat=True)), ['In', 'Out'])
+        self.assertEqual(DailyAttendance.objects.get(employee=self.emp).punch_count, 2)
+
+    def test_rows_lost_to_a_concurrent_insert_count_as_duplicates(self):
+        at = make_aware(datetime(2025, 12, 3, 9, 0))
+        taken = Attendance(employee=self.emp, company=self.company, timestamp=at, local_date=at.date(),
+                           status='In')
+        Attendance.objects.bulk_create([taken])
+        fresh = Attendance(employee=self.emp, company=self.company, timestamp=at + timedelta(hours=9),
+                           local_date=at.date(), status='Out')
+        retry = Attendance(employee=self.emp, company=self.company, timestamp=at, local_date=at.date(),
+                           status='In')
+
+        self.assertEqual(_insert_new([retry, fresh]), [fresh])
+        self.assertEqual(Attendance.objects.filter(employee=self.emp).count(), 2)
+
+    @override_settings(ATTENDANCE_PUSH_QUEUE=False)
+    def test_push_without_queue_reports_counts(self):
+        response = self._push([{'uid': 7, 'time': '2025-12-02 09:00:00'}, {'uid': 8, 'time': '2025-12-02 09:00:00'}])
+        self.assertEqual(json.loads(response.content),
+                         {'status': 'success', 'accepted': 1, 'duplicates': 0, 'unknown': 1})
+
+    def test_push_is_queued_then_drained(self):
+        response = self._push([{'uid': 7, 'time': '2025-12-02 09:00:00'}])
+
+        self.assertEqual(response.status_code, 202)
+        payload = PushPayload.objects.get(pk=json.loads(response.content)['id'])
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self._push({'uid': 7}).status_code, 400)
+
+        self.assertIn("1 accepted", self._drain())
+        payload.refresh_from_db()
+        self.assertIsNotNone(payload.processed_at)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_drain_falls_back_to_one_by_one_on_bad_payload(self):
+        good = PushPayload.objects.create(body=json.dumps([{'uid': 7, 'time': '2025-12-02 09:00:00'}]))
+        bad_time = PushPayload.objects.create(body=json.dumps([{'uid': 7, 'time': 'yesterday'}]))
+        not_json = PushPayload.objects.create(body="[{")
+
+        self.assertIn("1 accepted, 0 duplicates, 0 unknown users, 2 rejected", self._drain())
+        self.assertEqual(Attendance.objects.count(), 1)
+        for payload in (good, bad_time, not_json):
+            payload.refresh_from_db()
+            self.assertIsNotNone(payload.processed_at)
+        self.assertEqual(good.error, '')
+        self.assertIn("yesterday", bad_time.error)
+        self.assertTrue(not_json.error)
+
+    def test_drain_skips_payloads_claimed_by_another_worker(self):
+        body = json.dumps([{'uid': 7, 'time': '2025-12-02 09:00:00'}])
+        busy = PushPayload.objects.create(body=body, claim='other', claimed_at=timezone.now())
+        stale = PushPayload.objects.create(body=body, claim='dead', claimed_at=timezone.now() - timedelta(hours=1))
+
+        self._drain()
+
+        busy.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertIsNone(busy.processed_at)
+        self.assertIsNotNone(stale.processed_at)
+        self.assertNotEqual(stale.claim, 'dead')
+
+
+class DailyAttendanceRollupTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        self.dept = Department.objects.create(company=self.company, name="HQ",
+                                              in_time=time(10, 0), out_time=time(18, 0))
+        self.emp = Employee.objects.create(company=self.company, department=self.dept,
+                                           name="Rahim", device_user_id=7)
+        self.day = date(2025, 12, 2)
+
+    def _at(self, hour, minute=0):
+        return make_aware(datetime.combine(self.day, time(hour, minute)))
+
+    def test_ingest_builds_rollup(self):
+        ingest_punches(self.company, [('7', self._at(10, 30)), ('7', self._at(19, 0))])
+
+        row = DailyAttendance.objects.get(employee=self.emp, local_date=self.day)
+        self.assertEqual((row.first_in, row.last_out, row.punch_count), (self._at(10, 30), self._at(19, 0), 2))
+        self.assertEqual(row.late, timedelta(minutes=30))
+        self.assertEqual(row.worked, timedelta(hours=8, minutes=30))
+        self.assertEqual(row.overtime, timedelta(minutes=30))
+        self.assertEqual(row.first_punch.status, 'In')
+
+    def test_manual_edit_and_delete_refresh_rollup(self):
+        ingest_punches(self.company, [('7', self._at(10, 30)), ('7', self._at(19, 0))])
+        out = Attendance.objects.get(employee=self.emp, status='Out')
+
+        out.timestamp = self._at(17, 0)
+        out.save(update_fields=['timestamp'])
+        row = DailyAttendance.objects.get(employee=self.emp, local_date=self.day)
+        self.assertEqual((row.worked, row.overtime), (timedelta(hours=6, minutes=30), timedelta()))
+
+        Attendance.objects.filter(employee=self.emp).delete()
+        self.assertFalse(DailyAttendance.objects.filter(employee=self.emp).exists())
+
+    def test_shift_change_recalculates_late(self):
+        ingest_punches(self.company, [('7', self._at(10, 30))])
+
+        self.dept.in_time = time(11, 0)
+        self.dept.save()
+
+        row = DailyAttendance.objects.get(employee=self.emp, local_date=self.day)
+        self.assertEqual(row.late, timedelta())
+        self.assertIsNone(row.last_out)
+
+    def test_local_date_follows_timestamp_edit(self):
+        ingest_punches(self.company, [('7', self._at(10, 30))])
+        punch = Attendance.objects.get(employee=self.emp)
+        self.assertEqual(punch.local_date, self.day)
+
+        # 01:00 Asia/Dhaka = আগের দিনের 19:00 UTC, তারিখ লোকাল হিসেবেই ধরতে হবে
+        punch.timestamp = make_aware(datetime.combine(self.day + timedelta(days=1), time(1, 0)))
+        punch.save(update_fields=['timestamp'])
+
+        punch.refresh_from_db()
+        self.assertEqual(punch.local_date, self.day + timedelta(days=1))
+        self.assertEqual(list(DailyAttendance.objects.values_list('local_date', flat=True)),
+                         [self.day + timedelta(days=1)])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DayStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Acme")
+        self.dept = Department.objects.create(company=self.company, name="HQ", weekly_off_day='Friday',
+                                              in_time=time(10, 0), out_time=time(18, 0))
+        self.emp = Employee.objects.create(company=self.company, department=self.dept,
+                                           name="Rahim", device_user_id=7)
+
+    def _at(self, day, hour):
+        return make_aware(datetime.combine(day, time(hour, 0)))
+
+    def test_priority_and_totals(self):
+        # Mon 1 Dec .. Fri 5 Dec 2025
+        mon, tue, wed, thu, fri = (date(2025, 12, d) for d in range(1, 6))
+        LeaveRequest.objects.create(company=self.company, employee=self.emp, leave_type='Casual',
+                                    start_date=mon, end_date=wed, status='Approved')
+        Holiday.objects.create(company=self.company, title="Bijoy", start_date=wed, end_date=wed)
+        ingest_punches(self.company, [
+            ('7', self._at(tue, 10) + timedelta(minutes=30)), ('7', self._at(tue, 19)),
+            ('7', self._at(fri, 10)), ('7', self._at(fri, 12)),
+        ])
+
+        # rollup + leave + কোম্পানি ক্যালেন্ডার (holiday, department) প্রথমবার
+        cache.clear()  # ingest এর ট্রেন্ড আপডেট ক্যালেন্ডার লোড করে রাখে
+        with self.assertNumQueries(4):
+            dates, result = build_day_status([self.emp], mon, fri)
+        days = result[self.emp.id]
+
+        self.assertEqual(len(dates), 5)
+        self.assertEqual(list(days.status), [LEAVE, PRESENT, HOLIDAY, ABSENT, PRESENT])
+        self.assertEqual(list(days.day_type), [WORKDAY, WORKDAY, HOLIDAY, WORKDAY, WEEKLY_OFF])
+        self.assertEqual(days.working_days, 3)
+        self.assertEqual(days.expected, timedelta(hours=24))
+
+        # leave = পুরো শিফট ক্রেডিট, ছুটির দিনের কাজ পুরোটা ওভারটাইম
+        self.assertEqual(days.day(0)['worked'], timedelta(hours=8))
+        self.assertEqual(days.day(4)['overtime'], timedelta(hours=2))
+        self.assertEqual(days.total('worked'), timedelta(hours=18, minutes=30))
+        self.assertEqual(days.total('overtime'), timedelta(hours=2, minutes=30))
+        self.assertEqual(days.total('late'), timedelta(minutes=30))
+        self.assertEqual(days.total('less'), timedelta(hours=8))
+
+
+    def test_interval_index(self):
+        idx = IntervalIndex([(date(2025, 1, 10), date(2025, 1, 12)), (date(2025, 1, 13), date(2025, 1, 15)),
+                             (date(2025, 3, 1), date(2026, 2, 28)), (date(2025, 1, 11), date(2025, 1, 11))])
+        # গা-ঘেঁষা/ভেতরের ইন্টারভাল জোড়া লাগে
+        self.assertEqual(idx.ranges(), [(date(2025, 1, 10), date(2025, 1, 15)), (date(2025, 3, 1), date(2026, 2, 28))])
+        self.assertIn(date(2025, 1, 15), idx)
+        self.assertNotIn(date(2025, 1, 16), idx)
+        self.assertNotIn(date(2024, 12, 31), idx)
+        self.assertIn(date(2025, 12, 31), idx)
+        self.assertEqual(list(idx.mask(date(2025, 1, 14), 4)), [1, 1, 0, 0])
+        self.assertEqual(idx.count(date(2025, 1, 1), date(2025, 12, 31)), 6 + 306)
+
+    def test_shared_calendar_skips_leave_and_holiday_queries(self):
+        mon, fri = date(2025, 12, 1), date(2025, 12, 5)
+        LeaveRequest.objects.create(company=self.company, employee=self.emp, leave_type='Casual',
+                                    start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), status='Approved')
+        calendar = CalendarIndex.load([self.emp.id], {self.company.id}, date(2025, 11, 1), date(2025, 12, 31))
+        with self.assertNumQueries(1):
+            _, result = build_day_status([self.emp], mon, fri, calendar=calendar)
+        self.assertEqual(list(result[self.emp.id].status), [LEAVE] * 4 + [WEEKLY_OFF])
+
+    def test_company_calendar_cached_until_holiday_or_department_changes(self):
+        mon, fri = date(2025, 12, 1), date(2025, 12, 5)
+        build_day_status([self.emp], mon, fri)
+        # cache থেকে: শুধু rollup + leave
+        with self.assertNumQueries(2):
+            _, result = build_day_status([self.emp], mon, fri)
+        self.assertEqual(list(result[self.emp.id].status), [ABSENT] * 4 + [WEEKLY_OFF])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Holiday.objects.create(company=self.company, title="Bijoy", start_date=mon, end_date=mon)
+            self.dept.weekly_off_day = 'Thursday'
+            self.dept.save()
+        # commit না হওয়া পর্যন্ত ক্যাশ থাকে (অন্য রিকোয়েস্ট তখনো পুরনো ডাটাই দেখে)
+        self.assertIsNotNone(cache.get(CACHE_KEY.format(self.company.id)))
+        for callback in callbacks:
+            callback()
+        _, result = build_day_status([self.emp], mon, fri)
+        self.assertEqual(list(result[self.emp.id].status), [HOLIDAY, ABSENT, ABSENT, WEEKLY_OFF, ABSENT])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MonthlyReportQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Acme")
+        self.dept = Department.objects.create(company=self.company, name="HQ")
+        self.user = User.objects.create_user("boss")
+        UserProfile.objects.create(user=self.user, company=self.company)
+        self.next_id = 1
+
+    def _add_employees(self, count):
+        day = date(2025, 12, 2)
+        punches = []
+        for _ in range(count):
+            emp = Employee.objects.create(company=self.company, department=self.dept,
+                                          name=f"E{self.next_id}", device_user_id=self.next_id)
+            LeaveRequest.objects.create(company=self.company, employee=emp, leave_type='Casual',
+                                        start_date=day, end_date=day, status='Approved')
+            punches += [(str(emp.device_user_id), make_aware(datetime.combine(day + timedelta(days=1), t)))
+                        for t in (time(10, 0), time(19, 0))]
+            self.next_id += 1
+        ingest_punches(self.company, punches)
+
+    def _report_queries(self):
+        request = RequestFactory().get('/monthly_report/', {'start_date': '2025-12-01', 'end_date': '2025-12-31'})
+        request.user = self.user
+        with CaptureQueriesContext(connection) as ctx:
+            response = monthly_work_time_report(request)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_query_count_does_not_grow_with_employees(self):
+        self._add_employees(2)
+        self._report_queries()  # কোম্পানি ক্যালেন্ডার cache এ উঠে যায়
+        small = self._report_queries()
+        self._add_employees(20)
+        self.assertEqual(self._report_queries(), small)
+
+
+class PdfJobTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(PDF_JOBS_ROOT=self.media, CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.company = Company.objects.create(name="Acme")
+        dept = Department.objects.create(company=self.company, name="HQ")
+        Employee.objects.create(company=self.company, department=dept, name="Rahim", device_user_id=7)
+        self.user = User.objects.create_user("boss")
+        UserProfile.objects.create(user=self.user, company=self.company)
+
+    def _get(self, **params):
+        params = {'start_date': '2025-12-01', 'end_date': '2025-12-31', **params}
+        request = RequestFactory().get('/monthly-report/pdf/', params, HTTP_ACCEPT='application/json')
+        request.user = self.user
+        return monthly_work_time_pdf(request)
+
+    def test_job_is_queued_rendered_and_cached(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.content)['job_id']
+        self.assertEqual(self._get().status_code, 202)
+        self.assertEqual(PdfJob.objects.count(), 1)
+
+        call_command('render_pdf_jobs', stdout=StringIO())
+        job = PdfJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, PdfJob.DONE)
+        # /media/ এর বাইরে, URL নেই
+        self.assertTrue(job.file.path.startswith(self.media))
+        with self.assertRaises(ValueError):
+            job.file.url
+
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        # অন্য প্যারাম = আলাদা জব
+        self.assertEqual(self._get(end_date='2025-12-15').status_code, 202)
+
+        # ডাটা বদলালে পুরনো ফাইল আর সার্ভ হয় না
+        ingest_punches(self.company, [('7', make_aware(datetime(2025, 12, 2, 10, 0)))])
+        self.assertEqual(self._get().status_code, 202)
+        self.assertEqual(PdfJob.objects.filter(status=PdfJob.QUEUED).count(), 2)
+
+
+    def test_jobs_that_print_the_user_are_not_shared(self):
+        colleague = User.objects.create_user("colleague")
+        UserProfile.objects.create(user=colleague, company=self.company)
+
+        def job(user, kind):
+            request = RequestFactory().get('/', {'start_date': '2025-12-01'})
+            request.user = user
+            return job_for_request(request, kind)
+
+        # "Generated by: <user>" ছাপা হয়, তাই ইউজার প্রতি আলাদা জব
+        mine, theirs = job(self.user, 'attendance_list'), job(colleague, 'attendance_list')
+        self.assertNotEqual(mine.pk, theirs.pk)
+        self.assertFalse(can_view_job(colleague, mine))
+        self.assertTrue(can_view_job(colleague, theirs))
+        self.assertEqual(job(self.user, 'monthly_work_time').pk, job(colleague, 'monthly_work_time').pk)
+
+    def test_job_download_checks_company_and_kind_permission(self):
+        job = PdfJob.objects.create(kind='salary_summary', company=self.company, requested_by=self.user,
+                                    cache_key='k' * 64, status=PdfJob.DONE, filename='s.pdf')
+        job.file.save('s.pdf', ContentFile(b'%PDF-1.4'))
+        url = reverse('attendance_app:pdf_job_status', args=[job.pk]) + '?download=1'
+
+        # একই কোম্পানির 'attendance' গ্রুপ payroll দেখতে পারে না, জব id জানলেও না
+        clerk = User.objects.create_user("clerk")
+        UserProfile.objects.create(user=clerk, company=self.company)
+        clerk.groups.add(Group.objects.create(name='attendance'))
+        outsider = User.objects.create_user("outsider")
+        UserProfile.objects.create(user=outsider, company=Company.objects.create(name="Other"))
+        plan = SubscriptionPlan.objects.create(name="Basic", price=Decimal('100'))
+        for user in (self.user, clerk, outsider):
+            UserSubscription.objects.create(user=user, plan=plan, end_date=date.today() + timedelta(days=30))
+
+        for user in (clerk, outsider):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+
+
+class AttendanceExportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        dept = Department.objects.create(company=self.company, name="HQ", weekly_off_day='Friday')
+        for n in (1, 2, 3):
+            Employee.objects.create(company=self.company, department=dept, name=f"E{n}", device_user_id=n)
+        self.user = User.objects.create_user("boss")
+        UserProfile.objects.create(user=self.user, company=self.company)
+        ingest_punches(self.company, [('2', make_aware(datetime(2025, 12, 1, 10, 0))),
+                                      ('2', make_aware(datetime(2025, 12, 1, 19, 30)))])
+
+    def test_csv_streams_every_employee_day(self):
+        request = RequestFactory().get('/attendance/export/', {
+            'start_date': '2025-11-20', 'end_date': '2026-01-09', 'format': 'csv'})
+        request.user = self.user
+        # ছোট ব্যাচ/উইন্ডো যাতে কয়েকটা ব্যাচ আর উইন্ডো পার হয়
+        with mock.patch('attendance_app.utils.exports.EMPLOYEE_BATCH', 2):
+            response = attendance_list_export(request)
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content).decode('utf-8-sig')
+
+        rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(rows[0][:4], ['Employee ID', 'Employee', 'Department', 'Date'])
+        self.assertEqual(len(rows) - 1, 3 * 51)
+        self.assertEqual(len({(r[0], r[3]) for r in rows[1:]}), 3 * 51)
+        self.assertIn(['2', 'E2', 'HQ', '2025-12-01', '10:00', '19:30', '09:30', 'Present'], rows)
+        self.assertIn(['1', 'E1', 'HQ', '2025-12-05', '-', '-', '-', 'Weekly Off'], rows)
+
+    def test_non_numeric_filters_are_rejected(self):
+        for params in ({'employee': 'abc'}, {'department': '1x'}):
+            request = RequestFactory().get('/attendance/export/', params)
+            request.user = self.user
+            self.assertEqual(attendance_list_export(request).status_code, 400)
+
+    @skipIf(Workbook is None, "openpyxl not installed")
+    def test_xlsx_export_streams_a_workbook(self):
+        request = RequestFactory().get('/attendance/export/', {'format': 'xlsx', 'start_date': '2025-12-01',
+                                                               'end_date': '2025-12-01'})
+        request.user = self.user
+        response = attendance_list_export(request)
+        self.assertEqual(response['Content-Type'], XLSX_CONTENT_TYPE)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_xlsx_without_openpyxl_is_rejected(self):
+        request = RequestFactory().get('/attendance/export/', {'format': 'xlsx'})
+        request.user = self.user
+        with mock.patch('attendance_app.utils.exports.Workbook', None):
+            self.assertEqual(attendance_list_export(request).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SubscriptionResolverTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Acme")
+        self.user = User.objects.create_user("boss", password="pw")
+        UserProfile.objects.create(user=self.user, company=self.company)
+        self.plan = SubscriptionPlan.objects.create(name="Basic", price=Decimal('100'))
+        self.client.force_login(self.user)
+
+    def _subscription_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('attendance_app:dashboard'))
+        return response, sum('subscription_app_usersubscription' in q['sql'] for q in ctx.captured_queries)
+
+    def test_resolved_once_per_request_and_cached_until_payment(self):
+        # middleware + decorator মিলে একবারই; expired -> My Plans
+        response, queries = self._subscription_queries()
+        self.assertRedirects(response, reverse('subscription_app:my_plans'), fetch_redirect_response=False)
+        self.assertEqual(queries, 1)
+        self.assertEqual(self._subscription_queries()[1], 0)
+
+        # পেমেন্ট -> নতুন UserSubscription -> ক্যাশ বাতিল
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSubscription.objects.create(user=self.user, plan=self.plan,
+                                            end_date=date.today() + timedelta(days=30))
+        response, queries = self._subscription_queries()
+        self.assertEqual(queries, 1)   # middleware + decorator + dashboard
+        self.assertTemplateUsed(response, 'dashboard.html')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DashboardTrendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name="Acme")
+        self.today = date.today()
+        self.start = self.today - timedelta(days=29)
+        self.past = self.today - timedelta(days=3)
+        # weekly off আজ বা past এ না পড়ে (late শুধু কর্মদিবসে গোনা হয়)
+        self.off_day = self.today + timedelta(days=1) - timedelta(days=7)
+        shift = {'in_time': time(10, 0), 'out_time': time(18, 0), 'weekly_off_day': self.off_day.strftime('%A')}
+        self.hq = Department.objects.create(company=self.company, name="HQ", **shift)
+        self.ops = Department.objects.create(company=self.company, name="Ops", **shift)
+        self.a = Employee.objects.create(company=self.company, department=self.hq, name="A", device_user_id=1)
+        self.b = Employee.objects.create(company=self.company, department=self.ops, name="B", device_user_id=2)
+
+    def _at(self, day, hour, minute=0):
+        return make_aware(datetime.combine(day, time(hour, minute)))
+
+    def test_ingest_invalidates_only_the_changed_buckets(self):
+        ingest_punches(self.company, [('1', self._at(self.past, 10, 30)), ('2', self._at(self.past, 9, 50))])
+        with self.captureOnCommitCallbacks(execute=True):
+            buckets = trend_buckets(self.company.id, None, self.start, self.today)
+        self.assertEqual(buckets[self.past], (2, 1))
+
+        # সব দিন cache এ: কোনো কোয়েরি নেই
+        with self.assertNumQueries(0):
+            self.assertEqual(trend_buckets(self.company.id, None, self.start, self.today)[self.past], (2, 1))
+        trend_buckets(self.company.id, str(self.hq.id), self.start, self.today)
+
+        # আজকের পাঞ্চ: শুধু আজকের বাকেট মুছে যায়, প্রতি কলে শুধু সেই একদিন আবার গোনা
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_punches(self.company, [('1', self._at(self.today, 11)), ('2', self._at(self.today, 9))])
+        with self.assertNumQueries(2):
+            buckets = trend_buckets(self.company.id, None, self.start, self.today)
+            hq = trend_buckets(self.company.id, self.hq.id, self.start, self.today)
+        self.assertEqual(buckets[self.today], (2, 1))
+        self.assertEqual(hq[self.today], (1, 1))
+        self.assertEqual(hq[self.past], (1, 1))
+
+        # পুরনো দিনের পাঞ্চ মুছলে সেই দিনের কাউন্ট কমে
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.filter(employee=self.a, local_date=self.past).delete()
+        self.assertEqual(trend_buckets(self.company.id, None, self.start, self.today)[self.past], (1, 0))
+
+        # ডিপার্টমেন্ট বদলালে বাকেট নতুন করে গোনা হয়
+        self.b.department = self.hq
+        self.b.save()
+        self.assertEqual(trend_buckets(self.company.id, self.hq.id, self.start, self.today)[self.today], (2, 1))
+
+    def test_punch_committed_during_bucket_load_is_not_cached_stale(self):
+        real = dashboard_stats._count_days
+
+        def count_then_punch(*args):
+            counts = real(*args)
+            # aggregate কোয়েরির পরে, cache.add এর আগে অন্য রিকোয়েস্টের পাঞ্চ commit
+            with self.captureOnCommitCallbacks(execute=True):
+                ingest_punches(self.company, [('1', self._at(self.past, 10, 30))])
+            return counts
+
+        with mock.patch.object(dashboard_stats, '_count_days', side_effect=count_then_punch):
+            self.assertEqual(trend_buckets(self.company.id, None, self.start, self.today)[self.past], (0, 0))
+        self.assertEqual(trend_buckets(self.company.id, None, self.start, self.today)[self.past], (1, 1))
+
+    def test_late_counts_only_on_workdays(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_punches(self.company, [('1', self._at(self.off_day, 11)), ('2', self._at(self.past, 11))])
+        buckets = trend_buckets(self.company.id, None, self.start, self.today)
+        self.assertEqual((buckets[self.off_day], buckets[self.past]), ((1, 0), (1, 1)))
+
+        # ক্যাশ করা বাকেটে incremental আপডেটও একই নিয়মে
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_punches(self.company, [('2', self._at(self.off_day, 12))])
+        self.assertEqual(trend_buckets(self.company.id, None, self.start, self.today)[self.off_day], (2, 0))
+
+
+@override_settings(DASHBOARD_STREAM_SECONDS=0, DASHBOARD_STREAM_POLL=0)
+class DashboardStreamTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        dept = Department.objects.create(company=self.company, name="HQ", in_time=time(0, 0), out_time=time(23, 0))
+        self.emp = Employee.objects.create(company=self.company, department=dept, name="Rahim", device_user_id=7)
+        Employee.objects.create(company=self.company, department=dept, name="Karim", device_user_id=8)
+        self.user = User.objects.create_user("boss")
+        UserProfile.objects.create(user=self.user, company=self.company)
+
+    def _events(self, last_event_id=None, **params):
+        headers = {'HTTP_LAST_EVENT_ID': last_event_id} if last_event_id else {}
+        request = RequestFactory().get('/dashboard/stream/', params, **headers)
+        request.user = self.user
+        response = dashboard_stream(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.content.decode()
+
+    def test_streams_only_changed_employee_rows(self):
+        since = (timezone.now() - timedelta(minutes=1)).isoformat()
+        body = self._events(since)
+        self.assertNotIn('event: rows', body)
+        # পরের poll এর cursor সবসময় পাঠানো হয়
+        cursor = parse_datetime(body.split('id: ', 1)[1].split('\n', 1)[0])
+        self.assertGreater(cursor, parse_datetime(since))
+
+        ingest_punches(self.company, [('7', timezone.now())])
+        body = self._events(since, department=self.emp.department_id)
+        event = next(block for block in body.split('\n\n') if 'event: rows' in block)
+        payload = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual([item['employee_id'] for item in payload], [self.emp.id])
+        self.assertIn(f'id="emp-row-{self.emp.id}"', payload[0]['html'])
+        self.assertIn('Active', payload[0]['html'])
+
+    @override_settings(DASHBOARD_STREAM_SECONDS=60, DASHBOARD_STREAM_POLL=5)
+    def test_long_poll_returns_as_soon_as_a_row_changes(self):
+        def punch(seconds):
+            ingest_punches(self.company, [('7', timezone.now())])
+
+        with mock.patch('attendance_app.views.sleep', side_effect=punch) as sleep:
+            body = self._events()
+        sleep.assert_called_once_with(5)
+        self.assertIn('event: rows', body)
+
+    def test_rejects_non_numeric_department(self):
+        request = RequestFactory().get('/dashboard/stream/', {'department': 'abc'})
+        request.user = self.user
+        self.assertEqual(dashboard_stream(request).status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BenchmarkCommandTests(TestCase):
+    def test_seed_then_bench_reports_every_scenario(self):
+        call_command('seed_benchmark', employees=[3], months=2, departments=2, stdout=StringIO())
+        company = Company.objects.get(name__startswith="Bench")
+        self.assertEqual(Employee.objects.filter(company=company).count(), 3)
+        self.assertTrue(DailyAttendance.objects.filter(company=company).exists())
+
+        out = StringIO()
+        call_command('bench', repeat=1, stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        self.assertEqual({r['scenario'] for r in report['results']},
+                         {'import', 'push', 'dashboard', 'monthly_report', 'attendance_table', 'salary_summary'})
+        for result in report['results']:
+            self.assertEqual(set(result), {'company_id', 'employees', 'punches', 'scenario',
+                                           'wall_ms', 'queries', 'peak_kb'})
+        # import/push rollback হয়, ডাটা বদলায় না
+        self.assertEqual(Attendance.objects.filter(company=company).count(), report['results'][0]['punches'])
+
+
+class AttendancePartitionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme")
+        self.emp = Employee.objects.create(company=self.company, name="Rahim", device_user_id=7)
+
+    def test_local_date_filter_matches_local_day_boundaries(self):
+        day = date(2026, 1, 31)
+        for stamp in (datetime(2026, 1, 30, 23, 59), datetime(2026, 1, 31, 0, 0),
+                      datetime(2026, 1, 31, 23, 59, 59), datetime(2026, 2, 1, 0, 0)):
+            Attendance.objects.create(company=self.company, employee=self.emp, timestamp=make_aware(stamp),
+                                      status='In')
+
+        by_filter = Attendance.objects.filter(**local_date_filter(day, day))
+        self.assertEqual(set(by_filter), set(Attendance.objects.filter(local_date=day)))
+        self.assertEqual(by_filter.count(), 2)
+
+    def test_month_helpers(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partition_name(date(2026, 3, 1)), 'attendance_app_attendance_p202603')
+
+    @skipIf(connection.vendor == 'postgresql', "PostgreSQL এ আসল পার্টিশন হয়")
+    def test_command_is_noop_without_postgresql(self):
+        out = StringIO()
+        call_command('attendance_partitions', retain=1, stdout=out)
+        self.assertIn("needs PostgreSQL", out.getvalue())
+
+    @skipUnless(connection.vendor == 'postgresql', "PostgreSQL only")
+    def test_create_moves_default_rows_and_detach_archives(self):
+        old = add_months(date.today().replace(day=1), -24)
+        punch = Attendance.objects.create(company=self.company, employee=self.emp, status='In',
+                                          timestamp=make_aware(datetime.combine(old, time(9, 0))))
+        # পুরনো মাসের পার্টিশন নেই, রো DEFAULT এ; পার্টিশন বানালে সেখানে সরে যায়
+        with transaction.atomic():
+            self.assertEqual(create_partition(connection, old), 1)
+        self.assertIn(old, {month for _, month, _ in list_partitions(connection)})
+        # রিপোর্টের তারিখ filter শুধু ওই মাসের পার্টিশনে যায়
+        plan = Attendance.objects.filter(**local_date_filter(old, old)).explain()
+        self.assertIn(partition_name(old), plan)
+        self.assertNotIn('_default', plan)
+
+        rollup = DailyAttendance.objects.get(employee=self.emp, local_date=old)
+        self.assertEqual(rollup.first_punch_id, punch.pk)
+
+        call_command('attendance_partitions', ahead=1, retain=1, stdout=StringIO())
+        self.assertFalse(Attendance.objects.filter(pk=punch.pk).exists())
+        # rollup থাকে (রিপোর্ট চলে), কিন্তু আর্কাইভ হওয়া পাঞ্চে আর পয়েন্ট করে না
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.first_punch_id, rollup.punch_count), (None, 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{partition_name(old)}"')
+            self.assertEqual(cursor.fetchall(), [(punch.pk,)])
+        self.emp.delete()  # আর্কাইভ টেবিলে FK নেই
+
+
+@override_settings(
+    MIDDLEWARE=['attendance_project.middleware.RequestMetricsMiddleware'] + settings.MIDDLEWARE,
+    REQUEST_METRICS_BUDGETS={'attendance_app:employee_list': {'queries': 1}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        company = Company.objects.create(name="Acme")
+        self.user = User.objects.create_user("boss", is_staff=True)
+        UserProfile.objects.create(user=self.user, company=company)
+        plan = SubscriptionPlan.objects.create(name="Basic", price=Decimal('100'))
+        UserSubscription.objects.create(user=self.user, plan=plan, end_date=date.today() + timedelta(days=30))
+        self.client.force_login(self.user)
+
+    def test_records_per_view_and_warns_over_budget(self):
+        with self.assertLogs('attendance_project.metrics', 'WARNING') as logs:
+            self.client.get(reverse('attendance_app:employee_list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'attendance_app:employee_list')
+        self.assertEqual(record['over_budget'], ['queries'])
+
+        views = self.client.get(reverse('request_metrics')).json()['views']
+        self.assertEqual(views['attendance_app:employee_list']['requests'], 1)
+        self.assertEqual(views['attendance_app:employee_list']['queries_max'], record['queries'])
+
+    @override_settings(REQUEST_METRICS_TRACEMALLOC=True)
+    def test_tracemalloc_is_shared_between_overlapping_requests(self):
+        if tracemalloc.is_tracing():
+            self.skipTest("tracemalloc already running for the whole process")
+        # একটা রিকোয়েস্ট চলার মাঝে আরেকটা শুরু-শেষ হলে প্রথমটার মাপ বন্ধ হয়ে যায় না
+        shared_tracemalloc.enter()
+        try:
+            self.client.get(reverse('attendance_app:employee_list'))
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            self.assertIsNotNone(shared_tracemalloc.exit())
+        self.assertFalse(tracemalloc.is_tracing())
+        record = request_metrics.snapshot()['attendance_app:employee_list']
+        self.assertGreater(record['peak_kb_max'], 0)
+
+    @override_settings(REQUEST_METRICS_STRICT=True)
+    def test_strict_mode_fails_on_budget(self):
+        with self.assertRaises(BudgetExceeded), self.assertLogs('attendance_project.metrics', 'WARNING'):
+            self.client.get(reverse('attendance_app:employee_list'))
@@ -6,6 +6,7 @@ app_name = "attendance_app"
 
 urlpatterns = [
     path('', dashboard, name='dashboard'),
+    path('dashboard/stream/', dashboard_stream, name='dashboard_stream'),
 
     path('monthly_report/', monthly_work_time_report, name='monthly_work_time_report'),
     path('employees/<int:employee_id>/attendance/', employee_attendance_detail, name='employee_attendance_detail'),
@@ -14,6 +15,7 @@ urlpatterns = [
     path('sync-attendance/', sync_attendance_view, name='sync_attendance'),
     path('attendance/<int:employee_id>/pdf/', employee_attendance_pdf, name='attendance_pdf'),
     path('api/zkteco/push/', zkteco_push_view, name='zkteco_push'),
+    path('pdf-jobs/<int:job_id>/', pdf_job_status, name='pdf_job_status'),
     
 
 # ---------emplyee add-----------
@@ -38,6 +40,7 @@ urlpatterns = [
     path("attendance/<int:pk>/edit/", attendance_edit, name="attendance_edit"),
     path('attendance/delete/<int:pk>/', attendance_delete, name='attendance_delete'),
     path('attendance/pdf/', attendance_list_pdf, name='attendance_list_pdf'),
+    path('attendance/export/', attendance_list_export, name='attendance_list_export'),
 
     # ------------------Leave Request--------------
 
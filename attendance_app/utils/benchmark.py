@@ -0,0 +1,247 @@
+"""
+বেঞ্চমার্ক: সিনথেটিক ডাটা (seed_benchmark) আর হট পাথগুলোর মাপ (bench)।
+
+seed_company একটা কোম্পানি বানায়, সাথে ডিপার্টমেন্ট, employee, বেতন, holiday, leave আর
+কয়েক মাসের পাঞ্চ; সব bulk_create এ, rollup (DailyAttendance) refresh_daily_attendance দিয়ে।
+বেঞ্চ কোম্পানির নাম BENCH_PREFIX দিয়ে শুরু, যাতে bench নিজে খুঁজে পায় আর --reset মুছতে পারে।
+
+measure() একটা কাজ কয়েকবার চালিয়ে wall time, কোয়েরি সংখ্যা আর peak মেমোরি (tracemalloc) দেয়।
+লেখার কাজগুলো (import/push) rollback হওয়া transaction এ চলে, তাই প্রতিবার একই ডাটার উপর।
+"""
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, time as dtime
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.timezone import make_aware
+
+from attendance_app.models import (Attendance, Company, Department, Employee, Holiday, LeaveRequest,
+                                   UserProfile, local_date_for)
+from attendance_app.utils.company_calendar import invalidate_company_calendar
+from attendance_app.utils.rollup import refresh_daily_attendance
+from payroll.models import EmployeeSalary
+from subscription_app.models import SubscriptionPlan, UserSubscription
+
+BENCH_PREFIX = 'Bench'
+BENCH_PLAN_SLUG = 'bench-unlimited'
+# কোম্পানি প্রতি আলাদা device_user_id রেঞ্জ: push API তে uid একাধিক কোম্পানিতে থাকলে বাদ পড়ে
+DEVICE_ID_BLOCK = 100000
+BATCH_SIZE = 1000
+# ডিপার্টমেন্ট প্রতি (in_time, out_time, weekly off)
+SHIFTS = [
+    (dtime(9, 0), dtime(17, 0), 'Friday'),
+    (dtime(10, 0), dtime(19, 0), 'Friday'),
+    (dtime(10, 30), dtime(20, 30), 'Saturday'),
+    (dtime(8, 0), dtime(16, 0), 'Sunday'),
+]
+ABSENT_RATE = 0.05
+SINGLE_PUNCH_RATE = 0.08
+LEAVE_RATE = 0.01
+
+
+def bench_companies():
+    return Company.objects.filter(name__startswith=BENCH_PREFIX).order_by('id')
+
+
+def delete_bench_data():
+    """বেঞ্চ কোম্পানি আর তাদের owner ইউজার (বাকি সব CASCADE এ যায়)।"""
+    owners = list(bench_companies().values_list('owner_id', flat=True))
+    count, _ = bench_companies().delete()
+    User.objects.filter(id__in=[o for o in owners if o]).delete()
+    return count
+
+
+def _bench_plan():
+    plan, _ = SubscriptionPlan.objects.get_or_create(
+        slug=BENCH_PLAN_SLUG,
+        defaults={'name': 'Bench Unlimited', 'price': 0, 'duration_days': 3650, 'employee_limit': 10 ** 6},
+    )
+    return plan
+
+
+def _punch(day, clock, jitter_minutes, rng):
+    ts = make_aware(datetime.combine(day, clock)) + timedelta(minutes=rng.randint(*jitter_minutes))
+    return ts.replace(second=rng.randint(0, 59))
+
+
+def seed_company(employee_count, department_count, start_date, end_date, rng):
+    """একটা বেঞ্চ কোম্পানি; Returns: (company, মোট পাঞ্চ সংখ্যা)।"""
+    company = Company.objects.create(name=f"{BENCH_PREFIX} {employee_count} employees")
+    owner = User.objects.create_user(f"bench{company.pk}")
+    company.owner = owner
+    company.save(update_fields=['owner'])
+    UserProfile.objects.create(user=owner, company=company)
+    UserSubscription.objects.create(user=owner, plan=_bench_plan(),
+                                    end_date=timezone.localdate() + timedelta(days=3650))
+
+    departments = Department.objects.bulk_create([
+        Department(company=company, name=f"Dept {i + 1}", in_time=SHIFTS[i % len(SHIFTS)][0],
+                   out_time=SHIFTS[i % len(SHIFTS)][1], weekly_off_day=SHIFTS[i % len(SHIFTS)][2])
+        for i in range(department_count)
+    ])
+    base_id = company.pk * DEVICE_ID_BLOCK
+    Employee.objects.bulk_create([
+        Employee(company=company, department=departments[i % department_count],
+                 name=f"Employee {i + 1}", device_user_id=base_id + i + 1)
+        for i in range(employee_count)
+    ], batch_size=BATCH_SIZE)
+    employees = list(Employee.objects.filter(company=company).select_related('department').order_by('id'))
+    EmployeeSalary.objects.bulk_create([
+        EmployeeSalary(employee=emp, company=company, base_salary=rng.randrange(15000, 80000, 500),
+                       bank_transfer_amount=rng.choice([0, 10000, 20000]))
+        for emp in employees
+    ], batch_size=BATCH_SIZE)
+
+    # মাসে একটা করে holiday (কোনো মাসে দুই দিনের)
+    holidays, day = [], start_date.replace(day=1)
+    while day <= end_date:
+        start = day.replace(day=rng.randint(1, 27))
+        holidays.append(Holiday(company=company, title=f"Holiday {start:%b %Y}", start_date=start,
+                                end_date=start + timedelta(days=rng.randint(0, 1))))
+        day = (day + timedelta(days=32)).replace(day=1)
+    Holiday.objects.bulk_create(holidays)
+    off_days = {h.start_date + timedelta(days=i) for h in holidays
+                for i in range((h.end_date - h.start_date).days + 1)}
+
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    leaves, punches = [], []
+    for emp in employees:
+        dept = emp.department
+        on_leave = set()
+        for day in days:
+            if day in on_leave or day in off_days or day.strftime('%A') == dept.weekly_off_day:
+                continue
+            if rng.random() < LEAVE_RATE:
+                end = min(day + timedelta(days=rng.randint(0, 2)), end_date)
+                leaves.append(LeaveRequest(company=company, employee=emp, leave_type='Casual',
+                                           start_date=day, end_date=end, status='Approved'))
+                on_leave.update(day + timedelta(days=i) for i in range((end - day).days + 1))
+                continue
+            if rng.random() < ABSENT_RATE:
+                continue
+            first_in = _punch(day, dept.in_time, (-20, 45), rng)
+            punches.append(Attendance(company=company, employee=emp, timestamp=first_in,
+                                      local_date=local_date_for(first_in), status='In'))
+            if rng.random() >= SINGLE_PUNCH_RATE:
+                last_out = _punch(day, dept.out_time, (-30, 90), rng)
+                punches.append(Attendance(company=company, employee=emp, timestamp=last_out,
+                                          local_date=local_date_for(last_out), status='Out'))
+    LeaveRequest.objects.bulk_create(leaves, batch_size=BATCH_SIZE)
+    Attendance.objects.bulk_create(punches, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    keys = sorted({(p.employee_id, p.local_date) for p in punches})
+    for i in range(0, len(keys), BATCH_SIZE * 5):
+        refresh_daily_attendance(keys[i:i + BATCH_SIZE * 5])
+    # bulk_create এ সিগনাল চলে না
+    invalidate_company_calendar(company.pk)
+    return company, len(punches)
+
+
+# ---------------------------------------------------------
+# Fake ZK device (import_attendance বেঞ্চের জন্য)
+# ---------------------------------------------------------
+class _DeviceUser:
+    __slots__ = ('user_id', 'name')
+
+    def __init__(self, user_id, name):
+        self.user_id = str(user_id)
+        self.name = name
+
+
+class _DevicePunch:
+    __slots__ = ('uid', 'user_id', 'timestamp')
+
+    def __init__(self, uid, user_id, timestamp):
+        self.uid = uid
+        self.user_id = str(user_id)
+        self.timestamp = timestamp
+
+
+class FakeDevice:
+    """
+    pyzk ZK এর মতো ইন্টারফেস, মেমোরিতে। FakeDevice.logs[ip] = (users, punches);
+    নেটওয়ার্ক ছাড়া শুধু sync_device এর DB/লজিকের খরচ মাপে।
+    """
+    logs = {}
+
+    def __init__(self, ip, port=4370, **kwargs):
+        self.ip = ip
+
+    def connect(self):
+        return self
+
+    def disable_device(self):
+        pass
+
+    def enable_device(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def get_users(self):
+        return self.logs[self.ip][0]
+
+    def get_attendance(self):
+        return list(self.logs[self.ip][1])
+
+    @classmethod
+    def load(cls, departments, day, rng):
+        """প্রতিটা ডিপার্টমেন্টের employee দের day তারিখের In/Out লগ (naive, ডিভাইসের মতো)।"""
+        cls.logs = {}
+        devices = []
+        for n, dept in enumerate(departments):
+            ip = f"10.255.{n // 250}.{n % 250 + 1}"
+            users, punches = [], []
+            for emp in dept.employees.all():
+                users.append(_DeviceUser(emp.device_user_id, emp.name))
+                for clock in (dept.in_time, dept.out_time):
+                    stamp = datetime.combine(day, clock) + timedelta(minutes=rng.randint(-15, 30))
+                    punches.append(_DevicePunch(len(punches) + 1, emp.device_user_id, stamp))
+            cls.logs[ip] = (users, punches)
+            devices.append({'ip': ip, 'port': 4370, 'department': dept})
+        return devices
+
+
+# ---------------------------------------------------------
+# মাপা
+# ---------------------------------------------------------
+def _run(func, rollback):
+    if not rollback:
+        return func()
+    with transaction.atomic():
+        func()
+        transaction.set_rollback(True)
+
+
+def measure(func, repeat=3, rollback=False):
+    """
+    func() repeat বার চালিয়ে {'wall_ms': {min, median, max}, 'queries': {first, warm}, 'peak_kb'}।
+    প্রথম রানে cache ঠান্ডা থাকতে পারে, তাই কোয়েরি প্রথম আর শেষ রানের আলাদা। tracemalloc সময়কে
+    ধীর করে, তাই peak মেমোরি আলাদা একটা রানে। rollback=True: প্রতিটা রান transaction এ, শেষে rollback।
+    """
+    timings, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            _run(func, rollback)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx))
+
+    tracemalloc.start()
+    try:
+        _run(func, rollback)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_ms': {'min': round(min(timings), 2), 'median': round(statistics.median(timings), 2),
+                    'max': round(max(timings), 2)},
+        'queries': {'first': queries[0], 'warm': queries[-1]},
+        'peak_kb': peak // 1024,
+    }
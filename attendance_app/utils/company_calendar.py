@@ -0,0 +1,127 @@
+"""
+কোম্পানির ক্যালেন্ডার: holiday আর ডিপার্টমেন্টের weekly off/শিফট, Django cache এ।
+
+Holiday আর Department বছরে কয়েকবার বদলায়, অথচ প্রতিটা রিপোর্ট প্রতি রিকোয়েস্টে পড়ত। এখানে
+কোম্পানি প্রতি একবার (দুইটা কোয়েরি) বানিয়ে cache এ রাখা হয়; Holiday/Department এর
+save/delete সিগনালে commit এর পরে key মুছে যায় (signals.py)। রিপোর্ট ভিউ তখন এই দুই টেবিলে আর
+কোয়েরি করে না। সিগনাল ছাড়া বদল (queryset.update, raw SQL) ধরতে entry CACHE_TTL পরে নিজেই expire হয়।
+
+- holidays: বছর প্রতি bytes(366) বিটম্যাপ (দিন-অফ-ইয়ার ধরে), রেঞ্জের মাস্ক slice জোড়া দিয়ে
+- departments: id -> DepartmentShift (weekly off এর ৭ দিনের প্যাটার্ন, শিফট টাইম/দৈর্ঘ্য)
+"""
+import calendar as _calendar
+from datetime import date, timedelta
+
+from django.core.cache import cache
+
+from attendance_app.models import Department, Holiday
+from attendance_app.utils.rollup import shift_length, shift_times
+
+CACHE_KEY = 'company-calendar:{}'
+CACHE_TTL = 6 * 3600
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _doy(day):
+    return day.timetuple().tm_yday - 1
+
+
+class YearBitmaps:
+    """তারিখ-রেঞ্জ, বছর প্রতি একটা bytes(366) বিটম্যাপে।"""
+    __slots__ = ('years',)
+
+    def __init__(self, ranges=()):
+        years = {}
+        for start, end in ranges:
+            day = start
+            while day <= end:  # বছর ধরে ধরে (দিন ধরে নয়)
+                year_end = min(end, date(day.year, 12, 31))
+                bitmap = years.setdefault(day.year, bytearray(366))
+                lo, hi = _doy(day), _doy(year_end)
+                bitmap[lo:hi + 1] = b'\x01' * (hi - lo + 1)
+                day = year_end + timedelta(days=1)
+        self.years = {year: bytes(bitmap) for year, bitmap in years.items()}
+
+    def __contains__(self, day):
+        bitmap = self.years.get(day.year)
+        return bool(bitmap and bitmap[_doy(day)])
+
+    def mask(self, start_date, days):
+        """start_date থেকে days দিনের bytearray মাস্ক।"""
+        result = bytearray()
+        day, remaining = start_date, days
+        while remaining > 0:
+            lo = _doy(day)
+            take = min(remaining, (366 if _calendar.isleap(day.year) else 365) - lo)
+            bitmap = self.years.get(day.year)
+            result += bitmap[lo:lo + take] if bitmap else bytes(take)
+            remaining -= take
+            day = date(day.year + 1, 1, 1)
+        return result
+
+
+class DepartmentShift:
+    """ডিপার্টমেন্টের weekly off আর শিফট (department না থাকলে ডিফল্ট শিফট, কোনো off নেই)।"""
+    __slots__ = ('weekly_off_day', 'in_time', 'out_time', 'shift', '_pattern')
+
+    def __init__(self, department=None):
+        self.weekly_off_day = department.weekly_off_day if department else None
+        self.in_time, self.out_time = shift_times(department)
+        self.shift = shift_length(department)
+        # weekday() ইনডেক্স ধরে ৭ দিনের প্যাটার্ন
+        self._pattern = bytes(int(name == self.weekly_off_day) for name in WEEKDAYS)
+
+    def weekly_off_mask(self, start_date, days):
+        offset = start_date.weekday()
+        pattern = self._pattern[offset:] + self._pattern[:offset]
+        return bytearray((pattern * (days // 7 + 1))[:days])
+
+
+DEFAULT_SHIFT = DepartmentShift()
+
+
+class CompanyCalendar:
+    __slots__ = ('company_id', 'holidays', 'departments')
+
+    def __init__(self, company_id, holidays, departments):
+        self.company_id = company_id
+        self.holidays = holidays
+        self.departments = departments
+
+    @classmethod
+    def build(cls, company_id):
+        holidays = YearBitmaps(Holiday.objects.filter(company_id=company_id)
+                               .values_list('start_date', 'end_date'))
+        departments = {d.id: DepartmentShift(d) for d in Department.objects.filter(company_id=company_id)}
+        return cls(company_id, holidays, departments)
+
+    def department(self, department_id):
+        return self.departments.get(department_id, DEFAULT_SHIFT)
+
+    def is_workday(self, department_id, day):
+        return day not in self.holidays and not self.department(department_id).weekly_off_mask(day, 1)[0]
+
+
+def get_company_calendar(company_id):
+    key = CACHE_KEY.format(company_id)
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = CompanyCalendar.build(company_id)
+        cache.set(key, calendar, CACHE_TTL)
+    return calendar
+
+
+def get_company_calendars(company_ids):
+    """একসাথে কয়েকটা কোম্পানি (একটা get_many, মিসিংগুলো build)।"""
+    keys = {CACHE_KEY.format(cid): cid for cid in company_ids}
+    found = cache.get_many(list(keys))
+    result = {keys[key]: value for key, value in found.items()}
+    missing = {cid: CompanyCalendar.build(cid) for cid in company_ids if cid not in result}
+    if missing:
+        cache.set_many({CACHE_KEY.format(cid): value for cid, value in missing.items()}, CACHE_TTL)
+        result.update(missing)
+    return result
+
+
+def invalidate_company_calendar(company_id):
+    cache.delete(CACHE_KEY.format(company_id))
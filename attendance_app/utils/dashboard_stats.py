@@ -0,0 +1,155 @@
+"""
+ড্যাশবোর্ডের ৩০ দিনের ট্রেন্ড: (company, department, date) প্রতি present/late কাউন্ট cache এ।
+
+পুরনো দিনগুলো একবার হিসাব হলে cache থেকেই আসে (একটা get_many)। rollup রিফ্রেশ হলে
+(refresh_daily_attendance/recalculate_daily_attendance) যে দিনগুলো বদলালো শুধু সেগুলোর বাকেট
+মুছে যায়, পুরো রেঞ্জ আবার গোনা লাগে না। cache এ না থাকলে (প্রথম লোড/expire/মুছে যাওয়া) এক
+aggregate কোয়েরিতে শুধু মিসিং দিনগুলো। employee এর ডিপার্টমেন্ট বদলালে বা মুছলে (বা holiday/weekly off
+বদলালে) কোম্পানির epoch বদলে সব বাকেট বাতিল।
+
+- late শুধু কর্মদিবসে (holiday/weekly off এ দেরি গোনা হয় না), পে-রোল ইঞ্জিনের late এর মতো।
+- বাকেট incr করা হয় না: FileBasedCache এ incr মানে get তারপর set, একসাথে কয়েকটা প্রসেস (Passenger,
+  sync_devices, drain_push_queue) ইনজেস্ট করলে আপডেট হারাত। তাই মুছে ফেলা হয় আর কোম্পানির
+  generation বদলায়: aggregate কোয়েরির পরে কিন্তু cache.add এর আগে কোনো পাঞ্চ commit হলে
+  trend_buckets generation মিলিয়ে দেখে নিজের লেখা বাকেট মুছে দেয়, পুরনো কাউন্ট থেকে যায় না।
+"""
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.timezone import localdate
+
+from attendance_app.models import DailyAttendance
+
+# আজকের বাকেট ঘনঘন বদলায় (প্রতি ইনজেস্টে মুছে যায়), বেশিক্ষণ রাখার মানে নেই
+TODAY_TTL = 5 * 60
+HISTORY_TTL = 40 * 24 * 3600
+EPOCH_KEY = 'dash-epoch:{}'
+GENERATION_KEY = 'dash-gen:{}'
+
+
+def _epoch(company_id):
+    return cache.get_or_set(EPOCH_KEY.format(company_id), uuid.uuid4().hex[:8], None)
+
+
+def reset_trend_buckets(company_id):
+    cache.set(EPOCH_KEY.format(company_id), uuid.uuid4().hex[:8], None)
+
+
+def _bump_generation(company_id):
+    cache.set(GENERATION_KEY.format(company_id), uuid.uuid4().hex[:8], None)
+
+
+def _calendar(company_id):
+    # utils.company_calendar -> rollup -> এই মডিউল, তাই এখানে ইমপোর্ট
+    from attendance_app.utils.company_calendar import get_company_calendar
+    return get_company_calendar(company_id)
+
+
+def _key(epoch, company_id, department_id, day, field):
+    return f'dash:{company_id}:{epoch}:{department_id or "all"}:{day.isoformat()}:{field}'
+
+
+def trend_buckets(company_id, department_id, start_date, end_date):
+    """
+    {date: (present, late)}। department_id=None মানে কোম্পানির সব ডিপার্টমেন্ট
+    (ড্যাশবোর্ডের মতো department__company দিয়ে)।
+    """
+    department_id = int(department_id) if department_id else None  # GET থেকে স্ট্রিং আসে
+    epoch = _epoch(company_id)
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    keys = {d: (_key(epoch, company_id, department_id, d, 'present'),
+                _key(epoch, company_id, department_id, d, 'late')) for d in dates}
+    cached = cache.get_many([k for pair in keys.values() for k in pair])
+
+    result, missing = {}, []
+    for d, (present_key, late_key) in keys.items():
+        if present_key in cached and late_key in cached:
+            result[d] = (cached[present_key], cached[late_key])
+        else:
+            missing.append(d)
+    if not missing:
+        return result
+
+    generation = cache.get(GENERATION_KEY.format(company_id))
+    counts = _count_days(company_id, department_id, min(missing), max(missing))
+
+    today = localdate()
+    written = []
+    for d in missing:
+        result[d] = counts.get(d, (0, 0))
+        ttl = TODAY_TTL if d >= today else HISTORY_TTL
+        present_key, late_key = keys[d]
+        # add: এর মধ্যে অন্য কেউ লিখে থাকলে ওভাররাইট হবে না
+        cache.add(present_key, result[d][0], ttl)
+        cache.add(late_key, result[d][1], ttl)
+        written += [present_key, late_key]
+    # কোয়েরির পরে কোনো দিনের rollup বদলেছে: লেখা কাউন্ট পুরনো হতে পারে, পরের লোডে আবার গোনা
+    if cache.get(GENERATION_KEY.format(company_id)) != generation:
+        cache.delete_many(written)
+    return result
+
+
+def _count_days(company_id, department_id, start_date, end_date):
+    """{date: (present, late)} এক aggregate কোয়েরিতে; late শুধু ডিপার্টমেন্টের কর্মদিবসে।"""
+    qs = DailyAttendance.objects.filter(local_date__range=(start_date, end_date),
+                                        employee__department__company_id=company_id)
+    if department_id:
+        qs = qs.filter(employee__department_id=department_id)
+    calendar = _calendar(company_id)
+    counts = {}
+    for row in qs.values('local_date', 'employee__department_id').annotate(
+            present=Count('id'), late=Count('id', filter=Q(late__gt=timedelta(0)))):
+        present, late = counts.get(row['local_date'], (0, 0))
+        if not calendar.is_workday(row['employee__department_id'], row['local_date']):
+            row['late'] = 0
+        counts[row['local_date']] = (present + row['present'], late + row['late'])
+    return counts
+
+
+class TrendDelta:
+    """rollup রিফ্রেশের সময় present/late কাউন্টের পরিবর্তন জমায়, commit এর পরে cache এ লেখে।"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._calendars = {}
+
+    def add(self, company_id, department_id, day, present=0, late=0):
+        if department_id is None:
+            return  # ডিপার্টমেন্ট ছাড়া employee ড্যাশবোর্ডে আসে না
+        for dept in (department_id, None):
+            if present:
+                self.counts[(company_id, dept, day, 'present')] += present
+            if late:
+                self.counts[(company_id, dept, day, 'late')] += late
+
+    def row_changed(self, company_id, department_id, day, old_late, new_late, created=False, deleted=False):
+        if company_id not in self._calendars:
+            self._calendars[company_id] = _calendar(company_id)
+        workday = self._calendars[company_id].is_workday(department_id, day)
+        was_late = bool(workday and old_late and old_late > timedelta(0))
+        is_late = bool(workday and new_late and new_late > timedelta(0))
+        self.add(company_id, department_id, day,
+                 present=1 if created else -1 if deleted else 0,
+                 late=int(is_late) - int(was_late))
+
+    def apply(self):
+        counts = {k: v for k, v in self.counts.items() if v}
+        self.counts = Counter()
+        if counts:
+            transaction.on_commit(lambda: _apply(counts))
+
+
+def _apply(counts):
+    """বদলানো দিনের বাকেট মুছে ফেলা: আগে generation, তারপর delete (চলমান trend_buckets এর add ও এভাবে ধরা পড়ে)।"""
+    epochs, stale = {}, {}
+    for company_id, dept, day, field in counts:
+        if company_id not in epochs:
+            epochs[company_id] = _epoch(company_id)
+        stale.setdefault(company_id, []).append(_key(epochs[company_id], company_id, dept, day, field))
+    for company_id, keys in stale.items():
+        _bump_generation(company_id)
+        cache.delete_many(keys)
@@ -0,0 +1,165 @@
+"""
+অ্যাটেন্ডেন্স, রিপোর্ট আর পে-রোল এর জন্য একটাই দিন-ভিত্তিক হিসাব।
+
+build_day_status(employees, start, end) তিনটা কোয়েরিতে (DailyAttendance rollup, Approved leave,
+Holiday) পুরো রেঞ্জ লোড করে প্রতি employee এর জন্য কমপ্যাক্ট per-day array বানায়।
+ভিউগুলো শুধু ফরম্যাট করে, নিয়ম এখানেই থাকে:
+
+- Status priority: Present > Public Holiday > Weekly Off > Leave > Absent
+  (ছুটির দিনে leave পড়লে আলাদা করে ক্রেডিট হয় না)
+- Regular time = ডিপার্টমেন্টের শিফটের দৈর্ঘ্য
+- In/Out = দিনের প্রথম/শেষ পাঞ্চ; late = In - অফিস শুরু (শুধু কর্মদিবসে)
+- Worked = Out - max(In, অফিস শুরু); Leave এর দিনে পুরো শিফট ক্রেডিট
+- Overtime = ছুটির দিনে পুরো worked, কর্মদিবসে worked - শিফট
+- Less = কর্মদিবসে শিফট - worked (Absent হলে পুরো শিফট)
+"""
+from array import array
+from datetime import timedelta
+
+from attendance_app.models import DailyAttendance
+from attendance_app.utils.intervals import CalendarIndex
+from attendance_app.utils.rollup import shift_length
+
+PRESENT, HOLIDAY, WEEKLY_OFF, LEAVE, ABSENT = range(5)
+
+STATUS_LABELS = {
+    PRESENT: 'Present',
+    HOLIDAY: 'Public Holiday',
+    WEEKLY_OFF: 'Weekly Off',
+    LEAVE: 'Leave',
+    ABSENT: 'Absent',
+}
+
+# day_type: ক্যালেন্ডার অনুযায়ী দিনটা কী (পাঞ্চ থাকুক বা না থাকুক)
+WORKDAY = 0
+
+
+class EmployeeDays:
+    """
+    এক employee এর রেঞ্জের হিসাব। dates এর i-তম দিনের জন্য:
+    status[i], day_type[i] (WORKDAY/HOLIDAY/WEEKLY_OFF), rows[i] (DailyAttendance বা None),
+    late/worked/overtime/less[i] সেকেন্ডে।
+    """
+    __slots__ = ('employee', 'dates', 'shift', 'status', 'day_type', 'rows',
+                 'late', 'worked', 'overtime', 'less')
+
+    def __init__(self, employee, dates, shift=None):
+        size = len(dates)
+        self.employee = employee
+        self.dates = dates
+        self.shift = shift if shift is not None else shift_length(employee.department)
+        self.status = bytearray(size)
+        self.day_type = bytearray(size)
+        self.rows = [None] * size
+        self.late = array('q', bytes(8 * size))
+        self.worked = array('q', bytes(8 * size))
+        self.overtime = array('q', bytes(8 * size))
+        self.less = array('q', bytes(8 * size))
+
+    def count(self, status):
+        return self.status.count(status)
+
+    def total(self, field):
+        return timedelta(seconds=sum(getattr(self, field)))
+
+    @property
+    def working_days(self):
+        return self.day_type.count(WORKDAY)
+
+    @property
+    def expected(self):
+        """কর্মদিবস × শিফট (ছুটির দিন বাদ)।"""
+        return self.working_days * self.shift
+
+    def day(self, i):
+        """একদিনের হিসাব dict আকারে (টেমপ্লেটে ফরম্যাট করার জন্য)।"""
+        return {
+            'date': self.dates[i],
+            'status': self.status[i],
+            'day_type': self.day_type[i],
+            'row': self.rows[i],
+            'late': timedelta(seconds=self.late[i]),
+            'worked': timedelta(seconds=self.worked[i]),
+            'overtime': timedelta(seconds=self.overtime[i]),
+            'less': timedelta(seconds=self.less[i]),
+        }
+
+    def days(self):
+        for i in range(len(self.dates)):
+            yield self.day(i)
+
+
+def build_day_status(employees, start_date, end_date, calendar=None):
+    """
+    employees: Employee এর iterable (department select_related করা থাকলে ভালো)।
+    calendar: আগে লোড করা CalendarIndex (রেঞ্জ কভার করলে leave/holiday কোয়েরি হয় না)।
+    Returns: (dates, {employee_id: EmployeeDays}); employees এর ক্রম বজায় থাকে।
+    """
+    employees = list(employees)
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    result = {}
+    if not employees or not dates:
+        return dates, result
+
+    emp_ids = [e.id for e in employees]
+    company_ids = {e.company_id for e in employees}
+
+    # 1) তিনটা বাল্ক কোয়েরি (rollup, leave, holiday)
+    rows = {}
+    for row in DailyAttendance.objects.filter(employee_id__in=emp_ids,
+                                              local_date__range=(start_date, end_date)):
+        rows[(row.employee_id, row.local_date)] = row
+
+    # leave/holiday: ইন্টারভাল ইনডেক্স (utils.intervals); বাইরে থেকে দিলে আবার কোয়েরি হয় না
+    if calendar is None or not calendar.covers(start_date, end_date):
+        calendar = CalendarIndex.load(emp_ids, company_ids, start_date, end_date)
+
+    # 2) রেঞ্জের জন্য একবারই: কোম্পানি প্রতি holiday মাস্ক, ডিপার্টমেন্ট প্রতি weekly off মাস্ক
+    #    (weekly off/শিফট কোম্পানি ক্যালেন্ডার থেকে, Department টেবিলে আবার যেতে হয় না)
+    size = len(dates)
+    holiday_masks = {cid: calendar.holidays(cid).mask(start_date, size) for cid in company_ids}
+    off_masks = {}
+
+    for emp in employees:
+        dept = calendar.company(emp.company_id).department(emp.department_id)
+        days = EmployeeDays(emp, dates, dept.shift)
+        shift = int(dept.shift.total_seconds())
+        if emp.department_id not in off_masks:
+            off_masks[emp.department_id] = dept.weekly_off_mask(start_date, size)
+        off_mask = off_masks[emp.department_id]
+        holiday_mask = holiday_masks[emp.company_id]
+        leave_mask = calendar.leave(emp.id).mask(start_date, size)
+
+        for i, d in enumerate(dates):
+            if holiday_mask[i]:
+                day_type = HOLIDAY
+            elif off_mask[i]:
+                day_type = WEEKLY_OFF
+            else:
+                day_type = WORKDAY
+            days.day_type[i] = day_type
+
+            row = rows.get((emp.id, d))
+            if row:
+                worked = int(row.worked.total_seconds())
+                days.rows[i] = row
+                days.status[i] = PRESENT
+                days.worked[i] = worked
+                if day_type == WORKDAY:
+                    days.late[i] = int(row.late.total_seconds())
+                    days.overtime[i] = int(row.overtime.total_seconds())
+                    days.less[i] = max(shift - worked, 0)
+                else:
+                    days.overtime[i] = worked
+            elif day_type != WORKDAY:
+                days.status[i] = day_type
+            elif leave_mask[i]:
+                days.status[i] = LEAVE
+                days.worked[i] = shift
+            else:
+                days.status[i] = ABSENT
+                days.less[i] = shift
+
+        result[emp.id] = days
+
+    return dates, result
@@ -0,0 +1,124 @@
+"""
+CSV/XLSX এক্সপোর্ট, রো ধরে ধরে স্ট্রিম।
+
+রো আসে generator থেকে (employee ব্যাচ × তারিখ উইন্ডো), তাই রেঞ্জ বা employee সংখ্যা যত বড়ই হোক
+মেমোরিতে একসাথে একটা ব্যাচই থাকে। CSV সরাসরি StreamingHttpResponse এ যায়; XLSX এর জন্য
+openpyxl (requirements.txt এ আছে) write-only মোডে টেম্প ফাইলে লিখে টুকরো টুকরো পাঠানো হয়।
+"""
+import csv
+import tempfile
+from datetime import timedelta
+
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.timezone import localtime
+
+from attendance_app.utils.day_status import build_day_status, STATUS_LABELS
+from attendance_app.utils.intervals import CalendarIndex
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl ইনস্টল না থাকলে xlsx চাইলে 400
+    Workbook = None
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EMPLOYEE_BATCH = 200
+DATE_WINDOW = 31
+CHUNK_SIZE = 64 * 1024
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class _Echo:
+    """csv.writer এর জন্য ফাইল-সদৃশ অবজেক্ট: লেখা লাইনটাই ফেরত দেয়।"""
+    def write(self, value):
+        return value
+
+
+def _csv_stream(header, rows):
+    writer = csv.writer(_Echo())
+    # Excel এ বাংলা নাম ঠিকমতো দেখানোর জন্য UTF-8 BOM
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _xlsx_stream(header, rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    with tempfile.TemporaryFile() as fh:
+        wb.save(fh)
+        fh.seek(0)
+        while True:
+            chunk = fh.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(fmt, filename, header, rows):
+    """fmt ('csv'/'xlsx') অনুযায়ী StreamingHttpResponse; rows একটা iterable (generator)।"""
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Invalid export format. Use csv or xlsx.")
+    if fmt == 'xlsx':
+        if Workbook is None:
+            return HttpResponseBadRequest("XLSX export needs openpyxl; use format=csv.")
+        response = StreamingHttpResponse(_xlsx_stream(header, rows), content_type=XLSX_CONTENT_TYPE)
+    else:
+        response = StreamingHttpResponse(_csv_stream(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def queryset_batches(queryset, size):
+    """pk ধরে ব্যাচে (offset ছাড়া)।"""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        yield batch
+
+
+def _fmt_hhmm(seconds):
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}"
+
+
+ATTENDANCE_HEADER = ['Employee ID', 'Employee', 'Department', 'Date', 'In', 'Out', 'Worked', 'Status']
+
+
+def iter_attendance_rows(employee_qs, start_date, end_date):
+    """
+    অ্যাটেন্ডেন্স টেবিলের রো। ক্রম: employee ব্যাচ → ৩১ দিনের উইন্ডো → employee → তারিখ
+    (এক মাসের রেঞ্জে সোজা employee, তারপর তারিখ)। স্ট্যাটাসের নিয়ম day_status ইঞ্জিনের,
+    Worked = Out - In (অ্যাটেন্ডেন্স লিস্ট PDF এর মতো)।
+    """
+    for employees in queryset_batches(employee_qs.select_related('department'), EMPLOYEE_BATCH):
+        # leave/holiday পুরো রেঞ্জের জন্য ব্যাচে একবার, উইন্ডোগুলো শেয়ার করে
+        calendar = CalendarIndex.load([e.id for e in employees], {e.company_id for e in employees},
+                                      start_date, end_date)
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=DATE_WINDOW - 1), end_date)
+            dates, by_emp = build_day_status(employees, window_start, window_end, calendar=calendar)
+            window_start = window_end + timedelta(days=1)
+
+            for emp in employees:
+                emp_days = by_emp[emp.id]
+                dept = emp.department.name if emp.department else '-'
+                for i, d in enumerate(dates):
+                    row = emp_days.rows[i]
+                    in_time = localtime(row.first_in) if row else None
+                    out_time = localtime(row.last_out) if row and row.last_out else None
+                    worked = '-'
+                    if in_time and out_time and out_time > in_time:
+                        worked = _fmt_hhmm(int((out_time - in_time).total_seconds()))
+                    yield [
+                        emp.device_user_id, emp.name, dept, d.isoformat(),
+                        in_time.strftime('%H:%M') if in_time else '-',
+                        out_time.strftime('%H:%M') if out_time else '-',
+                        worked, STATUS_LABELS[emp_days.status[i]],
+                    ]
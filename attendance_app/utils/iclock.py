@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+# ডিভাইসের ATTLOG বডি অনেক বড় হতে পারে, তাই এই সাইজের চাঙ্কে ইনজেস্ট হবে
+INGEST_CHUNK_SIZE = 5000
+
+
+def parse_attlog(lines):
+    """
+    ADMS ATTLOG বডি স্ট্রিমিং পার্স করে।
+    প্রতি লাইন: PIN<TAB>YYYY-MM-DD HH:MM:SS<TAB>status<TAB>verify<TAB>workcode...
+    Yields: (pin, naive local datetime); ভাঙা লাইন চুপচাপ বাদ যায়।
+    """
+    for raw in lines:
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8', 'ignore')
+        parts = raw.strip().split('\t')
+        if len(parts) < 2 or not parts[0].strip():
+            continue
+        try:
+            timestamp = datetime.strptime(parts[1].strip(), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+        yield parts[0].strip(), timestamp
+
+
+def chunked(iterable, size=INGEST_CHUNK_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def device_timezone():
+    """
+    settings.TIME_ZONE এর এখনকার UTC offset, ADMS এর TimeZone ফরম্যাটে: পূর্ণ ঘণ্টা হলে ঘণ্টা (6),
+    নাহলে মিনিট (330); ফার্মওয়্যার ±12 এর বাইরের মানকে মিনিট ধরে।
+    """
+    minutes = int(timezone.localtime().utcoffset().total_seconds() // 60)
+    return str(minutes // 60 if minutes % 60 == 0 else minutes)
+
+
+def handshake_options(serial, attlog_stamp=''):
+    """GET /iclock/cdata (handshake) এর রেসপন্স: ডিভাইস কীভাবে পুশ করবে তার কনফিগ।"""
+    return "\n".join([
+        f"GET OPTION FROM: {serial}",
+        f"ATTLOGStamp={attlog_stamp or 'None'}",
+        "OPERLOGStamp=9999",
+        "ATTPHOTOStamp=None",
+        "ErrorDelay=30",
+        "Delay=10",
+        "TransTimes=00:00;14:05",
+        "TransInterval=1",
+        "TransFlag=TransData AttLog",
+        f"TimeZone={device_timezone()}",
+        "Realtime=1",
+        "Encrypt=None",
+    ])
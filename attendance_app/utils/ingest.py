@@ -0,0 +1,223 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils.timezone import make_aware, is_naive, localtime
+
+from attendance_app.models import Employee, Attendance, local_date_filter
+from attendance_app.utils.rollup import refresh_daily_attendance
+
+# একই মানুষ ৫ মিনিটের মধ্যে ২ বার পাঞ্চ দিলে ইগনোর
+DEBOUNCE_MINUTES = 5
+BULK_BATCH_SIZE = 500
+
+
+def _normalize_timestamp(ts):
+    ts = ts.replace(microsecond=0)
+    if is_naive(ts):
+        ts = make_aware(ts)
+    return ts
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def ingest_punches(company, punches):
+    """
+    ডিভাইসের raw পাঞ্চ (device_user_id, timestamp) একবারে প্রসেস করে।
+
+    Rules (আগের per-punch লজিকের মতোই):
+    1. দিনের প্রথম পাঞ্চ = 'In'
+    2. পরের পাঞ্চগুলো দিনের একটাই 'Out' রেকর্ডে লেটেস্ট টাইম বসায়
+    3. আগের পাঞ্চের ৫ মিনিটের মধ্যে হলে ইগনোর (Debounce)
+
+    Employee map এবং প্রভাবিত (employee, date) উইন্ডোর In/Out রেকর্ড একটাই
+    কোয়েরিতে লোড হয়, রুলগুলো মেমোরিতে চলে, তারপর bulk_create/bulk_update।
+    যে দিনগুলো বদলালো শুধু সেগুলোর DailyAttendance rollup রিফ্রেশ হয়।
+    Returns: {'created', 'updated', 'debounced', 'unknown'}
+    """
+    counts = {'created': 0, 'updated': 0, 'debounced': 0, 'unknown': 0}
+
+    # 1) Employee map: device_user_id -> employee_id (one query)
+    emp_map = dict(
+        Employee.objects.filter(company=company).values_list('device_user_id', 'id')
+    )
+
+    # 2) (employee, local date) অনুযায়ী পাঞ্চ গ্রুপ করা
+    grouped = defaultdict(list)
+    for user_id, ts in punches:
+        emp_id = emp_map.get(_to_int(user_id))
+        if emp_id is None:
+            counts['unknown'] += 1
+            continue
+        ts = _normalize_timestamp(ts)
+        grouped[(emp_id, localtime(ts).date())].append(ts)
+
+    if not grouped:
+        return counts
+
+    # 3) প্রভাবিত উইন্ডোর existing রেকর্ড (one query, (employee, local_date) ইনডেক্স)
+    dates = [d for _, d in grouped]
+    emp_ids = {emp_id for emp_id, _ in grouped}
+
+    day_rows = defaultdict(list)
+    existing = (Attendance.objects
+                .filter(employee_id__in=emp_ids, **local_date_filter(min(dates), max(dates)))
+                .only('id', 'employee_id', 'timestamp', 'local_date', 'status'))
+    for rec in existing:
+        key = (rec.employee_id, rec.local_date)
+        if key in grouped:
+            day_rows[key].append(rec)
+
+    # 4) In-memory First In / Last Out
+    debounce = timedelta(minutes=DEBOUNCE_MINUTES)
+    to_create = []
+    to_update = {}
+    touched = set()
+
+    for key, stamps in grouped.items():
+        emp_id = key[0]
+        rows = day_rows[key]
+        for ts in sorted(stamps):
+            if not rows:
+                # A. আজ কোনো রেকর্ড নেই -> এটাই প্রথম পাঞ্চ (In)
+                rec = Attendance(employee_id=emp_id, company=company, timestamp=ts,
+                                 local_date=key[1], status='In')
+                rows.append(rec)
+                to_create.append(rec)
+                touched.add(key)
+                counts['created'] += 1
+                continue
+
+            first_record = min(rows, key=lambda r: r.timestamp)
+            last_record = max(rows, key=lambda r: r.timestamp)
+
+            # --- Debounce Check ---
+            if ts - last_record.timestamp < debounce:
+                counts['debounced'] += 1
+                continue
+
+            if ts < first_record.timestamp:
+                # কেস ১: নতুন টাইম 'In' এর চেয়েও আগে (ডিভাইস সিঙ্ক ইস্যু)
+                first_record.timestamp = ts
+                first_record.status = 'In'
+                target = first_record
+            else:
+                # কেস ২: দিনের একটাই 'Out' রেকর্ড থাকবে (Latest time)
+                outs = [r for r in rows if r.status == 'Out']
+                if not outs:
+                    rec = Attendance(employee_id=emp_id, company=company, timestamp=ts,
+                                     local_date=key[1], status='Out')
+                    rows.append(rec)
+                    to_create.append(rec)
+                    touched.add(key)
+                    counts['created'] += 1
+                    continue
+                target = min(outs, key=lambda r: r.timestamp)
+                target.timestamp = ts
+
+            # নতুন (এখনো সেভ না হওয়া) রেকর্ড হলে মেমোরিতেই আপডেট হয়ে গেছে
+            if target.pk:
+                to_update[target.pk] = target
+            touched.add(key)
+            counts['updated'] += 1
+
+    # 5) কয়েকটা স্টেটমেন্টে লেখা
+    with transaction.atomic():
+        if to_create:
+            Attendance.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        if to_update:
+            Attendance.objects.bulk_update(list(to_update.values()), ['timestamp', 'status'],
+                                           batch_size=BULK_BATCH_SIZE)
+
+    # commit এর পরে: rollup raw টেবিল থেকেই আবার হিসাব করে, তাই write লক ছোট থাকে
+    refresh_daily_attendance(touched)
+    return counts
+
+
+def push_status(timestamp):
+    """Push API তে status ডিভাইস দেয় না: দুপুর ১টার আগে In, পরে Out।"""
+    return 'In' if localtime(timestamp).hour < 13 else 'Out'
+
+
+def store_push_punches(entries):
+    """
+    Push API এর [{'uid', 'time'}, ...] একবারে সেভ করে।
+    সব uid একটা কোয়েরিতে resolve হয়, তারপর bulk insert (uniq_employee_timestamp_status কনস্ট্রেইন্ট
+    ডুপ্লিকেট আটকায়, আটকানো রো duplicates এ গোনা হয়), তারপর প্রভাবিত দিনের rollup রিফ্রেশ।
+    Returns: {'accepted', 'duplicates', 'unknown'}
+    """
+    counts = {'accepted': 0, 'duplicates': 0, 'unknown': 0}
+
+    parsed = []
+    for entry in entries:
+        timestamp = make_aware(datetime.strptime(entry.get('time'), "%Y-%m-%d %H:%M:%S"))
+        parsed.append((_to_int(entry.get('uid')), timestamp))
+    if not parsed:
+        return counts
+
+    # 1) uid -> (employee_id, company_id), one query
+    uids = {uid for uid, _ in parsed if uid is not None}
+    emp_by_uid, ambiguous = {}, set()
+    for emp_id, uid, company_id in (Employee.objects
+                                    .filter(device_user_id__in=uids)
+                                    .values_list('id', 'device_user_id', 'company_id')):
+        if uid in emp_by_uid:
+            ambiguous.add(uid)  # একাধিক কোম্পানিতে একই uid -> কোনটা বোঝা যায় না
+        emp_by_uid[uid] = (emp_id, company_id)
+
+    # 2) এই ব্যাচের timestamp রেঞ্জে যা আগে থেকেই আছে (one query)
+    stamps = [ts for _, ts in parsed]
+    existing = set(
+        Attendance.objects
+        .filter(employee_id__in={emp_id for emp_id, _ in emp_by_uid.values()},
+                timestamp__gte=min(stamps), timestamp__lte=max(stamps))
+        .values_list('employee_id', 'timestamp', 'status')
+    )
+
+    to_create = []
+    for uid, timestamp in parsed:
+        if uid not in emp_by_uid or uid in ambiguous:
+            counts['unknown'] += 1
+            continue
+        emp_id, company_id = emp_by_uid[uid]
+        key = (emp_id, timestamp, push_status(timestamp))
+        if key in existing:
+            counts['duplicates'] += 1
+            continue
+        existing.add(key)
+        to_create.append(Attendance(employee_id=emp_id, company_id=company_id, timestamp=timestamp,
+                                    local_date=localtime(timestamp).date(), status=key[2]))
+
+    inserted = _insert_new(to_create)
+    refresh_daily_attendance({(rec.employee_id, rec.local_date) for rec in inserted})
+    counts['accepted'] = len(inserted)
+    counts['duplicates'] += len(to_create) - len(inserted)
+    return counts
+
+
+def _insert_new(records):
+    """
+    records insert করে যেগুলো আসলে ঢুকল সেগুলো রিটার্ন করে। ignore_conflicts এ কোনগুলো বাদ গেল জানা যায় না,
+    তাই আগে সব একসাথে (savepoint এ); মাঝখানে অন্য প্রসেস একই পাঞ্চ ঢুকিয়ে থাকলে রো ধরে ধরে।
+    """
+    try:
+        with transaction.atomic():
+            Attendance.objects.bulk_create(records, batch_size=BULK_BATCH_SIZE)
+        return records
+    except IntegrityError:
+        pass
+    inserted = []
+    for rec in records:
+        rec.pk = None  # rollback হওয়া আগের ব্যাচের id
+        try:
+            with transaction.atomic():
+                Attendance.objects.bulk_create([rec])
+        except IntegrityError:
+            continue
+        inserted.append(rec)
+    return inserted
@@ -0,0 +1,106 @@
+"""
+Leave/Holiday এর তারিখ-ইন্টারভাল, দিনে দিনে expand না করে।
+
+IntervalIndex: merge করা, sorted start/end ordinal এর দুইটা array। কোনো দিন আছে কিনা bisect এ
+O(log n); একটা রেঞ্জের মাস্ক bytearray এর slice assignment এ (প্রতি ইন্টারভাল একবার, দিন ধরে লুপ নয়),
+তাই বছরজোড়া leave বা লম্বা রেঞ্জেও খরচ ইন্টারভাল সংখ্যার উপর।
+
+CalendarIndex: employee প্রতি Approved leave এর IntervalIndex (একটা কোয়েরি) আর কোম্পানির
+ক্যালেন্ডার (holiday/weekly off, utils.company_calendar এর cache থেকে); একবার লোড হয়ে পুরো
+রিকোয়েস্টে (যেমন এক্সপোর্টের সব উইন্ডোতে) শেয়ার হয়।
+"""
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+from attendance_app.models import LeaveRequest
+from attendance_app.utils.company_calendar import get_company_calendars
+
+
+class IntervalIndex:
+    """বন্ধ [start, end] তারিখ-ইন্টারভাল (দুই প্রান্তসহ)।"""
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, ranges=()):
+        self.starts = array('l')
+        self.ends = array('l')
+        for start, end in sorted((s.toordinal(), e.toordinal()) for s, e in ranges if s <= e):
+            # overlap বা গা-ঘেঁষা (পরের দিন শুরু) হলে জোড়া লাগে
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, day):
+        ordinal = day.toordinal()
+        i = bisect_right(self.starts, ordinal) - 1
+        return i >= 0 and ordinal <= self.ends[i]
+
+    def _window(self, first, last):
+        """[first, last] ordinal উইন্ডোর সাথে overlap করা ইন্টারভালগুলোর (start, end), ক্লিপ করা।"""
+        i = max(bisect_right(self.starts, first) - 1, 0)
+        while i < len(self.starts) and self.starts[i] <= last:
+            if self.ends[i] >= first:
+                yield max(self.starts[i], first), min(self.ends[i], last)
+            i += 1
+
+    def mask(self, start_date, days):
+        """start_date থেকে days দিনের bytearray মাস্ক (১ = ইন্টারভালের ভেতরে)।"""
+        result = bytearray(days)
+        if days <= 0 or not self.starts:
+            return result
+        first = start_date.toordinal()
+        for lo, hi in self._window(first, first + days - 1):
+            result[lo - first:hi - first + 1] = b'\x01' * (hi - lo + 1)
+        return result
+
+    def count(self, start_date, end_date):
+        """রেঞ্জে কত দিন ইন্টারভালের ভেতরে।"""
+        return sum(hi - lo + 1 for lo, hi in self._window(start_date.toordinal(), end_date.toordinal()))
+
+    def ranges(self):
+        return [(date.fromordinal(s), date.fromordinal(e)) for s, e in zip(self.starts, self.ends)]
+
+
+EMPTY = IntervalIndex()
+
+
+class CalendarIndex:
+    """employee প্রতি Approved leave (IntervalIndex), কোম্পানি প্রতি CompanyCalendar (cache থেকে)।"""
+    __slots__ = ('start_date', 'end_date', '_leaves', '_companies')
+
+    def __init__(self, start_date, end_date, leaves, companies):
+        self.start_date = start_date
+        self.end_date = end_date
+        self._leaves = leaves
+        self._companies = companies
+
+    @classmethod
+    def load(cls, employee_ids, company_ids, start_date, end_date):
+        """রেঞ্জের সাথে overlap করা leave (একটা কোয়েরি); holiday/department cache থেকে।"""
+        leave_ranges = {}
+        for emp_id, start, end in (LeaveRequest.objects
+                                   .filter(employee_id__in=employee_ids, status='Approved',
+                                           start_date__lte=end_date, end_date__gte=start_date)
+                                   .values_list('employee_id', 'start_date', 'end_date')):
+            leave_ranges.setdefault(emp_id, []).append((start, end))
+
+        return cls(start_date, end_date,
+                   {k: IntervalIndex(v) for k, v in leave_ranges.items()},
+                   get_company_calendars(set(company_ids)))
+
+    def covers(self, start_date, end_date):
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def leave(self, employee_id):
+        return self._leaves.get(employee_id, EMPTY)
+
+    def company(self, company_id):
+        return self._companies[company_id]
+
+    def holidays(self, company_id):
+        return self._companies[company_id].holidays
@@ -0,0 +1,116 @@
+"""
+PostgreSQL এ Attendance এর মাসিক range পার্টিশন (timestamp এর উপর), শুধু PostgreSQL।
+
+মাইগ্রেশন 0012 টেবিলটাকে পার্টিশনড বানায়; এখানে পরের মাসগুলোর পার্টিশন আগেভাগে তৈরি আর পুরনো
+মাস detach (আর্কাইভ) করা হয় (`manage.py attendance_partitions`, ক্রন থেকে মাসে একবার)।
+
+- পার্টিশনের সীমা লোকাল (TIME_ZONE) মাসের শুরু, তাই local_date এর এক মাস ঠিক এক পার্টিশনে।
+- মাস না থাকলে রো DEFAULT পার্টিশনে যায়; পরে ওই মাসের পার্টিশন বানালে সেগুলো সেখানে সরে।
+- detach করা টেবিল (attendance_app_attendance_pYYYYMM) আলাদা টেবিল হিসেবে থাকে (pg_dump করে DROP);
+  বড় DELETE এর মতো dead tuple / vacuum এর চাপ হয় না। DailyAttendance rollup থাকে, তাই পুরনো
+  মাসের রিপোর্ট চলে, কিন্তু ওই মাসের raw পাঞ্চ আর দেখা/এডিট করা যায় না।
+"""
+import re
+from datetime import date, datetime
+
+from django.utils import timezone
+
+from attendance_app.models import Attendance, DailyAttendance
+
+TABLE = Attendance._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_RE = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y%m}'
+
+
+def _bound(month):
+    # লোকাল মাসের শুরু, offset সহ লিটারাল (সেশনের TimeZone এর উপর নির্ভর করে না)
+    return "'%s'" % timezone.make_aware(datetime(month.year, month.month, 1)).isoformat()
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(connection):
+    """[(name, month বা None (DEFAULT), আনুমানিক রো)] মাস অনুযায়ী সাজানো।"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    result = []
+    for name, estimate in rows:
+        match = PARTITION_RE.match(name)
+        month = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+        result.append((name, month, max(estimate, 0)))
+    return sorted(result, key=lambda r: (r[1] is not None, r[1] or date.min))
+
+
+def create_partition(connection, month):
+    """
+    month এর পার্টিশন (আগে থেকে থাকলে কিছু করে না)। Returns: DEFAULT থেকে সরানো রো সংখ্যা।
+    ATTACH এর আগে DEFAULT পার্টিশনে ওই মাসের রো থাকলে ATTACH ফেইল করে, তাই আগে সরানো হয়।
+    """
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    with connection.cursor() as cursor:
+        # একই transaction এ আগে লেখা রো থাকলে deferred FK চেক বাকি থাকে, তখন ALTER TABLE চলে না
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0]:
+            return 0
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE "timestamp" >= {lower} AND "timestamp" < {upper} RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM ({lower}) TO ({upper})')
+    return moved
+
+
+def detach_partition(connection, month, drop=False):
+    """
+    month এর পার্টিশন detach; drop=False হলে আলাদা টেবিল হিসেবে থাকে (আর্কাইভের জন্য)।
+    parent থেকে পাওয়া FK গুলো মুছে দেওয়া হয়, নাহলে আর্কাইভে রো থাকা employee ডিলিট করা যায় না।
+    ওই মাসের rollup এর first_punch ও খালি হয় (পাঞ্চটা আর নেই, টেবিলে এডিট লিংক দেখাবে না)।
+    """
+    name = partition_name(month)
+    DailyAttendance.objects.filter(local_date__gte=month, local_date__lt=add_months(month, 1),
+                                   first_punch__isnull=False).update(first_punch=None)
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+            return
+        cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                       [name])
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"')
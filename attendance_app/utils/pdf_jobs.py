@@ -0,0 +1,155 @@
+"""
+ব্যাকগ্রাউন্ড PDF রেন্ডারিং।
+
+ভিউ সরাসরি WeasyPrint চালায় না: pdf_response() (kind, company, normalized params, data version)
+দিয়ে একটা PdfJob খোঁজে/কিউ করে। render_pdf_jobs কমান্ড জবটা রেন্ডার করে PDF_JOBS_ROOT এ রাখে,
+একই রিপোর্ট আবার চাইলে ডাটা না বদলানো পর্যন্ত ফাইলটাই সার্ভ হয়।
+রেন্ডার ফাংশনগুলো (request) -> (pdf bytes, filename); ওয়ার্কার জবের ইউজার/প্যারাম দিয়ে request বানিয়ে ডাকে।
+"""
+import hashlib
+import json
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpRequest, JsonResponse, QueryDict
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from attendance_app.models import PdfJob
+from attendance_app.utils.versions import company_version
+
+# kind -> (রেন্ডার ফাংশন, key তে যাওয়া GET প্যারামিটার, কোম্পানি ভিত্তিক ডাটা কিনা,
+#          ফাইল দেখার অনুমতি (user -> bool, যে ভিউ জব বানায় তার user_passes_test এর মতো) বা None,
+#          PDF এ ইউজার ছাপা হয় কিনা ("Generated by"); হলে জব ইউজার প্রতি আলাদা, শেয়ার হয় না)
+PDF_KINDS = {
+    'monthly_work_time': ('attendance_app.views.render_monthly_work_time_pdf',
+                          ('start_date', 'end_date', 'department', 'employee'), True, None, False),
+    'attendance_list': ('attendance_app.views.render_attendance_list_pdf',
+                        ('start_date', 'end_date', 'department', 'employee'), True, None, True),
+    'leave_summary': ('attendance_app.views.render_leave_summary_pdf',
+                      ('q', 'status', 'department', 'date_from', 'date_to'), True, None, False),
+    'salary_summary': ('payroll.views.render_salary_summary_pdf',
+                       ('month', 'department', 'employee'), True, 'payroll.views.is_not_attendance_group', False),
+    'employee_profiles': ('userapp.views.render_employee_profile_list_pdf', ('q',), False, None, False),
+}
+
+
+def _wants_json(request):
+    return 'application/json' in (request.headers.get('Accept') or '').lower()
+
+
+def job_for_request(request, kind):
+    """একই রিপোর্ট + একই ডাটা হলে একই জব (unique cache_key), না থাকলে নতুন কিউ।"""
+    _, keys, company_scoped, _, per_user = PDF_KINDS[kind]
+    company = getattr(getattr(request.user, 'profile', None), 'company', None)
+    company_id = company.id if company and company_scoped else None
+    params = {k: request.GET[k].strip() for k in keys if (request.GET.get(k) or '').strip()}
+
+    # প্যারাম না দিলে রিপোর্ট "আজ" ধরে, তাই আজকের তারিখও key তে
+    raw = json.dumps([kind, company_id, params, str(timezone.localdate()), company_version(company_id),
+                      request.user.pk if per_user else None], sort_keys=True)
+    cache_key = hashlib.sha256(raw.encode()).hexdigest()
+
+    job, _ = PdfJob.objects.get_or_create(cache_key=cache_key, defaults={
+        'kind': kind,
+        'company_id': company_id,
+        'requested_by': request.user,
+        'params': params,
+        'host': request.build_absolute_uri('/'),
+    })
+    return job
+
+
+def can_view_job(user, job):
+    """
+    জব একই রিপোর্ট চাওয়া সব ইউজারে শেয়ার হয় (cache_key), তাই requested_by নয়:
+    কোম্পানি মিলতে হবে আর জবের kind এর ভিউয়ের অনুমতি থাকতে হবে। ইউজারের নাম ছাপা PDF শুধু তার নিজের।
+    """
+    company = getattr(getattr(user, 'profile', None), 'company', None)
+    if job.company_id is not None and job.company_id != getattr(company, 'id', None):
+        return False
+    _, _, _, check, per_user = PDF_KINDS.get(job.kind, (None, None, None, None, False))
+    if per_user and job.requested_by_id != user.pk:
+        return False
+    return check is None or import_string(check)(user)
+
+
+def _file_ready(job):
+    return job.status == PdfJob.DONE and job.file and job.file.storage.exists(job.file.name)
+
+
+def serve_job_file(job):
+    response = FileResponse(job.file.open('rb'), content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="{job.filename}"'
+    return response
+
+
+def pdf_response(request, kind):
+    """
+    PDF ভিউগুলোর কমন রেসপন্স: তৈরি থাকলে ফাইল, না হলে 202 + জব id
+    (ব্রাউজারে অপেক্ষার পেজ যেটা নিজে রিফ্রেশ হয়, JSON চাইলে JSON)।
+    """
+    job = job_for_request(request, kind)
+
+    if job.status == PdfJob.FAILED and request.GET.get('retry'):
+        job.status, job.error = PdfJob.QUEUED, ''
+        job.save(update_fields=['status', 'error'])
+    elif job.status == PdfJob.DONE and not _file_ready(job):
+        # ফাইল purge হয়ে গেছে
+        job.status = PdfJob.QUEUED
+        job.save(update_fields=['status'])
+
+    # ডেভ/টেস্টে ওয়ার্কার ছাড়া চালাতে চাইলে
+    if job.status == PdfJob.QUEUED and getattr(settings, 'PDF_JOBS_INLINE', False):
+        if PdfJob.objects.filter(pk=job.pk, status=PdfJob.QUEUED).update(status=PdfJob.RUNNING):
+            render_job(job)
+
+    if _file_ready(job):
+        return serve_job_file(job)
+
+    status_url = reverse('attendance_app:pdf_job_status', args=[job.pk])
+    if _wants_json(request):
+        return JsonResponse({'job_id': job.pk, 'status': job.status, 'status_url': status_url}, status=202)
+    return render(request, 'pdf_job_status.html', {'job': job, 'status_url': status_url}, status=202)
+
+
+class _JobRequest(HttpRequest):
+    """ওয়ার্কারে রেন্ডার ফাংশনের জন্য জবের ইউজার/প্যারাম দিয়ে GET request।"""
+
+    def __init__(self, job):
+        super().__init__()
+        base = urlsplit(job.host or 'http://localhost/')
+        self.method = 'GET'
+        self.path = self.path_info = '/'
+        self.GET = QueryDict(mutable=True)
+        self.GET.update(job.params)
+        self.META['HTTP_HOST'] = base.netloc
+        self._scheme = base.scheme or 'http'
+        self.user = job.requested_by
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def render_job(job):
+    """RUNNING জব রেন্ডার করে DONE/FAILED করে।"""
+    render_path = PDF_KINDS[job.kind][0]
+    try:
+        if job.requested_by is None:
+            raise ValueError("Requesting user no longer exists.")
+        pdf, filename = import_string(render_path)(_JobRequest(job))
+    except Exception as e:
+        job.status, job.error = PdfJob.FAILED, str(e) or e.__class__.__name__
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return False
+
+    job.file.save(f'job_{job.cache_key}.pdf', ContentFile(pdf), save=False)
+    job.filename = filename
+    job.status, job.error = PdfJob.DONE, ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'filename', 'status', 'error', 'finished_at'])
+    return True
@@ -0,0 +1,187 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, time, date
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.timezone import make_aware, localtime
+
+from attendance_app.models import Attendance, DailyAttendance, Employee, local_date_filter
+from attendance_app.utils.versions import bump_company_version
+from attendance_app.utils.dashboard_stats import TrendDelta
+
+DEFAULT_IN_TIME = time(10, 30)
+DEFAULT_OUT_TIME = time(20, 30)
+# দুপুর ২টার আগের পাঞ্চ In, পরের পাঞ্চ Out (ডিটেইল/PDF রিপোর্টের নিয়ম)
+CUTOFF_TIME = time(14, 0)
+BULK_BATCH_SIZE = 500
+
+ROLLUP_FIELDS = ['company_id', 'first_in', 'last_out', 'first_punch_id',
+                 'punch_count', 'late', 'worked', 'overtime']
+
+
+def shift_times(department):
+    in_t = department.in_time if department and department.in_time else DEFAULT_IN_TIME
+    out_t = department.out_time if department and department.out_time else DEFAULT_OUT_TIME
+    return in_t, out_t
+
+
+def shift_length(department):
+    """শিফটের দৈর্ঘ্য (রাতের শিফটে out < in হলে পরের দিন ধরা হয়)।"""
+    in_t, out_t = shift_times(department)
+    start = datetime.combine(date(2000, 1, 1), in_t)
+    end = datetime.combine(date(2000, 1, 1), out_t)
+    if out_t < in_t:
+        end += timedelta(days=1)
+    return end - start
+
+
+def day_metrics(day, first_in, last_out, department):
+    """
+    একদিনের (late, worked, overtime), কর্মদিবস ধরে।
+    late = First In - অফিস শুরু; worked = Last Out - max(First In, অফিস শুরু);
+    overtime = worked - শিফটের দৈর্ঘ্য।
+    """
+    in_t, _ = shift_times(department)
+    expected = make_aware(datetime.combine(day, in_t))
+    late = max(first_in - expected, timedelta())
+    worked = timedelta()
+    if last_out:
+        worked = max(last_out - max(first_in, expected), timedelta())
+    overtime = max(worked - shift_length(department), timedelta())
+    return late, worked, overtime
+
+
+def split_at_cutoff(row):
+    """
+    rollup রো থেকে ২টার cutoff নিয়মে (in, out), local time এ।
+    সব পাঞ্চ ২টার পরে আর একটাই পাঞ্চ হলে সেটা শুধু Out।
+    """
+    if row is None:
+        return None, None
+    first_in = localtime(row.first_in)
+    last_out = localtime(row.last_out) if row.last_out else None
+    if first_in.time() >= CUTOFF_TIME and last_out is None:
+        return None, first_in
+    return first_in, last_out
+
+
+def refresh_daily_attendance(keys):
+    """
+    প্রদত্ত (employee_id, local_date) গুলোর rollup raw Attendance থেকে নতুন করে হিসাব করে।
+    raw পাঞ্চ, employee/department আর existing rollup একটা করে কোয়েরিতে আসে,
+    তারপর bulk upsert/update/delete। পাঞ্চ না থাকলে rollup রো মুছে যায়।
+    Returns: কতগুলো রো বদলালো
+    """
+    keys = {(emp_id, day) for emp_id, day in keys}
+    if not keys:
+        return 0
+
+    emp_ids = {emp_id for emp_id, _ in keys}
+    dates = [day for _, day in keys]
+
+    # 1) raw পাঞ্চ (one query, (employee, local_date) ইনডেক্স)
+    punches = defaultdict(list)
+    for rec_id, emp_id, day, ts in (Attendance.objects
+                                    .filter(employee_id__in=emp_ids,
+                                            **local_date_filter(min(dates), max(dates)))
+                                    .values_list('id', 'employee_id', 'local_date', 'timestamp')):
+        key = (emp_id, day)
+        if key in keys:
+            punches[key].append((ts, rec_id))
+
+    # 2) employee + department (one query), existing rollup (one query)
+    employees = {e.id: e for e in Employee.objects
+                 .filter(id__in=emp_ids)
+                 .select_related('department')}
+    existing = {(r.employee_id, r.local_date): r for r in DailyAttendance.objects
+                .filter(employee_id__in=emp_ids, local_date__range=(min(dates), max(dates)))}
+
+    stamp = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    trend = TrendDelta()  # ড্যাশবোর্ড ট্রেন্ড বাকেটের ইনক্রিমেন্টাল আপডেট
+    for key in keys:
+        row = existing.get(key)
+        day_punches = punches.get(key)
+        emp = employees.get(key[0])
+        if not day_punches or emp is None:
+            if row:
+                to_delete.append(row.pk)
+                if emp:
+                    trend.row_changed(emp.company_id, emp.department_id, key[1], row.late, None, deleted=True)
+            continue
+
+        day_punches.sort()
+        first_in, first_id = day_punches[0]
+        last_out = day_punches[-1][0] if len(day_punches) > 1 else None
+        late, worked, overtime = day_metrics(key[1], first_in, last_out, emp.department)
+        values = {
+            'company_id': emp.company_id, 'first_in': first_in, 'last_out': last_out,
+            'first_punch_id': first_id, 'punch_count': len(day_punches),
+            'late': late, 'worked': worked, 'overtime': overtime,
+        }
+
+        if row is None:
+            to_create.append(DailyAttendance(employee_id=key[0], local_date=key[1],
+                                             updated_at=stamp, **values))
+            trend.row_changed(emp.company_id, emp.department_id, key[1], None, late, created=True)
+        elif any(getattr(row, field) != value for field, value in values.items()):
+            trend.row_changed(emp.company_id, emp.department_id, key[1], row.late, late)
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.updated_at = stamp
+            to_update.append(row)
+
+    if not (to_create or to_update or to_delete):
+        return 0
+
+    with transaction.atomic():
+        if to_delete:
+            DailyAttendance.objects.filter(pk__in=to_delete).delete()
+        if to_create:
+            # একই দিন একসাথে দুই জায়গা থেকে রিফ্রেশ হলেও কনফ্লিক্টে আপডেট হবে
+            DailyAttendance.objects.bulk_create(
+                to_create, batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True, unique_fields=['employee', 'local_date'],
+                update_fields=ROLLUP_FIELDS + ['updated_at'],
+            )
+        if to_update:
+            DailyAttendance.objects.bulk_update(to_update, ROLLUP_FIELDS + ['updated_at'],
+                                                batch_size=BULK_BATCH_SIZE)
+    # ক্যাশ করা রিপোর্ট/PDF বাতিল, ট্রেন্ড বাকেটে শুধু বদলানো দিনগুলো
+    bump_company_version(*{emp.company_id for emp in employees.values()})
+    trend.apply()
+
+    return len(to_create) + len(to_update) + len(to_delete)
+
+
+def recalculate_daily_attendance(queryset):
+    """
+    শিফট টাইম বা ডিপার্টমেন্ট বদলালে late/worked/overtime আবার হিসাব।
+    raw পাঞ্চ লাগে না, rollup এর first_in/last_out থেকেই হয়; pk ধরে ব্যাচে চলে।
+    """
+    updated = 0
+    last_pk = 0
+    stamp = timezone.now()
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)
+                    .select_related('employee__department')
+                    .order_by('pk')[:BULK_BATCH_SIZE])
+        if not rows:
+            return updated
+        last_pk = rows[-1].pk
+
+        changed = []
+        trend = TrendDelta()
+        for row in rows:
+            metrics = day_metrics(row.local_date, row.first_in, row.last_out, row.employee.department)
+            if metrics != (row.late, row.worked, row.overtime):
+                trend.row_changed(row.company_id, row.employee.department_id, row.local_date, row.late, metrics[0])
+                row.late, row.worked, row.overtime = metrics
+                row.updated_at = stamp
+                changed.append(row)
+        if changed:
+            DailyAttendance.objects.bulk_update(changed, ['late', 'worked', 'overtime', 'updated_at'])
+            bump_company_version(*{row.company_id for row in changed})
+            trend.apply()
+            updated += len(changed)
+
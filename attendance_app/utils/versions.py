@@ -0,0 +1,19 @@
+"""
+কোম্পানি প্রতি ডাটা version (শেয়ার্ড cache এ একটা random token)।
+attendance/leave/holiday/salary বদলালে bump হয়; ক্যাশ করা রিপোর্ট/PDF এই token দিয়ে key বানায়,
+তাই ডাটা বদলালে পুরনো ক্যাশ আর মেলে না। cache থেকে মুছে গেলেও নতুন token = নতুন করে হিসাব (সেফ)।
+company_id=None হলো কোম্পানি-নিরপেক্ষ ডাটার scope।
+"""
+import uuid
+
+from django.core.cache import cache
+
+VERSION_KEY = 'data-version:{}'
+
+
+def company_version(company_id):
+    return cache.get_or_set(VERSION_KEY.format(company_id), uuid.uuid4().hex, None)
+
+
+def bump_company_version(*company_ids):
+    cache.set_many({VERSION_KEY.format(cid): uuid.uuid4().hex for cid in set(company_ids)}, None)
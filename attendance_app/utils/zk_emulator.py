@@ -0,0 +1,296 @@
+"""
+ZK (ZKTeco) ডিভাইস ইমুলেটর: localhost এ TCP/UDP তে pyzk এর প্রোটোকল বোঝে।
+
+হার্ডওয়্যার ছাড়াই sync_device/import_attendance কে আসল pyzk ZK ক্লায়েন্ট দিয়ে চালানো যায়
+(টেস্ট, লোড টেস্ট)। pyzk যা যা কমান্ড পাঠায় (connect, disable/enable, free sizes, buffered
+read 1503/1504, free data, exit) সেগুলোর উত্তর দেয়; ইউজার ZK8 (৭২ বাইট) আর অ্যাটেন্ডেন্স
+৪০ বাইট রেকর্ডে। বড় লগ (লাখ/মিলিয়ন রেকর্ড) ডিভাইসের মতোই চাংকে যায়।
+
+ফল্ট ইনজেকশন: latency (প্রতি উত্তরের আগে দেরি), disconnect_after (সেশনে N টা কমান্ডের পরে
+সকেট কেটে দেওয়া)। চেকসাম পাঠানো হয় 0, pyzk উত্তরের চেকসাম যাচাই করে না।
+"""
+import socket
+import socketserver
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+
+CMD_USERTEMP_RRQ = 9
+CMD_ATTLOG_RRQ = 13
+CMD_GET_FREE_SIZES = 50
+CMD_CONNECT = 1000
+CMD_EXIT = 1001
+CMD_ENABLEDEVICE = 1002
+CMD_DISABLEDEVICE = 1003
+CMD_AUTH = 1102
+CMD_PREPARE_BUFFER = 1503
+CMD_READ_BUFFER = 1504
+CMD_PREPARE_DATA = 1500
+CMD_DATA = 1501
+CMD_FREE_DATA = 1502
+CMD_ACK_OK = 2000
+CMD_ACK_ERROR = 2001
+
+TCP_MAGIC = (0x5050, 0x7D82)
+UDP_PACKET = 1024  # pyzk UDP তে প্রতি DATA প্যাকেটে ১০২৪ বাইট পড়ে
+USER_RECORD = struct.Struct('<HB8s24sIx7sx24s')  # 72
+ATTENDANCE_RECORD = struct.Struct('<H24sBIB8s')  # 40
+
+
+def encode_time(t):
+    """zkemsdk EncodeTime (pyzk এর __decode_time এর উল্টো)।"""
+    return (((t.year % 100) * 12 * 31 + (t.month - 1) * 31 + t.day - 1) * 86400
+            + (t.hour * 60 + t.minute) * 60 + t.second)
+
+
+class EmulatedDevice:
+    """
+    একটা ডিভাইসের ডাটা আর আচরণ।
+    users: [(user_id, name)]; punches: [(user_id, datetime)] (ডিভাইসের মতো naive লোকাল টাইম)।
+    """
+
+    def __init__(self, users=(), punches=(), latency=0.0, disconnect_after=None):
+        self.users = list(users)
+        self.punches = punches
+        self.latency = latency
+        self.disconnect_after = disconnect_after
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._user_data = None
+        self._attendance_data = None
+        self._record_count = None
+
+    def user_data(self):
+        with self._lock:
+            if self._user_data is None:
+                body = b''.join(USER_RECORD.pack(uid, 0, b'', str(name).encode()[:24], 0, b'',
+                                                 str(user_id).encode()[:24])
+                                for uid, (user_id, name) in enumerate(self.users, start=1))
+                self._user_data = struct.pack('<I', len(body)) + body
+            return self._user_data
+
+    def attendance_data(self):
+        with self._lock:
+            if self._attendance_data is None:
+                uids = {str(user_id): uid for uid, (user_id, _) in enumerate(self.users, start=1)}
+                # punches একটা generator ও হতে পারে (মিলিয়ন রেকর্ড মেমোরিতে list না করে)
+                body = bytearray()
+                count = 0
+                for user_id, ts in self.punches:
+                    user_id = str(user_id)
+                    body += ATTENDANCE_RECORD.pack(uids.get(user_id, 0), user_id.encode()[:24], 1,
+                                                   encode_time(ts), 0, b'')
+                    count += 1
+                self._record_count = count
+                self._attendance_data = struct.pack('<I', len(body)) + bytes(body)
+            return self._attendance_data
+
+    def sizes(self):
+        """CMD_GET_FREE_SIZES এর ৮০ বাইট: [4] users, [8] records, বাকি ক্যাপাসিটি।"""
+        self.attendance_data()
+        fields = [0] * 20
+        fields[4] = len(self.users)
+        fields[8] = self._record_count
+        fields[15] = 10000            # users_cap
+        fields[16] = 10 ** 7          # rec_cap
+        fields[18] = fields[15] - fields[4]
+        fields[19] = fields[16] - fields[8]
+        return struct.pack('<20i', *fields)
+
+
+def synthetic_logs(user_ids, start, days, punches_per_day=2):
+    """user প্রতি দিনে punches_per_day টা পাঞ্চ (০৯:০০ থেকে), লোড টেস্টের জন্য generator।"""
+    for day in range(days):
+        base = datetime.combine(start + timedelta(days=day), datetime.min.time()) + timedelta(hours=9)
+        for n, user_id in enumerate(user_ids):
+            for p in range(punches_per_day):
+                yield user_id, base + timedelta(hours=9 * p // max(punches_per_day - 1, 1),
+                                                minutes=n % 50, seconds=p)
+
+
+class _Session:
+    """একটা ক্লায়েন্ট সেশনের অবস্থা (buffered read এর ডাটা, কমান্ড কাউন্ট)।"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.buffer = b''
+        self.commands = 0
+
+
+class _Disconnect(Exception):
+    pass
+
+
+def _header(command, session_id, reply_id, payload=b''):
+    return struct.pack('<4H', command, 0, session_id, reply_id) + payload
+
+
+def _tcp(packet):
+    return struct.pack('<HHI', *TCP_MAGIC, len(packet)) + packet
+
+
+def handle_command(device, session, command, reply_id, data, tcp):
+    """একটা কমান্ডের উত্তর প্যাকেট(গুলো), TCP/UDP ফ্রেমিং ছাড়া।"""
+    session.commands += 1
+    if device.disconnect_after is not None and session.commands > device.disconnect_after:
+        raise _Disconnect()
+    if device.latency:
+        time.sleep(device.latency)
+
+    def reply(code, payload=b''):
+        return [_header(code, session.session_id, reply_id, payload)]
+
+    if command in (CMD_CONNECT, CMD_AUTH, CMD_EXIT, CMD_FREE_DATA):
+        if command == CMD_FREE_DATA:
+            session.buffer = b''
+        return reply(CMD_ACK_OK)
+    if command in (CMD_ENABLEDEVICE, CMD_DISABLEDEVICE):
+        device.enabled = command == CMD_ENABLEDEVICE
+        return reply(CMD_ACK_OK)
+    if command == CMD_GET_FREE_SIZES:
+        return reply(CMD_ACK_OK, device.sizes())
+
+    if command == CMD_PREPARE_BUFFER:
+        _, table, _, _ = struct.unpack('<bhii', data[:11])
+        if table == CMD_USERTEMP_RRQ:
+            session.buffer = device.user_data()
+        elif table == CMD_ATTLOG_RRQ:
+            session.buffer = device.attendance_data()
+        else:
+            return reply(CMD_ACK_ERROR)
+        # pyzk data[1:5] থেকে সাইজ পড়ে, তারপর 1504 দিয়ে চাংক চাংক পড়ে
+        return reply(CMD_ACK_OK, struct.pack('<BI', 0, len(session.buffer)))
+
+    if command == CMD_READ_BUFFER:
+        start, size = struct.unpack('<ii', data[:8])
+        chunk = session.buffer[start:start + size]
+        packets = reply(CMD_PREPARE_DATA, struct.pack('<II', len(chunk), 0))
+        if tcp:
+            packets += reply(CMD_DATA, chunk)
+        else:
+            packets += [_header(CMD_DATA, session.session_id, reply_id, chunk[i:i + UDP_PACKET])
+                        for i in range(0, len(chunk), UDP_PACKET)]
+        return packets + reply(CMD_ACK_OK)
+
+    return reply(CMD_ACK_OK)
+
+
+class _TCPHandler(socketserver.BaseRequestHandler):
+    def _recv_exact(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def handle(self):
+        device = self.server.device
+        session = _Session(self.server.next_session_id())
+        while True:
+            top = self._recv_exact(8)  # pyzk test_tcp() শুধু কানেক্ট করে বন্ধ করে, তখন None
+            if top is None:
+                return
+            magic1, magic2, length = struct.unpack('<HHI', top)
+            packet = self._recv_exact(length)
+            if (magic1, magic2) != TCP_MAGIC or packet is None or length < 8:
+                return
+            command, _, _, reply_id = struct.unpack('<4H', packet[:8])
+            try:
+                packets = handle_command(device, session, command, reply_id, packet[8:], tcp=True)
+            except _Disconnect:
+                self.request.shutdown(socket.SHUT_RDWR)
+                return
+            self.request.sendall(b''.join(_tcp(p) for p in packets))
+            if command == CMD_EXIT:
+                return
+
+
+class _UDPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        packet, sock = self.request
+        if len(packet) < 8:
+            return
+        device = self.server.device
+        command, _, session_id, reply_id = struct.unpack('<4H', packet[:8])
+        sessions = self.server.sessions
+        if command == CMD_CONNECT or session_id not in sessions:
+            session_id = self.server.next_session_id()
+            sessions[session_id] = _Session(session_id)
+        session = sessions[session_id]
+        try:
+            packets = handle_command(device, session, command, reply_id, packet[8:], tcp=False)
+        except _Disconnect:
+            sessions.pop(session_id, None)
+            return  # UDP তে "কেটে দেওয়া" মানে আর উত্তর না দেওয়া (ক্লায়েন্ট timeout)
+        for p in packets:
+            sock.sendto(p, self.client_address)
+        if command == CMD_EXIT:
+            sessions.pop(session_id, None)
+
+
+class _ServerMixin:
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def setup_device(self, device):
+        self.device = device
+        self.sessions = {}
+        self._session_ids = iter(range(1, 65535))
+        self._id_lock = threading.Lock()
+
+    def next_session_id(self):
+        with self._id_lock:
+            return next(self._session_ids)
+
+
+class _TCPServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+
+class _UDPServer(_ServerMixin, socketserver.ThreadingUDPServer):
+    pass
+
+
+class ZKEmulator:
+    """
+    এক ডিভাইস, একই পোর্টে TCP আর UDP। port=0 দিলে OS একটা ফাঁকা পোর্ট দেয় (.port)।
+
+        with ZKEmulator(EmulatedDevice(users, punches)) as emu:
+            ZK('127.0.0.1', port=emu.port).connect().get_attendance()
+    """
+
+    def __init__(self, device, host='127.0.0.1', port=0, udp=True):
+        self.device = device
+        self.tcp_server = _TCPServer((host, port), _TCPHandler)
+        self.tcp_server.setup_device(device)
+        self.host, self.port = self.tcp_server.server_address
+        self.udp_server = None
+        if udp:
+            self.udp_server = _UDPServer((host, self.port), _UDPHandler)
+            self.udp_server.setup_device(device)
+        self._threads = []
+
+    def start(self):
+        for server in filter(None, (self.tcp_server, self.udp_server)):
+            thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.1},
+                                      name=f'zk-emulator-{self.port}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in filter(None, (self.tcp_server, self.udp_server)):
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,154 +1,216 @@
-from datetime import datetime, timedelta
-from django.utils.timezone import make_aware, is_naive
-from zk import ZK
 import logging
-from attendance_app.models import Employee, Attendance
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from django.db import connections
+from django.utils.timezone import make_aware, is_naive, now
+from zk import ZK
+from attendance_app.models import DeviceSyncCursor
+from attendance_app.services import sync_device_users
+from attendance_app.utils.ingest import ingest_punches
 
 logger = logging.getLogger(__name__)
 
-def import_attendance(devices):
+# cursor না থাকলে (প্রথম সিঙ্ক / rewind) এর আগের লগ ইগনোর
+DEFAULT_SYNC_START = datetime(2025, 12, 1)
+DEVICE_TIMEOUT = 10
+DEADLINE_MESSAGE = "Global sync deadline exceeded before this device finished."
+
+
+class SyncCancelled(Exception):
+    pass
+
+
+class _WriteGate:
+    """
+    deadline আর worker এর DB লেখার মাঝের race বন্ধ করে। worker ডিভাইস পড়া শেষে enter() করে তারপর লেখে;
+    deadline এ close() এর পরে কেউ আর ঢুকতে পারে না, আর যারা আগেই ঢুকেছে (লেখা চলছে) তাদের index রিটার্ন হয়।
     """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closed = False
+        self._writing = set()
+
+    def enter(self, index):
+        with self._lock:
+            if self._closed:
+                return False
+            self._writing.add(index)
+            return True
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            return set(self._writing)
+
+
+def sync_device(device, timeout=DEVICE_TIMEOUT, zk_class=None, before_write=None):
+    """
+    একটি ডিভাইস থেকে ইউজার ও অ্যাটেন্ডেন্স সিঙ্ক করে, result dict রিটার্ন করে।
+
     Import logic:
     1. First Punch of the day = 'In'
     2. Last Punch of the day = 'Out' (Updates existing Out record)
     3. Ignore punches within 5 minutes of previous punch (Debounce)
+    4. Only records newer than the department's DeviceSyncCursor are processed
+
+    zk_class: pyzk এর ZK এর মতো ইন্টারফেস (টেস্টে fake device পাস করা যায়)।
+    before_write: ডিভাইস থেকে সব পড়া শেষে, DB তে কিছু লেখার আগে ডাকা হয়; False দিলে কিছু না লিখে বাতিল।
+    """
+    ip = device.get('ip')
+    port = device.get('port')
+    department = device.get('department')
+    company = getattr(department, 'company', None)
+
+    zk = (zk_class or ZK)(ip, port=port, timeout=timeout, force_udp=False, ommit_ping=True)
+    conn = None
+    started = time.monotonic()
+
+    try:
+        logger.info(f"🔌 Connecting to device {ip}:{port} for department {department.name}")
+        conn = zk.connect()
+        conn.disable_device()
+
+        # আগে ডিভাইস থেকে সব পড়া (ধীর অংশ), তারপর DB তে লেখা
+        users = conn.get_users()
+        attendances = conn.get_attendance()
+        if before_write is not None and not before_write():
+            raise SyncCancelled(DEADLINE_MESSAGE)
+
+        # --- Sync Users --- (একটা Employee কোয়েরিতে diff, নতুনরা employee limit মেনে bulk এ)
+        user_sync = sync_device_users(company=company, department=department, device_users=users)
+        if user_sync['created'] or user_sync['renamed']:
+            logger.info(f"➕ {department.name}: {user_sync['created']} new, {user_sync['renamed']} renamed employees")
+        if user_sync['skipped']:
+            logger.warning(f"⚠️ {department.name}: {user_sync['skipped']} device users not added "
+                           f"({user_sync['limit_error']})")
+
+        # --- Sync Attendance ---
+        if not attendances:
+            raise Exception("No attendance data received or device offline.")
+
+        # টাইম অনুযায়ী সর্ট করা খুব জরুরি "First In" লজিকের জন্য
+        attendances.sort(key=lambda x: x.timestamp)
+
+        # শুধু cursor এর পরের রেকর্ড (incremental sync)
+        cursor, _ = DeviceSyncCursor.objects.get_or_create(department=department)
+        start_date = make_aware(DEFAULT_SYNC_START)
+        punches = []
+        skipped_count = 0
+
+        for att in attendances:
+            timestamp = att.timestamp.replace(microsecond=0)
+            # Timezone adjustment
+            if is_naive(timestamp):
+                timestamp = make_aware(timestamp)
+
+            if timestamp < start_date or not cursor.is_new(timestamp, att.user_id):
+                skipped_count += 1
+                continue
+            punches.append((att.user_id, timestamp))
+
+        # First In / Last Out + Debounce একবারে (bulk) প্রসেস
+        counts = ingest_punches(company, punches)
+        created_count = counts['created']
+        updated_count = counts['updated']
+
+        # সফল হলে cursor এগিয়ে নেওয়া; limit এর কারণে বানানো হয়নি এমন ইউজারের প্রথম পাঞ্চের আগে পর্যন্তই,
+        # যাতে limit বাড়লে/সাবস্ক্রিপশন নতুন হলে তাদের পাঞ্চ পরের সিঙ্কে আবার আসে (বাকিরা debounce এ বাদ)
+        pending = {str(uid) for uid in user_sync['skipped_ids']}
+        held = [ts for user_id, ts in punches if str(user_id).strip() in pending]
+        cursor.advance([p for p in punches if p[1] < min(held)] if held else punches)
+        cursor.last_synced_at = now()
+        cursor.save(update_fields=['last_timestamp', 'last_user_ids', 'last_synced_at'])
+
+        message = (f"✔️ Synced {created_count} new, Updated {updated_count} records (Last Out). "
+                   f"{len(punches)} new punches, {skipped_count} already synced.")
+        if user_sync['skipped']:
+            message += f" {user_sync['skipped']} device users not added: {user_sync['limit_error']}"
+        return {
+            'department': department.name,
+            'status': 'success',
+            'message': message,
+            'elapsed': time.monotonic() - started,
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Failed to sync {department.name}: {e}")
+        return {
+            'department': department.name,
+            'status': 'error',
+            'message': str(e),
+            'elapsed': time.monotonic() - started,
+        }
+
+    finally:
+        if conn:
+            try:
+                conn.enable_device()
+                conn.disconnect()
+            except:
+                pass
+
+
+def _sync_device_in_thread(device, timeout, zk_class, before_write):
+    try:
+        return sync_device(device, timeout=timeout, zk_class=zk_class, before_write=before_write)
+    finally:
+        # worker thread এর নিজস্ব DB connection বন্ধ করা
+        connections.close_all()
+
+
+def _deadline_result(device, elapsed):
+    department = device.get('department')
+    return {
+        'department': getattr(department, 'name', str(device.get('ip'))),
+        'status': 'error',
+        'message': DEADLINE_MESSAGE,
+        'elapsed': elapsed,
+    }
+
+
+def import_attendance(devices, parallel=None, timeout=DEVICE_TIMEOUT, deadline=None, zk_class=None):
+    """
+    devices: [{'ip', 'port', 'department'}, ...]
+    parallel: N > 1 হলে bounded thread pool এ একসাথে N টা ডিভাইস সিঙ্ক হবে (deadline থাকলে N = 1 ও
+    একটা worker thread এ, যাতে ধীর একটা ডিভাইসেও deadline খাটে)।
+    timeout: প্রতি ডিভাইসের ZK socket timeout (seconds)।
+    deadline: সব ডিভাইসের জন্য মোট সময়সীমা (seconds); এর মধ্যে শেষ না হলে error result।
+    deadline এ যে ডিভাইস তখনো পড়ছে সে পরে আর DB তে কিছু লেখে না (cursor ও নড়ে না); যারা লেখা শুরু
+    করে ফেলেছে তাদের শেষ হওয়া পর্যন্ত অপেক্ষা। তাই রিটার্নের পরে (sync_devices লক ছাড়লেও) কেউ লেখে না।
+    results list সবসময় devices এর অর্ডারেই আসে।
     """
-    results = []
-
-    for device in devices:
-        ip = device.get('ip')
-        port = device.get('port')
-        department = device.get('department')
-        company = getattr(department, 'company', None)
-
-        zk = ZK(ip, port=port, timeout=10, force_udp=False, ommit_ping=True)
-        conn = None
-
-        try:
-            logger.info(f"🔌 Connecting to device {ip}:{port} for department {department.name}")
-            conn = zk.connect()
-            conn.disable_device()
-
-            # --- Sync Users ---
-            users = conn.get_users()
-            for u in users:
-                emp, created = Employee.objects.get_or_create(
-                    device_user_id=u.user_id,
-                    company=company,
-                    defaults={
-                        'name': u.name or f"User {u.user_id}",
-                        'department': department
-                    }
-                )
-                if created:
-                    logger.info(f"➕ New employee added: {emp.name}")
-
-            # --- Sync Attendance ---
-            attendances = conn.get_attendance()
-            if not attendances:
-                raise Exception(f"No attendance data received or device offline.")
-
-            # টাইম অনুযায়ী সর্ট করা খুব জরুরি "First In" লজিকের জন্য
-            attendances.sort(key=lambda x: x.timestamp)
-
-            start_date = make_aware(datetime(2025, 12, 1))
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
-            
-            # Debounce Time (একই মানুষ ৫ মিনিটের মধ্যে ২ বার দিলে ইগনোর করবে)
-            DEBOUNCE_MINUTES = 5 
-
-            for att in attendances:
-                user_id = att.user_id
-                timestamp = att.timestamp.replace(microsecond=0)
-
-                # Timezone adjustment
-                if is_naive(timestamp):
-                    timestamp = make_aware(timestamp)
-
-                if timestamp < start_date:
-                    skipped_count += 1
-                    continue
-
-                try:
-                    emp = Employee.objects.get(device_user_id=user_id, company=company)
-                    date_only = timestamp.date()
-
-                    # 1. আজকের দিনের রেকর্ড চেক করি
-                    day_records = Attendance.objects.filter(employee=emp, timestamp__date=date_only).order_by('timestamp')
-                    
-                    if not day_records.exists():
-                        # A. যদি আজ কোনো রেকর্ড না থাকে -> এটাই প্রথম পাঞ্চ (In)
-                        Attendance.objects.create(
-                            employee=emp, timestamp=timestamp, status='In', company=company
-                        )
-                        created_count += 1
-                    
-                    else:
-                        # B. যদি রেকর্ড থাকে, লজিক চেক করি
-                        last_record = day_records.last()
-                        first_record = day_records.first()
-
-                        # --- Debounce Check ---
-                        # যদি লাস্ট রেকর্ডের ৫ মিনিটের মধ্যে হয়, তবে ইগনোর (ভুল করে ২ বার চাপ দিয়েছে)
-                        time_diff = (timestamp - last_record.timestamp).total_seconds() / 60
-                        if time_diff < DEBOUNCE_MINUTES:
-                            continue
-
-                        # --- Logic: First In, Last Out ---
-                        
-                        # কেস ১: যদি নতুন টাইমটা 'In' টাইমের চেয়েও আগে হয় (খুব রেয়ার, ডিভাইস সিঙ্ক ইস্যু)
-                        if timestamp < first_record.timestamp:
-                            first_record.timestamp = timestamp
-                            first_record.status = 'In'
-                            first_record.save()
-                            updated_count += 1
-                        
-                        # কেস ২: এটা কি 'Out' হবে?
-                        else:
-                            # যদি মাঝখানে অনেকগুলো পাঞ্চ থাকে, আমরা চাই শুধু একটাই 'Out' রেকর্ড থাকুক (Latest time)
-                            # তাই আমরা চেক করব 'Out' রেকর্ড আছে কিনা
-                            out_record = day_records.filter(status='Out').first()
-
-                            if out_record:
-                                # যদি অলরেডি Out থাকে, সেটার টাইম আপডেট করে লেটেস্ট টাইম বসাবো
-                                out_record.timestamp = timestamp
-                                out_record.save()
-                                updated_count += 1
-                            else:
-                                # যদি Out না থাকে, নতুন Out ক্রিয়েট করব
-                                Attendance.objects.create(
-                                    employee=emp, timestamp=timestamp, status='Out', company=company
-                                )
-                                created_count += 1
-
-                except Employee.DoesNotExist:
-                    continue
-                except Exception as inner_e:
-                    logger.error(f"Error processing record for user {user_id}: {inner_e}")
-                    continue
-
-            results.append({
-                'department': department.name,
-                'status': 'success',
-                'message': f"✔️ Synced {created_count} new, Updated {updated_count} records (Last Out)."
-            })
-
-        except Exception as e:
-            logger.error(f"❌ Failed to sync {department.name}: {e}")
-            results.append({
-                'department': department.name,
-                'status': 'error',
-                'message': str(e)
-            })
-
-        finally:
-            if conn:
-                try:
-                    conn.enable_device()
-                    conn.disconnect()
-                except:
-                    pass
-
-    return results
\ No newline at end of file
+    devices = list(devices)
+    started = time.monotonic()
+
+    if deadline is None and (not parallel or parallel <= 1 or len(devices) <= 1):
+        return [sync_device(device, timeout=timeout, zk_class=zk_class) for device in devices]
+    if not devices:
+        return []
+
+    gate = _WriteGate()
+    workers = min(max(parallel or 1, 1), len(devices))
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zk-sync')
+    try:
+        futures = [pool.submit(_sync_device_in_thread, device, timeout, zk_class,
+                               lambda index=index: gate.enter(index))
+                   for index, device in enumerate(devices)]
+        done, _ = wait(futures, timeout=deadline)
+        writing = [futures[index] for index in gate.close()]
+        if writing:
+            # DB তে লেখা চলছে (নেটওয়ার্ক শেষ), অল্প সময়; মাঝপথে ফেলে গেলে পরের রানের সাথে মিশে যেত
+            done |= wait(writing).done
+        results = []
+        for device, future in zip(devices, futures):
+            # wait() এর পরে কিন্তু gate বন্ধের আগে নিজে শেষ হওয়া (যেমন connection error) এর আসল ফলাফল
+            if future in done or (future.done() and not future.cancelled()):
+                results.append(future.result())
+            else:
+                logger.error(f"⏱️ Sync deadline exceeded for device {device.get('ip')}")
+                results.append(_deadline_result(device, time.monotonic() - started))
+        return results
+    finally:
+        # deadline পার হলে যারা এখনো ডিভাইস পড়ছে তাদের জন্য অপেক্ষা নেই (ZK timeout এ শেষ হবে, gate বন্ধ তাই কিছু লিখবে না)
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -3,18 +3,19 @@ import json
 import calendar
 import logging
 from collections import defaultdict, OrderedDict
-from datetime import datetime, timedelta, time, date
-from io import BytesIO
+from datetime import datetime, timedelta, date
+from time import monotonic, sleep
 # Django core
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Min, Max, Count
-from django.db.models.functions import TruncDate
-from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, FileResponse
+from django.db import connection
+from django.db.models import Q, Min, Max
+from django.http import HttpResponse, JsonResponse, HttpResponseForbidden, HttpResponseBadRequest
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.timezone import localtime, localdate, make_aware, is_naive, now
 from django.views.decorators.csrf import csrf_exempt
 
@@ -26,62 +27,63 @@ from reportlab.lib.units import inch
 
 # Local apps
 from .forms import AttendanceForm, LeaveRequestForm, DepartmentForm, HolidayForm, EmployeeForm,DayAttendanceForm
-from .models import Employee, Department, Attendance, Holiday, LeaveRequest
+from .models import (Employee, Department, Attendance, DailyAttendance, Holiday, LeaveRequest, PdfJob,
+                     PushPayload, DeviceSyncCursor, local_date_filter)
 from attendance_app.utils.zk_import import import_attendance
+from attendance_app.utils.ingest import store_push_punches, ingest_punches
+from attendance_app.utils.iclock import parse_attlog, chunked, handshake_options
+from attendance_app.utils.rollup import split_at_cutoff
+from attendance_app.utils.day_status import (build_day_status, STATUS_LABELS, PRESENT, HOLIDAY,
+                                             WEEKLY_OFF, LEAVE, ABSENT, WORKDAY)
 from attendance_app.utils.attendance_helpers import generate_attendance_table
-from subscription_app.models import UserSubscription
-from subscription_app.decorators import subscription_required
+from attendance_app.utils.pdf_jobs import can_view_job, pdf_response, serve_job_file
+from attendance_app.utils.dashboard_stats import trend_buckets
+from attendance_app.utils.exports import export_response, iter_attendance_rows, ATTENDANCE_HEADER
+from subscription_app.utils import get_subscription_state
 
 from django.utils.safestring import mark_safe
 
-# ---------- Subscription helper (Date/DateTime দুই কেস) ----------
-def _has_active_subscription(user) -> bool:
-    """
-    ইউজারের সর্বশেষ সাবস্ক্রিপশন আজকের দিন-শেষ পর্যন্ত সক্রিয় কি না?
-    DateField হলে দিন-শেষ (23:59:59.999999) পর্যন্ত বৈধ ধরা হয়।
-    DateTimeField হলে tz-aware করে এখন (timezone.now) এর সাথে তুলনা হয়।
-    """
-    last = (
-        UserSubscription.objects
-        .filter(user=user)
-        .order_by('-end_date')
-        .first()
-    )
-    if not last or not last.end_date:
-        return False
-
-    end = last.end_date
-    # DateTimeField?
-    if isinstance(end, datetime):
-        if timezone.is_naive(end):
-            end = timezone.make_aware(end, timezone.get_current_timezone())
-        return timezone.now() <= end
-
-    # নাহলে DateField: দিন-শেষ পর্যন্ত বৈধ
-    end_dt = timezone.make_aware(
-        datetime.combine(end, time(23, 59, 59, 999999)),
-        timezone.get_current_timezone()
-    )
-    return timezone.now() <= end_dt
-
 # ---------- Dashboard (Optimized) ----------
 
+def _dashboard_rows(today_status):
+    """build_day_status এর আজকের হিসাব থেকে ড্যাশবোর্ড টেবিলের রো (পেজ আর লাইভ স্ট্রিম দুটোতেই)।"""
+    employee_data = []
+
+    # আমরা সব এমপ্লয়ি লুপ করব, যাতে যারা Absent তাদেরও লিস্টে পাওয়া যায়
+    for days in today_status.values():
+        day = days.day(0)
+        row = day['row']
+        status_display = STATUS_LABELS[day['status']]
+        if row and not row.last_out:
+            # শুধু একবার পাঞ্চ করেছে (হয়তো মাত্র এসেছে, বা আউট দিতে ভুলে গেছে)
+            status_display = "Present (Active)"
+
+        # লিস্টে ডাটা যোগ করা
+        employee_data.append({
+            'employee': days.employee,
+            'in_time': localtime(row.first_in).time() if row else None,
+            'out_time': localtime(row.last_out).time() if row and row.last_out else None,
+            'total_work_time': day['worked'] if row else timedelta(),
+            'late_time': day['late'],
+            'over_time': day['overtime'],
+            # দিন এখনো চলছে: Out দেওয়ার পরেই Less Time দেখানো হয়
+            'less_time': day['less'] if row and row.last_out else timedelta(),
+            'status': status_display  # টেমপ্লেটে দেখানোর জন্য
+        })
+    return employee_data
+
+
 @login_required
 def dashboard(request):
     user = request.user
 
-    # 1) সাবস্ক্রিপশন গার্ড (হার্ড ব্লক)
-    if not _has_active_subscription(user):
-        last_sub = (
-            UserSubscription.objects
-            .filter(user=user)
-            .order_by('-end_date')
-            .first()
-        )
+    # 1) সাবস্ক্রিপশন গার্ড (হার্ড ব্লক); middleware/decorator এর হিসাবই, নতুন কোয়েরি নেই
+    subscription = get_subscription_state(request)
+    if subscription.expired:
         return render(
             request,
             'subscription_app/expired.html',
-            {'last_end_date': last_sub.end_date if last_sub else None}
+            {'last_end_date': subscription.last_end_date}
         )
 
     # 2) কোম্পানি গার্ড
@@ -108,121 +110,21 @@ def dashboard(request):
     emp_ids = list(employees.values_list('id', flat=True))
     total_employees = len(emp_ids)
 
-    # 3) আজকের অ্যাটেন্ডেন্স (Optimized Query)
-    today_att_qs = (Attendance.objects
-                    .filter(employee_id__in=emp_ids, timestamp__date=today)
-                    .only('employee_id', 'timestamp', 'status')
-                    .order_by('employee_id', 'timestamp')) # Time অনুযায়ী sort করা জরুরি
-
-    # Group rows by employee_id in Python
-    rows_by_emp = defaultdict(list)
-    for att in today_att_qs:
-        rows_by_emp[att.employee_id].append(att)
-
-    employee_by_id = {e.id: e for e in employees}
+    # 3) আজকের অ্যাটেন্ডেন্স: day_status ইঞ্জিন (rollup + leave + holiday, তিনটা কোয়েরি)
+    _, today_status = build_day_status(employees, today, today)
 
-    # Per-employee compute
-    employee_data = []
-    regular_work_time = timedelta(hours=9) # স্ট্যান্ডার্ড ৯ ঘণ্টা ধরা হলো (চাইলে ১০ করতে পারেন)
-
-    # আমরা সব এমপ্লয়ি লুপ করব, যাতে যারা Absent তাদেরও লিস্টে পাওয়া যায়
-    for emp_id in emp_ids:
-        emp = employee_by_id.get(emp_id)
-        if not emp:
-            continue
+    # Per-employee compute: এখানে শুধু ফরম্যাটিং
+    employee_data = _dashboard_rows(today_status)
 
-        recs = rows_by_emp.get(emp_id, [])
-        
-        # ডিফল্ট ভ্যালু
-        first_in = None
-        last_out = None
-        total_work_time = timedelta()
-        late_time = timedelta()
-        over_time = timedelta()
-        less_time = timedelta()
-        status_display = "Absent"
-
-        # --- ✅ Logic: First In - Last Out ---
-        if recs:
-            # সব টাইমস্ট্যাম্প বের করি
-            timestamps = [r.timestamp for r in recs]
-            
-            # দিনের প্রথম পাঞ্চ = In Time
-            first_in = min(timestamps)
-            
-            # যদি একের বেশি পাঞ্চ থাকে, তবেই Out Time আছে
-            if len(timestamps) > 1:
-                last_out = max(timestamps)
-                
-                # Timezone awareness check
-                if is_naive(first_in): first_in = make_aware(first_in)
-                if is_naive(last_out): last_out = make_aware(last_out)
-                
-                total_work_time = last_out - first_in
-                status_display = "Present"
-            else:
-                # শুধু একবার পাঞ্চ করেছে (হয়তো মাত্র এসেছে, বা আউট দিতে ভুলে গেছে)
-                if is_naive(first_in): first_in = make_aware(first_in)
-                status_display = "Present (Active)"
-
-        # --- Late Calculation ---
-        if first_in:
-            # ডিপার্টমেন্টের টাইম বা ডিফল্ট ১০:৩০
-            dept_in_time = getattr(getattr(emp, 'department', None), 'in_time', time(10, 30))
-            
-            # Compare logic
-            expected_start = first_in.replace(hour=dept_in_time.hour, minute=dept_in_time.minute, second=0, microsecond=0)
-            
-            if first_in > expected_start:
-                late_time = first_in - expected_start
-
-        # --- Overtime / Less time ---
-        # ডিউটি আওয়ার্স পূর্ণ হয়েছে কিনা
-        if total_work_time > regular_work_time:
-            over_time = total_work_time - regular_work_time
-        elif total_work_time > timedelta(0): 
-            # কাজ করেছে কিন্তু সময়ের কম
-            less_time = regular_work_time - total_work_time
-
-        # লিস্টে ডাটা যোগ করা
-        employee_data.append({
-            'employee': emp,
-            'in_time': localtime(first_in).time() if first_in else None,
-            'out_time': localtime(last_out).time() if last_out else None,
-            'total_work_time': total_work_time,
-            'late_time': late_time,
-            'over_time': over_time,
-            'less_time': less_time,
-            'status': status_display  # টেমপ্লেটে দেখানোর জন্য
-        })
-
-    # 4) ৩০ দিনের ট্রেন্ড (one aggregate query)
+    # 4) ৩০ দিনের ট্রেন্ড: cache করা (company, department, date) বাকেট (utils.dashboard_stats),
+    #    ingest শুধু বদলানো দিনের কাউন্ট আপডেট করে; মিসিং দিন থাকলে এক aggregate কোয়েরি
     start_date = today - timedelta(days=29)
-
-    # ---- (Q4) Trend Calculation
-    trend_agg = (
-        Attendance.objects
-        .filter(employee_id__in=emp_ids, timestamp__date__gte=start_date, timestamp__date__lte=today)
-        .annotate(day=TruncDate('timestamp'))
-        .values('day')
-        .annotate(
-            # Distinct employee count for Present
-            present=Count('employee', distinct=True),
-            # Simple logic for late in trend (In record after 10:30)
-            late=Count('id', filter=Q(status='In', timestamp__time__gt='10:30:00'))
-        )
-        .order_by('day')
-    )
-
-    # map by date for O(1) lookup
-    present_by_day = {row['day']: row['present'] for row in trend_agg}
-    late_by_day    = {row['day']: row['late']    for row in trend_agg}
+    buckets = trend_buckets(user_company.id, selected_dept, start_date, today)
 
     attendance_trend = []
     for i in range(30):
         d = start_date + timedelta(days=i)
-        p = present_by_day.get(d, 0)
-        l = late_by_day.get(d, 0)
+        p, l = buckets[d]
         a = total_employees - p # Total - Present = Absent
         attendance_trend.append({
             'date': d.strftime('%Y-%m-%d'),
@@ -239,7 +141,7 @@ def dashboard(request):
         'total_employees': total_employees,
         # Summary counts based on calculated data
         'present': sum(1 for e in employee_data if e['in_time']),
-        'absent': sum(1 for e in employee_data if not e['in_time']),
+        'absent': sum(1 for e in employee_data if e['status'] == 'Absent'),
         'late': sum(1 for e in employee_data if e['late_time'].total_seconds() > 0),
         'attendance_trend': attendance_trend,  # optional for debugging
         # safe JSON string for template JS
@@ -248,6 +150,79 @@ def dashboard(request):
     }
     return render(request, 'dashboard.html', context)
 
+
+# ---------- Dashboard live update (Server-Sent Events, bounded long-poll) ----------
+# Passenger এর sync worker এ আসল স্ট্রিমিং প্রতি ট্যাবে একটা worker অনির্দিষ্টকাল আটকে রাখত (ASGI সার্ভার নেই)।
+# তাই প্রতি রিকোয়েস্ট সর্বোচ্চ DASHBOARD_STREAM_SECONDS অপেক্ষা করে, মাঝে কয়েকবার cursor দেখে; কিছু বদলালে
+# সাথে সাথে, নাহলে সময় শেষে ফেরে। অপেক্ষার সময় DB কানেকশন ছেড়ে দেয়। EventSource Last-Event-ID দিয়ে
+# আবার আসে, তাই মাঝের কোনো আপডেট হারায় না।
+STREAM_OVERLAP = timedelta(seconds=5)
+STREAM_RETRY_MS = 1000
+
+
+def _changed_rows(company, department_id, cursor):
+    """
+    আজকের DailyAttendance এ updated_at > cursor রোগুলো খুঁজে, বদলানো employee দের রো
+    (dashboard_row.html) রিটার্ন করে। import_attendance, push queue বা ম্যানুয়াল এডিট, সব পাথই
+    rollup এ updated_at বসায়, তাই এখানে আলাদা করে কিছু লাগে না।
+    """
+    today = localdate()
+    # দেরিতে commit হওয়া রো যাতে মিস না হয়, cursor এর কয়েক সেকেন্ড আগে থেকে দেখা হয়
+    # (ওই উইন্ডোর রো আবার আসতে পারে, ব্রাউজারে একই রো আবার বসানো নিরাপদ)
+    changed = (DailyAttendance.objects
+               .filter(employee__department__company=company, local_date=today,
+                       updated_at__gt=cursor - STREAM_OVERLAP))
+    if department_id:
+        changed = changed.filter(employee__department_id=department_id)
+    employee_ids = list(changed.values_list('employee_id', flat=True))
+    if not employee_ids:
+        return []
+    employees = Employee.objects.filter(id__in=employee_ids).select_related('department')
+    _, today_status = build_day_status(employees, today, today)
+    return [{'employee_id': data['employee'].id,
+             'html': render_to_string('dashboard_row.html', {'data': data})}
+            for data in _dashboard_rows(today_status)]
+
+
+def _dashboard_events(company, department_id, cursor, lifetime, poll):
+    deadline = monotonic() + lifetime
+    while True:
+        polled_at = timezone.now()
+        rows = _changed_rows(company, department_id, cursor)
+        if rows or monotonic() + poll > deadline:
+            break
+        if not connection.in_atomic_block:
+            connection.close()  # অপেক্ষার সময় কানেকশন ধরে না রাখা
+        sleep(poll)
+
+    # id ছাড়া কোনো ইভেন্ট না থাকলেও ব্রাউজার lastEventId মনে রাখে, পরের রিকোয়েস্ট এখান থেকে
+    events = [f"retry: {STREAM_RETRY_MS}\nid: {polled_at.isoformat()}\n\n"]
+    if rows:
+        events.append(f"event: rows\ndata: {json.dumps(rows)}\n\n")
+    return ''.join(events)
+
+
+@login_required
+def dashboard_stream(request):
+    """ড্যাশবোর্ডের লাইভ আপডেট (text/event-stream, প্রতি রিকোয়েস্টে একটা long-poll)।"""
+    user_company = getattr(getattr(request.user, 'profile', None), 'company', None)
+    if not user_company:
+        return HttpResponseForbidden("Company not set.")
+    department_id = request.GET.get('department') or None
+    if department_id is not None and not department_id.isdigit():
+        return HttpResponseBadRequest("Invalid department.")
+
+    # নতুন কানেকশন এখন থেকে শুরু; পরেরগুলোতে ব্রাউজার আগের id পাঠায়
+    cursor = parse_datetime(request.headers.get('Last-Event-ID') or '') or timezone.now()
+    response = HttpResponse(
+        _dashboard_events(user_company, department_id and int(department_id), cursor,
+                          lifetime=getattr(settings, 'DASHBOARD_STREAM_SECONDS', 25),
+                          poll=getattr(settings, 'DASHBOARD_STREAM_POLL', 5)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
   # attendance_app/views.py
 
 # 📌 ZKTeco Push API for Live Push
@@ -255,26 +230,20 @@ def dashboard(request):
 def zkteco_push_view(request):
     if request.method == 'POST':
         try:
-            data = json.loads(request.body.decode('utf-8'))
-
-            for entry in data:
-                user_id = entry.get('uid')
-                time_str = entry.get('time')
-                timestamp = make_aware(datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S"))
+            body = request.body.decode('utf-8')
+            data = json.loads(body)
+            if not isinstance(data, list):
+                return JsonResponse({'status': 'error', 'message': 'Expected a JSON array.'}, status=400)
 
-                status = 'In' if timestamp.hour < 13 else 'Out'
+            if getattr(settings, 'ATTENDANCE_PUSH_QUEUE', True):
+                # Queue এ রেখে সাথে সাথে 202; drain_push_queue কমান্ড DB তে তুলবে
+                payload = PushPayload.objects.create(body=body)
+                return JsonResponse({'status': 'queued', 'id': payload.pk, 'entries': len(data)}, status=202)
 
-                try:
-                    emp = Employee.objects.get(device_user_id=user_id)
-                    Attendance.objects.get_or_create(
-                        employee=emp,
-                        timestamp=timestamp,
-                        status=status
-                    )
-                except Employee.DoesNotExist:
-                    continue
+            # সব পাঞ্চ একবারে (bulk) সেভ, per-entry কোয়েরি নেই
+            counts = store_push_punches(data)
 
-            return JsonResponse({'status': 'success'})
+            return JsonResponse({'status': 'success', **counts})
 
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)})
@@ -282,6 +251,72 @@ def zkteco_push_view(request):
     return JsonResponse({'status': 'invalid request'}, status=400)
 
 
+# 📌 ZKTeco ADMS (iclock) push protocol
+# ডিভাইস নিজে কল করে: /iclock/cdata?SN=...&table=ATTLOG, /iclock/getrequest?SN=...
+def _iclock_department(request):
+    serial = (request.GET.get('SN') or '').strip()
+    if not serial:
+        return None
+    return Department.objects.select_related('company').filter(device_serial=serial).first()
+
+
+def _plain(text, status=200):
+    return HttpResponse(text, content_type='text/plain', status=status)
+
+
+@csrf_exempt
+def iclock_cdata(request):
+    department = _iclock_department(request)
+    if department is None:
+        return _plain("UNKNOWN DEVICE", status=403)
+
+    cursor, _ = DeviceSyncCursor.objects.get_or_create(department=department)
+
+    # Handshake: ডিভাইস কনফিগ চায়
+    if request.method == 'GET':
+        return _plain(handshake_options(department.device_serial, cursor.attlog_stamp))
+
+    if request.method != 'POST':
+        return _plain("ERROR", status=405)
+
+    # ATTLOG ছাড়া অন্য টেবিল (OPERLOG, ATTPHOTO ...) এখন দরকার নেই
+    if request.GET.get('table') != 'ATTLOG':
+        return _plain("OK")
+
+    received = 0
+    newest = None
+    # বডি লাইন ধরে স্ট্রিমিং পার্স, চাঙ্ক করে bulk ইনজেস্ট (First In / Last Out)
+    for chunk in chunked(parse_attlog(request)):
+        received += len(chunk)
+        punches = [(pin, make_aware(ts)) for pin, ts in chunk]
+        chunk_newest = max(ts for _, ts in punches)
+        if newest is None or chunk_newest > newest:
+            newest = chunk_newest
+        ingest_punches(department.company, punches)
+
+    cursor.attlog_stamp = request.GET.get('Stamp') or cursor.attlog_stamp
+    if newest and (cursor.last_timestamp is None or newest > cursor.last_timestamp):
+        # এই সেকেন্ডের পাঞ্চ পুল সিঙ্কে আবার এলে debounce এ বাদ যায়, তাই user_id গুলো রাখা লাগে না
+        cursor.last_timestamp, cursor.last_user_ids = newest, []
+    cursor.last_synced_at = now()
+    cursor.save(update_fields=['attlog_stamp', 'last_timestamp', 'last_user_ids', 'last_synced_at'])
+
+    return _plain(f"OK: {received}")
+
+
+@csrf_exempt
+def iclock_getrequest(request):
+    # সার্ভার থেকে ডিভাইসে পাঠানোর মতো কোনো কমান্ড নেই
+    if _iclock_department(request) is None:
+        return _plain("UNKNOWN DEVICE", status=403)
+    return _plain("OK")
+
+
+@csrf_exempt
+def iclock_devicecmd(request):
+    return _plain("OK")
+
+
 # 📌 Manual Sync Button with Department Filter
 
 
@@ -361,73 +396,7 @@ def sync_attendance_view(request):
 
     return render(request, 'sync_form.html', {'departments': departments})
 
-# ✅ 4. Attendance Table Helper
-
-# -------------------------------------------------------------------------
-# ✅ ১. Optimized Attendance Table Helper
-# -------------------------------------------------------------------------
-def generate_attendance_table(employee_qs, start_date_str, end_date_str):
-    """
-    একবারে সব ডাটা ফেচ করে দ্রুত অ্যাটেন্ডেন্স টেবিল তৈরি করে।
-    """
-    start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-    end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-    
-    # একবারে সব ডাটা লোড করা (Optimization)
-    att_records = Attendance.objects.filter(
-        employee__in=employee_qs,
-        timestamp__date__range=(start_date, end_date)
-    ).values('employee_id', 'timestamp', 'status')
-
-    # হলিডে লোড (Assuming same company for all in QS)
-    first_emp = employee_qs.first()
-    company = first_emp.company if first_emp else None
-    holidays = Holiday.objects.filter(
-        company=company, start_date__lte=end_date, end_date__gte=start_date
-    ).values('start_date', 'end_date')
-
-    # ম্যাপ তৈরি করা (O(1) Lookup এর জন্য)
-    att_map = defaultdict(list)
-    for r in att_records:
-        att_map[(r['employee_id'], r['timestamp'].date())].append(r['timestamp'])
-
-    holiday_set = set()
-    for h in holidays:
-        curr = max(h['start_date'], start_date)
-        while curr <= min(h['end_date'], end_date):
-            holiday_set.add(curr)
-            curr += timedelta(days=1)
-
-    days_list = []
-    curr_d = start_date
-    while curr_d <= end_date:
-        weekday = curr_d.strftime('%A')
-        for emp in employee_qs:
-            punches = att_map.get((emp.id, curr_d), [])
-            is_off = (weekday == emp.department.weekly_off_day) if emp.department else False
-            
-            in_t = min(punches) if punches else None
-            out_t = max(punches) if len(punches) > 1 else None
-            
-            # Status Priority Logic
-            if punches:
-                status = "Present"
-            elif curr_d in holiday_set:
-                status = "Holiday"
-            elif is_off:
-                status = "Weekly Off"
-            else:
-                status = "Absent"
-
-            days_list.append({
-                'employee': emp,
-                'date': curr_d,
-                'in_time': in_t,
-                'out_time': out_t,
-                'status': status
-            })
-        curr_d += timedelta(days=1)
-    return days_list
+# ✅ 4. Attendance Table: utils.attendance_helpers.generate_attendance_table (day_status ইঞ্জিন)
 
 
 def get_monthly_report_context(request):
@@ -457,86 +426,23 @@ def get_monthly_report_context(request):
     if selected_emp:
         employees = employees.filter(id=selected_emp)
 
-    holidays = Holiday.objects.filter(company=user_company, start_date__lte=end_date, end_date__gte=start_date)
-    holiday_dates = {d for h in holidays for d in [h.start_date + timedelta(days=i) for i in range((min(h.end_date, end_date) - max(h.start_date, start_date)).days + 1)]}
+    # day_status ইঞ্জিন: পুরো রেঞ্জ × সব employee তিনটা বাল্ক কোয়েরিতে
+    _, day_status = build_day_status(employees, start_date, end_date)
 
-    report_data = []
-    REGULAR_WORK_TIME = timedelta(hours=10)
-
-    for emp in employees:
-        dept = emp.department
-        expected_in = dept.in_time if dept else time(10, 30)
-        off_day = dept.weekly_off_day if dept else 'Friday'
-
-        atts = Attendance.objects.filter(employee=emp, timestamp__date__range=(start_date, end_date)).order_by('timestamp')
-        att_dict = defaultdict(list)
-        for a in atts: att_dict[a.timestamp.date()].append(a.timestamp)
+    def fmt(td):
+        s = int(td.total_seconds()); return f"{s//3600:02d}:{(s%3600)//60:02d}:{s%60:02d}"
 
-        leaves = LeaveRequest.objects.filter(employee=emp, status='Approved', start_date__lte=end_date, end_date__gte=start_date)
-        leave_dates = {d for lv in leaves for d in [lv.start_date + timedelta(days=i) for i in range((min(lv.end_date, end_date) - max(lv.start_date, start_date)).days + 1)]}
-
-        present_days, absent_days, leave_count, holiday_count, off_count = 0, 0, 0, 0, 0
-        total_work, total_late, total_over = timedelta(), timedelta(), timedelta()
-        
-        # 🟢 Expected time ঠিক রাখার জন্য ক্যালেন্ডার ছুটির ভেরিয়েবল
-        calendar_holiday_count, calendar_off_count = 0, 0
-
-        days_range = (end_date - start_date).days + 1
-        for i in range(days_range):
-            curr = start_date + timedelta(days=i)
-            wd = curr.strftime('%A')
-            punches = att_dict.get(curr, [])
-
-            is_holiday = curr in holiday_dates
-            is_off_day = (wd == off_day)
-
-            # 🟢 শুধু Expected Time ক্যালকুলেশনের জন্য
-            if is_holiday: calendar_holiday_count += 1
-            elif is_off_day: calendar_off_count += 1
-
-            # 🟢 আপনার অরিজিনাল Priority Logic (কোনো চেঞ্জ নেই)
-            if punches:
-                present_days += 1
-                t_in = min(punches)
-                t_out = max(punches) if len(punches) > 1 else None
-                
-                exp_dt = make_aware(datetime.combine(curr, expected_in)) if is_naive(datetime.combine(curr, expected_in)) else datetime.combine(curr, expected_in)
-                t_in_aware = make_aware(t_in) if is_naive(t_in) else t_in
-                
-                if t_in_aware > exp_dt: total_late += (t_in_aware - exp_dt)
-                
-                if t_out:
-                    t_out_aware = make_aware(t_out) if is_naive(t_out) else t_out
-                    actual_start = max(t_in_aware, exp_dt)
-                    if t_out_aware > actual_start:
-                        dur = t_out_aware - actual_start
-                        total_work += dur
-                        
-                        # শুধু ওভারটাইম আপডেট
-                        if is_holiday or is_off_day: total_over += dur
-                        elif dur > REGULAR_WORK_TIME: total_over += (dur - REGULAR_WORK_TIME)
-                        
-            elif curr in leave_dates:
-                leave_count += 1
-                total_work += REGULAR_WORK_TIME
-            elif is_holiday: 
-                holiday_count += 1
-            elif is_off_day: 
-                off_count += 1
-            else: 
-                absent_days += 1
-
-        # 🟢 Expected hours ক্যালেন্ডারের ছুটি দিয়ে হিসাব হবে, ফলে ওভারটাইম ব্যালেন্স মিলবে
-        expected_hours = (days_range - calendar_off_count - calendar_holiday_count) * REGULAR_WORK_TIME
-        
-        def fmt(td):
-            s = int(td.total_seconds()); return f"{s//3600:02d}:{(s%3600)//60:02d}:{s%60:02d}"
+    report_data = []
+    for emp_id, days in day_status.items():
+        total_work = days.total('worked')  # Leave এর দিনে শিফট ক্রেডিট সহ
+        # Expected hours ক্যালেন্ডারের ছুটি বাদ দিয়ে, ফলে ওভারটাইম ব্যালেন্স মিলবে
+        expected_hours = days.expected
 
         report_data.append({
-            'employee': emp, 'present_days': present_days, 'absent_days': absent_days,
-            'weekly_off_days': off_count, 'leave_days': leave_count, 'holiday_days': holiday_count,
-            'total_work_hours': fmt(total_work), 'late_time': fmt(total_late),
-            'over_time': fmt(total_over), 'less_time': fmt(max(expected_hours - total_work, timedelta())),
+            'employee': days.employee, 'present_days': days.count(PRESENT), 'absent_days': days.count(ABSENT),
+            'weekly_off_days': days.count(WEEKLY_OFF), 'leave_days': days.count(LEAVE), 'holiday_days': days.count(HOLIDAY),
+            'total_work_hours': fmt(total_work), 'late_time': fmt(days.total('late')),
+            'over_time': fmt(days.total('overtime')), 'less_time': fmt(max(expected_hours - total_work, timedelta())),
             'expected_work_time_excl_off': expected_hours, 'work_time_difference': expected_hours - total_work,
             'start_date': start_date, 'end_date': end_date
         })
@@ -561,23 +467,23 @@ def monthly_work_time_report(request):
 
 @login_required
 def monthly_work_time_pdf(request):
-    try:
-        # হেল্পার থেকে ডাটা নিয়ে আসা
-        context = get_monthly_report_context(request)
-        context['logo_url'] = request.build_absolute_uri('/static/images/logo.png')
+    # WeasyPrint রেন্ডার ব্যাকগ্রাউন্ড ওয়ার্কারে (utils.pdf_jobs), ক্যাশ থাকলে সাথে সাথে ফাইল
+    return pdf_response(request, 'monthly_work_time')
+
 
-        # PDF রেন্ডার করা
-        html_string = render_to_string('monthly_work_time_report_pdf.html', context)
+def render_monthly_work_time_pdf(request):
+    # হেল্পার থেকে ডাটা নিয়ে আসা
+    context = get_monthly_report_context(request)
+    context['logo_url'] = request.build_absolute_uri('/static/images/logo.png')
+
+    # PDF রেন্ডার করা
+    html_string = render_to_string('monthly_work_time_report_pdf.html', context)
+    
+    if HTML is None:
+        raise RuntimeError("WeasyPrint is not installed. Cannot generate PDF.")
         
-        if HTML is None:
-            return HttpResponse("WeasyPrint is not installed. Cannot generate PDF.", status=500)
-            
-        pdf = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="Monthly_Report_{context["start_date"]}.pdf"'
-        return response
-    except Exception as e:
-        return HttpResponseBadRequest(f"PDF Generation Error: {str(e)}")
+    pdf = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
+    return pdf, f"Monthly_Report_{context['start_date']}.pdf"
 
 
 
@@ -763,120 +669,6 @@ WEEKDAY_MAP = {
     'Saturday': 5,
     'Sunday': 6,
 }
-# ----------------------------
-# Generate Attendance Table (updated)
-# ----------------------------
-from collections import defaultdict
-
-def generate_attendance_table(employee_qs, start_date_str, end_date_str):
-    """
-    একবারে সব ডাটা লোড করে ফাস্ট অ্যাটেন্ডেন্স টেবিল জেনারেট করে।
-    Priority: Present > Holiday > Leave > Weekly Off > Absent
-    """
-    # Date parsing (String to Date object)
-    if isinstance(start_date_str, str):
-        start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-    else:
-        start_date = start_date_str
-
-    if isinstance(end_date_str, str):
-        end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-    else:
-        end_date = end_date_str
-
-    # 1. Bulk Fetch Data
-    # ------------------
-    all_attendance = Attendance.objects.filter(
-        employee__in=employee_qs,
-        timestamp__date__range=(start_date, end_date)
-    ).values('id', 'employee_id', 'timestamp')
-
-    all_leaves = LeaveRequest.objects.filter(
-        employee__in=employee_qs,
-        status='Approved',
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).values('employee_id', 'start_date', 'end_date')
-
-    # Holiday Fetch (Company specific)
-    first_emp = employee_qs.first()
-    company = first_emp.company if first_emp else None
-    all_holidays = Holiday.objects.filter(
-        company=company,
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).values('start_date', 'end_date')
-
-    # 2. Data Mapping
-    # ---------------
-    att_map = defaultdict(list)
-    for att in all_attendance:
-        d = att['timestamp'].date()
-        att_map[(att['employee_id'], d)].append({
-            'timestamp': att['timestamp'],
-            'id': att['id']
-        })
-
-    leave_map = set()
-    for lv in all_leaves:
-        curr = max(lv['start_date'], start_date)
-        lim = min(lv['end_date'], end_date)
-        while curr <= lim:
-            leave_map.add((lv['employee_id'], curr))
-            curr += timedelta(days=1)
-
-    holiday_map = set()
-    for h in all_holidays:
-        curr = max(h['start_date'], start_date)
-        lim = min(h['end_date'], end_date)
-        while curr <= lim:
-            holiday_map.add(curr)
-            curr += timedelta(days=1)
-
-    # 3. Generate List
-    # ----------------
-    summary = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        weekday = current_date.strftime('%A')
-        
-        for emp in employee_qs:
-            is_weekly_off = (weekday == emp.department.weekly_off_day) if emp.department else False
-            punches = att_map.get((emp.id, current_date), [])
-            
-            # Logic: First In - Last Out
-            timestamps = [p['timestamp'] for p in punches]
-            in_time = min(timestamps) if timestamps else None
-            out_time = max(timestamps) if len(timestamps) > 1 else None
-            attendance_id = punches[0]['id'] if punches else None
-
-            # Status Priority
-            if timestamps:
-                status = "Present"
-            elif current_date in holiday_map:
-                status = "Holiday"
-            elif (emp.id, current_date) in leave_map:
-                status = "Leave"
-            elif is_weekly_off:
-                status = "Weekly Off"
-            else:
-                status = "Absent"
-
-            summary.append({
-                'employee': emp,
-                'date': current_date,
-                'in_time': in_time,
-                'out_time': out_time,
-                'status': status,
-                'attendance_id': attendance_id,
-                'editable': bool(attendance_id)
-            })
-            
-        current_date += timedelta(days=1)
-
-    return summary
-
 @login_required
 def attendance_list(request):
     user_company = getattr(request.user.profile, 'company', None)
@@ -927,12 +719,17 @@ def attendance_list_pdf(request):
     """
     Attendance -> PDF (inline). 
     Uses the optimized `generate_attendance_table` helper for consistency.
+    রেন্ডার ব্যাকগ্রাউন্ডে হয় (utils.pdf_jobs)।
     """
     
     # 1. Company Scope Check
-    user_company = getattr(request.user.profile, 'company', None)
-    if not user_company:
+    if not getattr(request.user.profile, 'company', None):
         return HttpResponseForbidden("Company not set.")
+    return pdf_response(request, 'attendance_list')
+
+
+def render_attendance_list_pdf(request):
+    user_company = getattr(request.user.profile, 'company', None)
 
     # 2. Get Filters
     start_date = request.GET.get('start_date') or date.today().strftime('%Y-%m-%d')
@@ -1008,17 +805,39 @@ def attendance_list_pdf(request):
     html_string = render_to_string('attendance_list_pdf.html', context)
 
     if HTML is None:
-        return HttpResponse("WeasyPrint library not installed.", status=500)
+        raise RuntimeError("WeasyPrint library not installed.")
 
-    pdf_io = BytesIO()
-    HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf(target=pdf_io)
-    pdf_io.seek(0)
+    pdf = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
+    return pdf, f"attendance_{start_date}_to_{end_date}.pdf"
 
-    response = FileResponse(pdf_io, content_type='application/pdf', as_attachment=False)
-    response['Content-Disposition'] = f'inline; filename="attendance_{start_date}_to_{end_date}.pdf"'
-    return response
 
 
+@login_required
+def attendance_list_export(request):
+    """Attendance -> CSV/XLSX (?format=csv|xlsx), রো ধরে স্ট্রিম (utils.exports)।"""
+    user_company = getattr(request.user.profile, 'company', None)
+    if not user_company:
+        return HttpResponseForbidden("Company not set.")
+
+    start_date = parse_date(request.GET.get('start_date') or '') or localdate()
+    end_date = parse_date(request.GET.get('end_date') or '') or localdate()
+    if end_date < start_date:
+        return HttpResponseBadRequest("end_date must be after start_date.")
+    try:
+        employee_id = int(request.GET['employee']) if request.GET.get('employee') else None
+        department_id = int(request.GET['department']) if request.GET.get('department') else None
+    except ValueError:
+        return HttpResponseBadRequest("employee and department must be numeric ids.")
+
+    employees = Employee.objects.filter(company=user_company)
+    if employee_id:
+        employees = employees.filter(id=employee_id)
+    if department_id:
+        employees = employees.filter(department_id=department_id)
+
+    return export_response(request.GET.get('format', 'csv'), f"attendance_{start_date}_to_{end_date}",
+                           ATTENDANCE_HEADER, iter_attendance_rows(employees, start_date, end_date))
+
 
 @login_required
 def attendance_add(request):
@@ -1068,10 +887,10 @@ def attendance_edit(request, pk):
         employee__company=user_company
     )
     emp = anchor.employee
-    day = anchor.timestamp.date()
+    day = anchor.local_date
 
     # ওই দিনের সব রেকর্ড
-    day_qs = Attendance.objects.filter(employee=emp, timestamp__date=day).order_by('timestamp')
+    day_qs = Attendance.objects.filter(employee=emp, **local_date_filter(day, day)).order_by('timestamp')
     ins  = [r for r in day_qs if r.status == 'In']
     outs = [r for r in day_qs if r.status == 'Out']
     earliest_in  = min(ins, key=lambda r: r.timestamp) if ins else None
@@ -1153,13 +972,13 @@ def attendance_delete(request, pk):
         pk=pk,
         employee__company=user_company
     )
-    day = anchor.timestamp.date()
+    day = anchor.local_date
 
     if request.method == 'POST':
         # ✅ সেই দিনের একই employee-র সব In/Out রেকর্ড ডিলিট
         Attendance.objects.filter(
             employee=anchor.employee,
-            timestamp__date=day
+            **local_date_filter(day, day)
         ).delete()
         return redirect('attendance_app:attendance_list')
 
@@ -1167,7 +986,7 @@ def attendance_delete(request, pk):
 
 from dateutil import parser  # নিশ্চিত করুন এটি ইমপোর্ট করা আছে
 from collections import OrderedDict, defaultdict
-from datetime import datetime, timedelta, date, time as _time
+from datetime import datetime, timedelta, date
 import calendar
 from django.utils.timezone import make_aware, is_naive, localtime
 
@@ -1195,146 +1014,44 @@ def employee_attendance_detail(request, employee_id):
         start_date = today.replace(day=1)
         end_date = today
 
-    # ৩. বেস সামারি তৈরি (লুপের গতি বাড়ানো হয়েছে)
-    summary = OrderedDict()
-    weekly_off_day = employee.department.weekly_off_day if employee.department else "Friday"
-    
-    # একবারে সব দিনের স্ট্রাকচার তৈরি
-    curr = start_date
-    while curr <= end_date:
-        summary[curr] = {
-            'in_time': None, 
-            'out_time': None,
-            'status': 'Holiday' if curr.strftime('%A') == weekly_off_day else 'Absent'
-        }
-        curr += timedelta(days=1)
+    # ৩. day_status ইঞ্জিন থেকে দিনভিত্তিক হিসাব (rollup + holiday + leave একবারে)
+    dates, by_emp = build_day_status([employee], start_date, end_date)
+    days = by_emp[employee.id]
 
-    # ৪. পাবলিক হলিডে লোড (Bulk Load & Map) [Performance Fix]
-    holidays = Holiday.objects.filter(
-        company=user_company, 
-        start_date__lte=end_date, 
-        end_date__gte=start_date
-    )
-    for h in holidays:
-        # রেঞ্জ ক্ল্যাম্পিং (যাতে লুপ কম চলে)
-        h_start = max(h.start_date, start_date)
-        h_end = min(h.end_date, end_date)
-        curr = h_start
-        while curr <= h_end:
-            if curr in summary:
-                summary[curr]['status'] = 'Public Holiday'
-            curr += timedelta(days=1)
-
-    # ৫. অ্যাটেন্ডেন্স প্রসেসিং (Fast Mapping)
-    attendances = Attendance.objects.filter(
-        employee=employee,
-        timestamp__date__range=(start_date, end_date)
-    ).values('timestamp')  # শুধু timestamp আনলে কোয়েরি ফাস্ট হবে
-
-    daily_punches = defaultdict(list)
-    for att in attendances:
-        ts = att['timestamp']
-        daily_punches[ts.date()].append(ts)
-
-    cutoff_time = _time(14, 0) # দুপুর ২টা
-
-    for d, punches in daily_punches.items():
-        if d not in summary: continue
-        
-        # পাঞ্চ থাকলে স্ট্যাটাস প্রেজেন্ট (ওভাররাইড)
-        summary[d]['status'] = 'Present'
-        
-        # টাইমজোন ফিক্স করে সর্ট করা
-        punches = sorted([localtime(p) for p in punches])
-        
-        # ফাস্ট ফিল্টারিং
-        before_14 = [p for p in punches if p.time() < cutoff_time]
-        after_14 = [p for p in punches if p.time() >= cutoff_time]
-
-        in_time = None
-        out_time = None
-
-        if before_14:
-            in_time = before_14[0]
-            if after_14:
-                out_time = after_14[-1]
-            elif len(before_14) > 1:
-                out_time = before_14[-1]
-        else:
-            # সব পাঞ্চ ২টার পরে হলে
-            if len(after_14) == 1:
-                out_time = after_14[0] # শুধু একটা পাঞ্চ বিকেলে হলে সেটা আউট
-            elif len(after_14) > 1:
-                in_time = after_14[0]
-                out_time = after_14[-1]
+    # এই পেজে সাপ্তাহিক ছুটিকে 'Holiday' দেখানো হয়
+    labels = {**STATUS_LABELS, WEEKLY_OFF: 'Holiday'}
 
-        summary[d]['in_time'] = in_time
-        summary[d]['out_time'] = out_time
+    summary = OrderedDict()
+    for i, d in enumerate(dates):
+        # দুপুর ২টার cutoff: একটাই পাঞ্চ বিকেলে হলে সেটা আউট
+        in_time, out_time = split_at_cutoff(days.rows[i])
+        summary[d] = {
+            'in_time': in_time,
+            'out_time': out_time,
+            'status': labels[days.status[i]],
+        }
 
-    # ৬. লিভ প্রসেসিং (Punch এর পরে চেক, যাতে প্রেজেন্ট ওভাররাইড না হয়)
     leaves = LeaveRequest.objects.filter(
         employee=employee, 
         status='Approved', 
         start_date__lte=end_date, 
         end_date__gte=start_date
     )
-    for lv in leaves:
-        l_start = max(lv.start_date, start_date)
-        l_end = min(lv.end_date, end_date)
-        curr = l_start
-        while curr <= l_end:
-            # যদি প্রেজেন্ট না থাকে তবেই লিভ বসবে
-            if curr in summary and summary[curr]['status'] != 'Present':
-                summary[curr]['status'] = 'Leave'
-            curr += timedelta(days=1)
-
-    # ৭. ক্যালকুলেশন ও স্ট্যাটস
-    total_work_duration = timedelta()
-    dept = employee.department
-    
-    # শিফট ডিউরেশন এবং টাইম
-    exp_in = dept.in_time if dept and dept.in_time else _time(10, 30)
-    exp_out = dept.out_time if dept and dept.out_time else _time(20, 30)
-    
-    # শিফট ডিউরেশন ক্যালকুলেশন (একবারই করা ভালো)
-    dummy_date = date.min
-    shift_dur = datetime.combine(dummy_date, exp_out) - datetime.combine(dummy_date, exp_in)
-    if shift_dur.total_seconds() < 0: shift_dur = timedelta(0)
 
-    # কাউন্টার (লুপের ভেতরে না চালিয়ে জেনারেটর এক্সপ্রেশন ব্যবহার - ফাস্ট)
-    status_values = [d['status'] for d in summary.values()]
-    
-    for d, data in summary.items():
-        if data['status'] == 'Present' and data['in_time'] and data['out_time']:
-            t_in = data['in_time']
-            t_out = data['out_time']
-            
-            # Aware/Naive ফিক্স
-            if is_naive(t_in): t_in = make_aware(t_in)
-            if is_naive(t_out): t_out = make_aware(t_out)
-            
-            # লেট এডজাস্টমেন্ট
-            exp_in_dt = make_aware(datetime.combine(d, exp_in)) if is_naive(datetime.combine(d, exp_in)) else datetime.combine(d, exp_in)
-            
-            actual_start = max(t_in, exp_in_dt)
-            if t_out > actual_start:
-                total_work_duration += (t_out - actual_start)
-        
-        elif data['status'] == 'Leave':
-            total_work_duration += shift_dur
-
-    # ৮. কনটেক্সট রিটার্ন
+    # ৪. কনটেক্সট রিটার্ন
     context = {
         'employee': employee,
         'attendance_summary': summary.items(),
         'start_date': start_date.strftime("%Y-%m-%d"), # স্ট্রিং হিসেবে পাঠানো হচ্ছে যাতে ফর্মে ভ্যালু থাকে
         'end_date': end_date.strftime("%Y-%m-%d"),
-        'total_work_duration': total_work_duration,
+        # লেট এডজাস্টমেন্ট সহ worked + Leave এর দিনে শিফট ক্রেডিট
+        'total_work_duration': days.total('worked'),
         
-        'approved_leave_count': status_values.count('Leave'),
-        'absent_days': status_values.count('Absent'),
-        'public_holiday_count': status_values.count('Public Holiday'),
-        'weekly_holiday_count': status_values.count('Holiday'),
+        'present_days': days.count(PRESENT),
+        'approved_leave_count': days.count(LEAVE),
+        'absent_days': days.count(ABSENT),
+        'public_holiday_count': days.count(HOLIDAY),
+        'weekly_holiday_count': days.count(WEEKLY_OFF),
         
         'total_leave_requests': leaves.count(),
     }
@@ -1347,7 +1064,7 @@ def employee_attendance_detail(request, employee_id):
 
 from dateutil import parser
 from collections import defaultdict, OrderedDict
-from datetime import datetime, timedelta, date, time as _time
+from datetime import datetime, timedelta, date
 from django.utils.timezone import make_aware, localtime, is_naive
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
@@ -1387,171 +1104,46 @@ def employee_attendance_pdf(request, employee_id):
         start_date = today.replace(day=1)
         end_date = today
 
-    # ৩. শিফট টাইম সেটআপ
-    dept = emp.department
-    exp_in = dept.in_time if dept and dept.in_time else _time(10, 30)
-    exp_out = dept.out_time if dept and dept.out_time else _time(20, 30)
-    
-    # শিফট ডিউরেশন
-    dummy = date.min
-    shift_dur = datetime.combine(dummy, exp_out) - datetime.combine(dummy, exp_in)
-    if shift_dur.total_seconds() < 0: shift_dur = timedelta(0)
-
-    # ৪. ডাটা লোডিং (Bulk)
-    # -- Attendance --
-    attendance_qs = Attendance.objects.filter(
-        employee=emp, timestamp__date__range=(start_date, end_date)
-    ).values('timestamp') # Values ব্যবহার করলে ফাস্ট হবে
-    
-    daily_punches = defaultdict(list)
-    for att in attendance_qs:
-        daily_punches[att['timestamp'].date()].append(att['timestamp'])
-
-    # -- Holidays --
-    holidays = Holiday.objects.filter(company=user_company, start_date__lte=end_date, end_date__gte=start_date)
-    holiday_dates = set()
-    for h in holidays:
-        curr = max(h.start_date, start_date)
-        lim = min(h.end_date, end_date)
-        while curr <= lim:
-            holiday_dates.add(curr)
-            curr += timedelta(days=1)
-
-    # -- Leaves --
-    leaves = LeaveRequest.objects.filter(employee=emp, status='Approved', start_date__lte=end_date, end_date__gte=start_date)
-    leave_dates = set()
-    for l in leaves:
-        curr = max(l.start_date, start_date)
-        lim = min(l.end_date, end_date)
-        while curr <= lim:
-            leave_dates.add(curr)
-            curr += timedelta(days=1)
-
-    # ৫. লুপ এবং ক্যালকুলেশন
-    summary_list = []
-    total_work = timedelta()
-    total_over = timedelta()
-    total_less = timedelta()
-    
-    counts = {'Present': 0, 'Absent': 0, 'Leave': 0, 'Holiday': 0, 'Weekly Off': 0}
-    off_day = dept.weekly_off_day if dept else None
-    cutoff_time = _time(14, 0)
-
-    curr_date = start_date
-    while curr_date <= end_date:
-        weekday = curr_date.strftime('%A')
-        punches = daily_punches.get(curr_date, [])
-        
-        status = "Absent"
-        in_time_val = None
-        out_time_val = None
-        daily_w = timedelta()
-        daily_o = timedelta()
-        daily_l = timedelta()
-
-        # Priority Logic: Present > Leave > Holiday > Off > Absent
-        if punches:
-            status = "Present"
-            counts['Present'] += 1
-            
-            # Sort & Timezone Localize
-            punches = sorted([localtime(p) for p in punches])
-            
-            # Logic: Before 14:00 is IN, After is OUT
-            before_14 = [p for p in punches if p.time() < cutoff_time]
-            after_14 = [p for p in punches if p.time() >= cutoff_time]
-
-            if before_14:
-                in_time_val = before_14[0]
-                out_time_val = after_14[-1] if after_14 else (before_14[-1] if len(before_14) > 1 else None)
-            else:
-                if len(after_14) > 1:
-                    in_time_val = after_14[0]
-                    out_time_val = after_14[-1]
-                else:
-                    out_time_val = after_14[0]
-
-            # Work Calculation
-            if in_time_val and out_time_val:
-                exp_in_dt = make_aware(datetime.combine(curr_date, exp_in)) if is_naive(datetime.combine(curr_date, exp_in)) else datetime.combine(curr_date, exp_in)
-                actual_start = max(in_time_val, exp_in_dt)
-                
-                if out_time_val > actual_start:
-                    daily_w = out_time_val - actual_start
-            
-            # 🟢 Overtime / Less Logic (UPDATED)
-            is_off_day = (off_day and weekday == off_day)
-            is_pub_holiday = (curr_date in holiday_dates)
-
-            if is_off_day or is_pub_holiday:
-                # ছুটির দিন বা সাপ্তাহিক বন্ধে আসলে পুরো কাজটাই ওভারটাইম
-                daily_o = daily_w
-                daily_l = timedelta(0) # ছুটির দিনে কোনো Less Time পেনাল্টি নেই
-                
-                # রিপোর্টে বোঝার সুবিধার জন্য স্ট্যাটাস পরিবর্তন
-                if is_off_day: 
-                    status = "Present (Weekly Off)"
-                else: 
-                    status = "Present (Holiday)"
-            else:
-                # রেগুলার কর্মদিবসের হিসাব
-                if daily_w > shift_dur:
-                    daily_o = daily_w - shift_dur
-                    daily_l = timedelta(0) # সেফটির জন্য যুক্ত করা হলো
-                else:
-                    daily_o = timedelta(0) # সেফটির জন্য যুক্ত করা হলো
-                    daily_l = shift_dur - daily_w
+    # ৩. দিন-ভিত্তিক হিসাব (utils.day_status, রিপোর্ট/পে-রোল এর সাথে একই নিয়ম)
+    _, day_map = build_day_status([emp], start_date, end_date)
+    days = day_map[emp.id]
 
-        elif curr_date in leave_dates:
-            status = "Leave" # or "On Leave"
-            counts['Leave'] += 1
-            daily_w = shift_dur # Full credit
+    holiday_present = {HOLIDAY: "Present (Holiday)", WEEKLY_OFF: "Present (Weekly Off)"}
 
-        elif curr_date in holiday_dates:
-            status = "Public Holiday"
-            counts['Holiday'] += 1
-        
-        elif off_day and weekday == off_day:
-            status = "Weekly Off"
-            counts['Weekly Off'] += 1
-        
-        else:
-            status = "Absent"
-            counts['Absent'] += 1
-            daily_l = shift_dur # Full penalty
-
-        # Totals
-        total_work += daily_w
-        total_over += daily_o
-        total_less += daily_l
+    # ৪. লুপ (শুধু ফরম্যাটিং)
+    summary_list = []
+    for day in days.days():
+        status = STATUS_LABELS[day['status']]
+        if day['status'] == PRESENT and day['day_type'] != WORKDAY:
+            # ছুটির দিনে আসলে পুরো কাজটাই ওভারটাইম; বোঝার সুবিধার জন্য স্ট্যাটাস
+            status = holiday_present[day['day_type']]
+        in_time_val, out_time_val = split_at_cutoff(day['row'])
 
         summary_list.append({
-            'date': curr_date,
-            'weekday': weekday,
+            'date': day['date'],
+            'weekday': day['date'].strftime('%A'),
             'status': status,
             'in_time': in_time_val.strftime('%I:%M %p') if in_time_val else "-",
             'out_time': out_time_val.strftime('%I:%M %p') if out_time_val else "-",
-            'work_time': format_timedelta(daily_w),
-            'over_time': format_timedelta(daily_o),
-            'less_time': format_timedelta(daily_l),
+            'work_time': format_timedelta(day['worked']),
+            'over_time': format_timedelta(day['overtime']),
+            'less_time': format_timedelta(day['less']),
         })
-        
-        curr_date += timedelta(days=1)
 
-    # ৬. পিডিএফ রেন্ডার
+    # ৫. পিডিএফ রেন্ডার
     context = {
         'employee': emp,
         'start_date': start_date,
         'end_date': end_date,
         'summary': summary_list,
         'stats': {
-            'present': counts['Present'],
-            'absent': counts['Absent'],
-            'leave': counts['Leave'],
-            'holiday': counts['Holiday'] + counts['Weekly Off'], # Holidays = Public + Weekly
-            'total_work': format_timedelta(total_work),
-            'total_over': format_timedelta(total_over),
-            'total_less': format_timedelta(total_less),
+            'present': days.count(PRESENT),
+            'absent': days.count(ABSENT),
+            'leave': days.count(LEAVE),
+            'holiday': days.count(HOLIDAY) + days.count(WEEKLY_OFF), # Holidays = Public + Weekly
+            'total_work': format_timedelta(days.total('worked')),
+            'total_over': format_timedelta(days.total('overtime')),
+            'total_less': format_timedelta(days.total('less')),
         },
         'company_name': user_company.name if user_company else "Attendance System"
     }
@@ -1572,7 +1164,7 @@ from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.utils.timezone import make_aware, localtime, is_naive
-from datetime import datetime, timedelta, date, time as _time
+from datetime import datetime, timedelta, date
 from collections import defaultdict
 from dateutil import parser  # pip install python-dateutil
 from weasyprint import HTML
@@ -1610,166 +1202,47 @@ def attendance_pdf_report(request, employee_id):
         start_date = today.replace(day=1)
         end_date = today
 
-    # ৩. শিফট ও লজিক সেটআপ
-    dept = emp.department
-    exp_in = dept.in_time if dept and dept.in_time else _time(10, 30)
-    exp_out = dept.out_time if dept and dept.out_time else _time(20, 30)
-    
-    dummy = date.min
-    shift_dur = datetime.combine(dummy, exp_out) - datetime.combine(dummy, exp_in)
-    if shift_dur.total_seconds() < 0: shift_dur = timedelta(0)
-
-    # ৪. বাল্ক ডাটা লোডিং (Performance Boost 🚀)
-    # -- Attendance --
-    attendance_qs = Attendance.objects.filter(
-        employee=emp, timestamp__date__range=(start_date, end_date)
-    ).values('timestamp') # values() ব্যবহার করলে মেমোরি কম লাগে
-    
-    daily_punches = defaultdict(list)
-    for att in attendance_qs:
-        daily_punches[att['timestamp'].date()].append(att['timestamp'])
-
-    # -- Holidays --
-    holidays = Holiday.objects.filter(company=user_company, start_date__lte=end_date, end_date__gte=start_date)
-    holiday_dates = set()
-    for h in holidays:
-        curr = max(h.start_date, start_date)
-        lim = min(h.end_date, end_date)
-        while curr <= lim:
-            holiday_dates.add(curr)
-            curr += timedelta(days=1)
-
-    # -- Leaves --
-    leaves = LeaveRequest.objects.filter(employee=emp, status='Approved', start_date__lte=end_date, end_date__gte=start_date)
-    leave_dates = set()
-    for l in leaves:
-        curr = max(l.start_date, start_date)
-        lim = min(l.end_date, end_date)
-        while curr <= lim:
-            leave_dates.add(curr)
-            curr += timedelta(days=1)
-
-    # ৫. মেইন প্রসেসিং লুপ
-    summary_list = []
-    total_work = timedelta()
-    total_over = timedelta()
-    total_less = timedelta()
-    
-    counts = {'Present': 0, 'Absent': 0, 'Leave': 0, 'Holiday': 0}
-    off_day = dept.weekly_off_day if dept else None
-    cutoff_time = _time(14, 0)
-
-    curr_date = start_date
-    while curr_date <= end_date:
-        weekday = curr_date.strftime('%A')
-        punches = daily_punches.get(curr_date, [])
-        
-        status = "Absent"
-        in_time_val = None
-        out_time_val = None
-        daily_w = timedelta()
-        daily_o = timedelta()
-        daily_l = timedelta()
-
-        # Priority: Present > Leave > Holiday > Off > Absent
-        if punches:
-            status = "Present"
-            counts['Present'] += 1
-            punches = sorted([localtime(p) for p in punches])
-            
-            # Logic: Before 14:00 -> IN, After 14:00 -> OUT
-            before_14 = [p for p in punches if p.time() < cutoff_time]
-            after_14 = [p for p in punches if p.time() >= cutoff_time]
-
-            if before_14:
-                in_time_val = before_14[0]
-                out_time_val = after_14[-1] if after_14 else (before_14[-1] if len(before_14) > 1 else None)
-            else:
-                if len(after_14) > 1:
-                    in_time_val = after_14[0]
-                    out_time_val = after_14[-1]
-                else:
-                    out_time_val = after_14[0]
-
-            # Work Calculation
-            if in_time_val and out_time_val:
-                exp_in_dt = make_aware(datetime.combine(curr_date, exp_in)) if is_naive(datetime.combine(curr_date, exp_in)) else datetime.combine(curr_date, exp_in)
-                actual_start = max(in_time_val, exp_in_dt)
-                
-                if out_time_val > actual_start:
-                    daily_w = out_time_val - actual_start
-            
-            # 🟢 Overtime / Less Logic (UPDATED)
-            is_off_day = (off_day and weekday == off_day)
-            is_pub_holiday = (curr_date in holiday_dates)
-
-            if is_off_day or is_pub_holiday:
-                # ছুটির দিন বা সাপ্তাহিক বন্ধে আসলে পুরো কাজটাই ওভারটাইম
-                daily_o = daily_w
-                daily_l = timedelta(0) # ছুটির দিনে কোনো Less Time পেনাল্টি নেই
-                
-                # রিপোর্টে বোঝার সুবিধার জন্য স্ট্যাটাস পরিবর্তন
-                if is_off_day: 
-                    status = "Present (Weekly Off)"
-                else: 
-                    status = "Present (Holiday)"
-            else:
-                # রেগুলার কর্মদিবসের হিসাব
-                if daily_w > shift_dur:
-                    daily_o = daily_w - shift_dur
-                    daily_l = timedelta(0) # সেফটির জন্য যুক্ত করা হলো
-                else:
-                    daily_o = timedelta(0) # সেফটির জন্য যুক্ত করা হলো
-                    daily_l = shift_dur - daily_w
-
-        elif curr_date in leave_dates:
-            status = "On Leave"
-            counts['Leave'] += 1
-            daily_w = shift_dur # Full Credit
+    # ৩. দিন-ভিত্তিক হিসাব (utils.day_status)
+    _, day_map = build_day_status([emp], start_date, end_date)
+    days = day_map[emp.id]
 
-        elif curr_date in holiday_dates:
-            status = "Holiday"
-            counts['Holiday'] += 1
-        
-        elif off_day and weekday == off_day:
-            status = "Weekly Off"
-            counts['Holiday'] += 1
-        
-        else:
-            status = "Absent"
-            counts['Absent'] += 1
-            daily_l = shift_dur # Full Penalty
+    # এই রিপোর্টের নিজস্ব লেবেল
+    labels = {**STATUS_LABELS, LEAVE: "On Leave", HOLIDAY: "Holiday"}
+    holiday_present = {HOLIDAY: "Present (Holiday)", WEEKLY_OFF: "Present (Weekly Off)"}
 
-        total_work += daily_w
-        total_over += daily_o
-        total_less += daily_l
+    # ৪. মেইন লুপ (শুধু ফরম্যাটিং)
+    summary_list = []
+    for day in days.days():
+        status = labels[day['status']]
+        if day['status'] == PRESENT and day['day_type'] != WORKDAY:
+            status = holiday_present[day['day_type']]
+        in_time_val, out_time_val = split_at_cutoff(day['row'])
 
         summary_list.append({
-            'date': curr_date,
-            'weekday': weekday,
+            'date': day['date'],
+            'weekday': day['date'].strftime('%A'),
             'status': status,
             'in_time': in_time_val.strftime('%I:%M %p') if in_time_val else "-",
             'out_time': out_time_val.strftime('%I:%M %p') if out_time_val else "-",
-            'work_time': format_timedelta(daily_w),
-            'over_time': format_timedelta(daily_o),
-            'less_time': format_timedelta(daily_l),
+            'work_time': format_timedelta(day['worked']),
+            'over_time': format_timedelta(day['overtime']),
+            'less_time': format_timedelta(day['less']),
         })
-        curr_date += timedelta(days=1)
 
-    # ৬. PDF রেন্ডারিং (WeasyPrint)
+    # ৫. PDF রেন্ডারিং (WeasyPrint)
     context = {
         'employee': emp,
         'start_date': start_date,
         'end_date': end_date,
         'summary': summary_list,
         'stats': {
-            'present': counts['Present'],
-            'absent': counts['Absent'],
-            'leave': counts['Leave'],
-            'holiday': counts['Holiday'],
-            'total_work': format_timedelta(total_work),
-            'total_over': format_timedelta(total_over),
-            'total_less': format_timedelta(total_less),
+            'present': days.count(PRESENT),
+            'absent': days.count(ABSENT),
+            'leave': days.count(LEAVE),
+            'holiday': days.count(HOLIDAY) + days.count(WEEKLY_OFF),
+            'total_work': format_timedelta(days.total('worked')),
+            'total_over': format_timedelta(days.total('overtime')),
+            'total_less': format_timedelta(days.total('less')),
         },
         'company_name': user_company.name if user_company else "Attendance System",
         # লোগোর জন্য ফুল পাথ জরুরি
@@ -1958,11 +1431,17 @@ def leave_summary(request):
 
 @login_required
 def leave_summary_pdf(request):
-    """ PDF View: Uses same helper function """
+    """ PDF View: Uses same helper function (রেন্ডার ব্যাকগ্রাউন্ডে) """
+    if not getattr(request.user.profile, 'company', None):
+        return HttpResponseForbidden('User has no company assigned.')
+    return pdf_response(request, 'leave_summary')
+
+
+def render_leave_summary_pdf(request):
     context = get_leave_summary_data(request.user, request.GET)
     
     if 'error' in context:
-        return HttpResponseForbidden(context['error'])
+        raise PermissionError(context['error'])
 
     # Add absolute URI for images in PDF
     context['logo_url'] = request.build_absolute_uri('/static/images/logo.png')
@@ -1970,14 +1449,10 @@ def leave_summary_pdf(request):
     html_string = render_to_string('leave_summary_pdf.html', context)
 
     if HTML is None:
-        return HttpResponse("WeasyPrint not installed. Showing HTML version.<br>" + html_string)
+        raise RuntimeError("WeasyPrint not installed.")
 
     pdf = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
-    
-    filename = f"Leave_Summary_{date.today()}.pdf"
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
+    return pdf, f"Leave_Summary_{date.today()}.pdf"
 
 
 @login_required
@@ -2154,5 +1629,24 @@ def support_success(request):
     return render(request, 'support_success.html', {'ticket_id': ticket_id, 'message': message})
 
 
+# ---------------- Background PDF jobs ----------------
+@login_required
+def pdf_job_status(request, job_id):
+    """PDF জবের অবস্থা (JSON); ?download=1 দিলে তৈরি ফাইল।"""
+    job = get_object_or_404(PdfJob, pk=job_id)
+    if not can_view_job(request.user, job):
+        return HttpResponseForbidden("এই রিপোর্ট দেখার অনুমতি নেই।")
+
+    if request.GET.get('download') and job.status == PdfJob.DONE and job.file:
+        return serve_job_file(job)
+    return JsonResponse({
+        'job_id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'error': job.error,
+        'download_url': f"{request.path}?download=1" if job.status == PdfJob.DONE else None,
+    })
+
+
 def custom_404_view(request,exception):
     return render(request, '404.html', status=504)
\ No newline at end of file
@@ -1,10 +1,21 @@
 # attendance_project/middleware.py
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+
 from django.conf import settings
+from django.db import connections
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import reverse, resolve, Resolver404
 from django.utils.deprecation import MiddlewareMixin
 
+from subscription_app.utils import get_subscription_state
+
 # সবসময়ই যেগুলো চলতে দিতে হবে (public)
 ALWAYS_ALLOWED_URL_NAMES = {
     "login", "logout", "my_plans",
@@ -23,8 +34,9 @@ ALWAYS_ALLOWED_URL_NAMES = {
     "success",
     "cancel",
     "payment_details",             # e.g., bkash callback
+    "request_metrics",             # staff এর মেট্রিক্স (নিজেই চেক করে)
 }
-ALWAYS_ALLOWED_PREFIXES = ("/static/", "/media/", "/favicon.ico", "/robots.txt", "/api/webhooks/")
+ALWAYS_ALLOWED_PREFIXES = ("/static/", "/media/", "/favicon.ico", "/robots.txt", "/api/webhooks/", "/iclock/")
 
 # সাবস্ক্রিপশন EXPIRED হলে কেবল এগুলো চলবে (renew/pay/expired/display)
 EXPIRED_ALLOWED_URL_NAMES = {
@@ -76,9 +88,8 @@ class SubscriptionExpiryMiddleware(MiddlewareMixin):
             return None
 
         # 4) কোম্পানি/সাবস্ক্রিপশন স্টেট
-        company = getattr(request, "current_company", None) or getattr(user, "company", None)
-        sub = getattr(company, "subscription", None) if company else None
-        is_expired = bool(getattr(sub, "is_expired", False))
+        # (subscription_app.utils: একবার হিসাব হয়ে request এ থাকে, decorator/ভিউ আবার কোয়েরি করে না)
+        is_expired = get_subscription_state(request).company_expired
 
         if not is_expired:
             return None  # সক্রিয় সাবস্ক্রিপশন → পাস
@@ -104,3 +115,191 @@ class SubscriptionExpiryMiddleware(MiddlewareMixin):
             return redirect(expired_url)
 
         return None
+
+
+# ---------------------------------------------------------
+# রিকোয়েস্ট মেট্রিক্স (অপশনাল): view প্রতি SQL কাউন্ট/সময়, মোট সময়, মেমোরি peak
+# ---------------------------------------------------------
+metrics_logger = logging.getLogger("attendance_project.metrics")
+
+
+class BudgetExceeded(AssertionError):
+    """REQUEST_METRICS_STRICT = True থাকলে বাজেট পার হলে (টেস্ট ফেইল করানোর জন্য)।"""
+
+
+class _QueryTimer:
+    """connection.execute_wrapper: কোয়েরি সংখ্যা আর মোট সময় (DEBUG ছাড়াও কাজ করে)।"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsStore:
+    """প্রসেস প্রতি (worker প্রতি) view ধরে জমানো মেট্রিক্স; /metrics/requests/ এ দেখায়।"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, record):
+        with self._lock:
+            stats = self._views.setdefault(record["view"], {
+                "requests": 0, "queries_total": 0, "queries_max": 0,
+                "sql_ms_total": 0.0, "total_ms_total": 0.0, "total_ms_max": 0.0,
+                "peak_kb_max": None, "over_budget": 0,
+            })
+            stats["requests"] += 1
+            stats["queries_total"] += record["queries"]
+            stats["queries_max"] = max(stats["queries_max"], record["queries"])
+            stats["sql_ms_total"] += record["sql_ms"]
+            stats["total_ms_total"] += record["total_ms"]
+            stats["total_ms_max"] = max(stats["total_ms_max"], record["total_ms"])
+            if record["peak_kb"] is not None:
+                stats["peak_kb_max"] = max(stats["peak_kb_max"] or 0, record["peak_kb"])
+            stats["over_budget"] += bool(record.get("over_budget"))
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for view, stats in self._views.items():
+                n = stats["requests"]
+                result[view] = {
+                    **stats,
+                    "queries_avg": round(stats["queries_total"] / n, 2),
+                    "sql_ms_avg": round(stats["sql_ms_total"] / n, 2),
+                    "total_ms_avg": round(stats["total_ms_total"] / n, 2),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_metrics = MetricsStore()
+
+
+class _SharedTracemalloc:
+    """
+    tracemalloc প্রসেস-ওয়াইড, অথচ threaded worker এ একসাথে কয়েকটা রিকোয়েস্ট চলে: একজনের stop()
+    বা reset_peak() অন্যের মাপ নষ্ট করত। তাই refcount + lock: প্রথম রিকোয়েস্ট start করে, শেষটা stop;
+    reset_peak শুধু যখন আর কেউ মাপছে না। একসাথে চলা রিকোয়েস্টের peak তাই ওই সময়ের পুরো প্রসেসের
+    peak (উপরের সীমা); একা চললে ঠিক ওই রিকোয়েস্টের।
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started = False
+
+    def enter(self):
+        with self._lock:
+            if self._active == 0:
+                if tracemalloc.is_tracing():
+                    tracemalloc.reset_peak()  # অন্য কেউ (যেমন -X tracemalloc) চালু রেখেছে
+                else:
+                    tracemalloc.start()
+                    self._started = True
+            self._active += 1
+
+    def exit(self):
+        """এই রিকোয়েস্টের peak (KB)।"""
+        with self._lock:
+            peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+            self._active -= 1
+            if self._active == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+            return peak_kb
+
+
+shared_tracemalloc = _SharedTracemalloc()
+
+
+def _over_budget(record, budget):
+    """বাজেটের যে লিমিটগুলো পার হলো: {'queries': (মাপা, লিমিট), ...}।"""
+    return {key: (record[key], limit) for key, limit in budget.items()
+            if record.get(key) is not None and record[key] > limit}
+
+
+class RequestMetricsMiddleware:
+    """
+    প্রতি রিকোয়েস্টে SQL কাউন্ট, SQL সময়, মোট সময় আর (REQUEST_METRICS_TRACEMALLOC হলে)
+    Python মেমোরি peak মাপে; resolved view_name (যেমন attendance_app:dashboard) ধরে এক লাইনের
+    JSON লগ (attendance_project.metrics) আর request_metrics এ জমা।
+
+    REQUEST_METRICS_BUDGETS = {'attendance_app:monthly_work_time_report': {'queries': 10, 'total_ms': 800}}
+    বাজেট পার হলে warning লগ; REQUEST_METRICS_STRICT = True হলে BudgetExceeded (টেস্টে ফেইল)।
+    স্ট্রিমিং রেসপন্সের ক্ষেত্রে শুধু রেসপন্স ফেরত দেওয়া পর্যন্ত মাপা হয়।
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = getattr(settings, "REQUEST_METRICS_TRACEMALLOC", False)
+        if trace:
+            shared_tracemalloc.enter()
+
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        peak_kb = None
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timer))
+                response = self.get_response(request)
+            total = time.perf_counter() - started
+        finally:
+            if trace:
+                peak_kb = shared_tracemalloc.exit()
+
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "view": match.view_name if match else None,
+            "path": request.path,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": timer.count,
+            "sql_ms": round(timer.seconds * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "peak_kb": peak_kb,
+            "streaming": response.streaming,
+        }
+        if record["view"] is None:
+            return response  # 404 বা resolve হয়নি
+
+        budgets = getattr(settings, "REQUEST_METRICS_BUDGETS", {})
+        budget = budgets.get(match.view_name) or budgets.get(match.url_name)
+        exceeded = _over_budget(record, budget) if budget else {}
+        record["over_budget"] = sorted(exceeded)
+        request_metrics.add(record)
+
+        if exceeded:
+            message = f"{record['view']} over budget: " + ", ".join(
+                f"{key} {value} > {limit}" for key, (value, limit) in exceeded.items())
+            metrics_logger.warning(json.dumps({**record, "message": message}))
+            if getattr(settings, "REQUEST_METRICS_STRICT", False):
+                raise BudgetExceeded(message)
+        else:
+            metrics_logger.info(json.dumps(record))
+        return response
+
+
+def request_metrics_view(request):
+    """জমানো মেট্রিক্স JSON এ (শুধু staff); ?reset=1 দিলে পড়ার পরে মুছে যায়।"""
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({"detail": "Staff only"}, status=403)
+    data = {"pid": os.getpid(), "views": request_metrics.snapshot()}
+    if request.GET.get("reset"):
+        request_metrics.reset()
+    return JsonResponse(data)
@@ -67,6 +67,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # in-memory টেস্ট DB তে থ্রেডগুলো busy-wait না করে "table is locked" দেয়;
+        # ফাইল হলে প্যারালাল সিঙ্ক টেস্ট প্রোডাকশনের মতো লক নেয়
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'tmp', 'test_db.sqlite3')},
     }
 }
 
@@ -135,6 +138,46 @@ LOGIN_REDIRECT_URL = "post_login_router"
 
 SUBSCRIPTION_SUPERUSER_BYPASS = False
 
+# শেয়ার্ড ক্যাশ: Passenger এর সব worker আর ব্যাকগ্রাউন্ড কমান্ড একই ক্যাশ দেখে (ডাটা version, রিপোর্ট ক্যাশ)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'tmp', 'django_cache'),
+    }
+}
+
+# True: push API (api/zkteco/push/) payload queue তে রেখে সাথে সাথে 202 দেয়, drain_push_queue কমান্ড
+# DB তে তোলে (accepted/duplicates/unknown কাউন্ট ওর আউটপুটে)। False: রিকোয়েস্টের ভেতরেই সেভ, রেসপন্সে কাউন্ট।
+ATTENDANCE_PUSH_QUEUE = True
+
+# True হলে PDF জব রিকোয়েস্টের ভেতরেই রেন্ডার হয় (render_pdf_jobs ওয়ার্কার ছাড়া চালাতে)
+PDF_JOBS_INLINE = False
+# রেন্ডার হওয়া PDF (বেতনসহ রিপোর্ট) পাবলিক MEDIA_ROOT এর বাইরে; শুধু pdf_job_status দিয়ে সার্ভ হয়
+PDF_JOBS_ROOT = os.path.join(BASE_DIR, 'private')
+
+# ইউজারের সাবস্ক্রিপশন স্টেট কত সেকেন্ড ক্যাশে থাকবে (পেমেন্ট/অ্যাডমিন এডিটে সাথে সাথে বাতিল হয়)
+SUBSCRIPTION_CACHE_TTL = 60
+
+# ড্যাশবোর্ড লাইভ আপডেট (SSE long-poll): এক রিকোয়েস্ট সর্বোচ্চ কত সেকেন্ড অপেক্ষা করবে, তার মধ্যে কত সেকেন্ড পরপর DB দেখবে
+DASHBOARD_STREAM_SECONDS = 25
+DASHBOARD_STREAM_POLL = 5
+
+# রিকোয়েস্ট মেট্রিক্স (অপশনাল): REQUEST_METRICS=1 এনভায়রনমেন্টে দিলে middleware চালু হয়।
+# view প্রতি SQL কাউন্ট/সময়, মোট সময় লগে (attendance_project.metrics) আর /metrics/requests/ এ (staff)।
+if os.environ.get('REQUEST_METRICS') == '1':
+    MIDDLEWARE.insert(0, 'attendance_project.middleware.RequestMetricsMiddleware')
+# মেমোরি peak ও মাপবে (tracemalloc, ধীর; শুধু ডেভ/বেঞ্চে)
+REQUEST_METRICS_TRACEMALLOC = False
+# view_name (বা url_name) -> {'queries', 'sql_ms', 'total_ms', 'peak_kb'} লিমিট; পার হলে warning লগ
+REQUEST_METRICS_BUDGETS = {
+    'attendance_app:dashboard': {'queries': 20},
+    'attendance_app:monthly_work_time_report': {'queries': 12},
+    'attendance_app:attendance_list': {'queries': 15},
+    'payroll:salary_summary_list': {'queries': 15},
+}
+# True হলে বাজেট পার হলে BudgetExceeded (টেস্টে রিগ্রেশন ধরার জন্য)
+REQUEST_METRICS_STRICT = False
+
 CKEDITOR_UPLOAD_PATH = "uploads/"
 CKEDITOR_IMAGE_BACKEND = "pillow"
 CKEDITOR_ALLOW_NONIMAGE_FILES = False
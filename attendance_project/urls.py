@@ -11,6 +11,7 @@ from attendance_app import views
 
 from decorator_include import decorator_include
 from subscription_app.decorators import subscription_required
+from attendance_project.middleware import request_metrics_view
 
 urlpatterns = [
     # EXEMPT / PUBLIC
@@ -18,9 +19,15 @@ urlpatterns = [
     re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
 
     path('admin/', admin.site.urls),
+    path('metrics/requests/', request_metrics_view, name='request_metrics'),
     path('subscription/', include(('subscription_app.urls', 'subscription_app'), namespace='subscription_app')),
     path('', include(('payment_app.urls', 'payment_app'), namespace='payment_app')),  # ✅ গার্ড ছাড়া, নিজস্ব প্রিফিক্স
 
+    # ZKTeco ADMS push (ডিভাইস নিজে কল করে, লগইন/সাবস্ক্রিপশন গার্ড ছাড়া)
+    path('iclock/cdata', views.iclock_cdata, name='iclock_cdata'),
+    path('iclock/getrequest', views.iclock_getrequest, name='iclock_getrequest'),
+    path('iclock/devicecmd', views.iclock_devicecmd, name='iclock_devicecmd'),
+
     # PROTECTED
     path("", decorator_include(subscription_required, ("attendance_app.urls", "attendance_app"))),
     path('', decorator_include(subscription_required, ('userapp.urls', 'userapp'))),
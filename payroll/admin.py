@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmployeeSalary, SalarySummary
+from .models import EmployeeSalary, SalarySummary, PayrollMonth
 from .forms import EmployeeSalaryForm
 @admin.register(EmployeeSalary)
 class EmployeeSalaryAdmin(admin.ModelAdmin):
@@ -20,3 +20,10 @@ class SalarySummaryAdmin(admin.ModelAdmin):
     search_fields = ('employee__name', 'month')
     date_hierarchy = 'generated_on'
     list_select_related = ('employee',)
+
+
+@admin.register(PayrollMonth)
+class PayrollMonthAdmin(admin.ModelAdmin):
+    list_display = ('company', 'month', 'closed_at', 'closed_by')
+    list_filter = ('company',)
+    search_fields = ('month',)
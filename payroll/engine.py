@@ -0,0 +1,122 @@
+"""
+পে-রোল হিসাব: employees × days।
+
+attendance_app.utils.day_status এর per-day array গুলো (status, day_type, late/worked/overtime সেকেন্ড)
+থেকে মাসের টোটাল আর earned salary বের করে। numpy থাকলে সব employee এক সাথে matrix এ
+(vectorized), না থাকলে প্রতি employee এর array এর উপর pure Python; দুটোর ফলাফল হুবহু এক।
+টাকার হিসাব float এ, Decimal শুধু শেষে পয়সা পর্যন্ত রাউন্ড করার সময়।
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from attendance_app.utils.day_status import PRESENT, HOLIDAY, WEEKLY_OFF, LEAVE, ABSENT, WORKDAY
+
+try:
+    import numpy as np
+except ImportError:  # requirements.txt এ আছে; পুরনো ইনস্টলে না থাকলে pure Python ব্যাকএন্ড
+    np = None
+
+OVERTIME_RATE = 1.5
+CENT = Decimal('0.01')
+
+
+def _to_money(value):
+    return Decimal(repr(float(value))).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _earned(base, expected_seconds, work_seconds):
+    """expected পর্যন্ত ঘণ্টা প্রতি রেট, তার বেশি হলে ১.৫ গুণ।"""
+    expected_hours = expected_seconds / 3600
+    actual_hours = work_seconds / 3600
+    rate = base / expected_hours if expected_hours > 0 else 0.0
+    if actual_hours <= expected_hours:
+        return actual_hours * rate
+    return expected_hours * rate + (actual_hours - expected_hours) * rate * OVERTIME_RATE
+
+
+def _python_figures(day_map, base_salaries):
+    result = {}
+    for emp_id, base in base_salaries.items():
+        days = day_map[emp_id]
+        working_days = days.working_days
+        expected_seconds = working_days * int(days.shift.total_seconds())
+        work_seconds = sum(days.worked)
+        result[emp_id] = {
+            'present_days': days.count(PRESENT),
+            'leave_days': days.count(LEAVE),
+            'absent_days': days.count(ABSENT),
+            'weekly_off_days': days.day_type.count(WEEKLY_OFF),
+            'holiday_days': days.day_type.count(HOLIDAY),
+            'working_days': working_days,
+            'expected_seconds': expected_seconds,
+            'work_seconds': work_seconds,
+            'late_seconds': sum(days.late),
+            'over_seconds': sum(days.overtime),
+            'less_seconds': sum(days.less),
+            'earned_salary': _to_money(_earned(float(base), expected_seconds, work_seconds)),
+        }
+    return result
+
+
+def _numpy_figures(day_map, base_salaries):
+    emp_ids = list(base_salaries)
+    if not emp_ids:
+        return {}
+    rows = [day_map[emp_id] for emp_id in emp_ids]
+    shape = (len(rows), len(rows[0].dates))
+
+    # প্রতি employee এর bytearray/array('q') জোড়া লাগিয়ে একটা matrix (employees × days)
+    def matrix(field, dtype):
+        return np.frombuffer(b''.join(bytes(getattr(r, field)) for r in rows), dtype=dtype).reshape(shape)
+
+    status = matrix('status', np.uint8)
+    day_type = matrix('day_type', np.uint8)
+    work = matrix('worked', np.int64).sum(axis=1)
+    late = matrix('late', np.int64).sum(axis=1)
+    over = matrix('overtime', np.int64).sum(axis=1)
+    less = matrix('less', np.int64).sum(axis=1)
+
+    working_days = (day_type == WORKDAY).sum(axis=1)
+    shift = np.array([int(r.shift.total_seconds()) for r in rows], dtype=np.int64)
+    expected = working_days * shift
+
+    base = np.array([float(base_salaries[emp_id]) for emp_id in emp_ids], dtype=np.float64)
+    expected_hours = expected / 3600
+    actual_hours = work / 3600
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(expected_hours > 0, base / expected_hours, 0.0)
+    earned = np.where(actual_hours <= expected_hours,
+                      actual_hours * rate,
+                      expected_hours * rate + (actual_hours - expected_hours) * rate * OVERTIME_RATE)
+
+    counts = {name: (status == code).sum(axis=1) for name, code in
+              (('present_days', PRESENT), ('leave_days', LEAVE), ('absent_days', ABSENT))}
+    counts['weekly_off_days'] = (day_type == WEEKLY_OFF).sum(axis=1)
+    counts['holiday_days'] = (day_type == HOLIDAY).sum(axis=1)
+
+    result = {}
+    for i, emp_id in enumerate(emp_ids):
+        figures = {name: int(values[i]) for name, values in counts.items()}
+        figures.update({
+            'working_days': int(working_days[i]),
+            'expected_seconds': int(expected[i]),
+            'work_seconds': int(work[i]),
+            'late_seconds': int(late[i]),
+            'over_seconds': int(over[i]),
+            'less_seconds': int(less[i]),
+            'earned_salary': _to_money(earned[i]),
+        })
+        result[emp_id] = figures
+    return result
+
+
+def payroll_figures(day_map, base_salaries, use_numpy=None):
+    """
+    day_map: build_day_status এর {employee_id: EmployeeDays}
+    base_salaries: {employee_id: Decimal} (যাদের হিসাব লাগবে শুধু তারা)
+    Returns: {employee_id: dict} — দিন গণনা, সেকেন্ডে টোটাল আর earned_salary (Decimal)।
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _numpy_figures(day_map, base_salaries)
+    return _python_figures(day_map, base_salaries)
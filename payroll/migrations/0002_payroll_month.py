@@ -0,0 +1,79 @@
+# Generated by Django 4.2.27 on 2026-10-18 03:18
+
+import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance_app', '0009_attendance_local_date_not_null'),
+        ('payroll', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=7)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='bank_transfer_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='bonus_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='earned_salary',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='expected_work_hours',
+            field=models.DurationField(default=datetime.timedelta),
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='holiday_days',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='salarysummary',
+            name='payable_cash',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddIndex(
+            model_name='salarysummary',
+            index=models.Index(fields=['company', 'month'], name='payroll_sal_company_2791c2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='salarysummary',
+            constraint=models.UniqueConstraint(fields=('employee', 'month'), name='uniq_salary_summary_employee_month'),
+        ),
+        migrations.AddField(
+            model_name='payrollmonth',
+            name='closed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='payrollmonth',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_months', to='attendance_app.company'),
+        ),
+        migrations.AddConstraint(
+            model_name='payrollmonth',
+            constraint=models.UniqueConstraint(fields=('company', 'month'), name='uniq_payroll_month'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 # payroll/models.py
 from django.db import models
+from django.contrib.auth.models import User
 from attendance_app.models import Employee
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 from decimal import Decimal
 from django.db import models
@@ -69,17 +70,49 @@ class SalarySummary(models.Model):
     company = models.ForeignKey('attendance_app.Company', on_delete=models.CASCADE, default='')  # নতুন field
     month = models.CharField(max_length=7)  # Format: YYYY-MM
     base_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    bank_transfer_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     present_days = models.IntegerField()
     absent_days = models.IntegerField()
     leave_days = models.IntegerField()
     weekly_off_days = models.IntegerField()
+    holiday_days = models.IntegerField(default=0)
+    expected_work_hours = models.DurationField(default=timedelta)
     total_work_hours = models.DurationField()
     late_time = models.DurationField()
     early_leave_time = models.DurationField()
     over_time = models.DurationField()
+    earned_salary = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    bonus_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     final_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    payable_cash = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     generated_on = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'month'], name='uniq_salary_summary_employee_month'),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'month']),
+        ]
+
     def __str__(self):
         return f"{self.employee.name} - {self.month}"
 
+
+class PayrollMonth(models.Model):
+    """
+    Close করা পে-রোল মাস। close এর সময় মাসের হিসাব একবার SalarySummary তে লেখা হয়,
+    তারপর summary/PDF সেখান থেকেই পড়ে; reopen করলে রো মুছে আবার লাইভ হিসাব।
+    """
+    company = models.ForeignKey('attendance_app.Company', on_delete=models.CASCADE, related_name='payroll_months')
+    month = models.CharField(max_length=7)  # Format: YYYY-MM
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'month'], name='uniq_payroll_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.company} - {self.month} (closed)"
@@ -1,3 +1,143 @@
-from django.test import TestCase
+import csv
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.timezone import make_aware
+
+from attendance_app.models import Attendance, Company, Department, Employee, Holiday, LeaveRequest, UserProfile
+from attendance_app.utils.ingest import ingest_punches
+from attendance_app.utils.day_status import build_day_status
+from payroll import engine
+from payroll.models import EmployeeSalary, PayrollMonth, SalarySummary
+from payroll.views import (close_payroll_month, export_salary_summary, get_salary_summary_data,
+                           reopen_payroll_month)
+
+
+def _at(day, hour, minute=0):
+    return make_aware(datetime.combine(day, time(hour, minute)))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SalarySummaryTests(TestCase):
+    """নভেম্বর ২০২৫ এর ফিক্সচার: ৪টা শুক্রবার অফ + ২০ তারিখ ছুটি, শিফট ০৯:০০-১৭:০০।"""
+
+    def setUp(self):
+        # ক্যালেন্ডার ক্যাশ commit এর পরে মোছে; TestCase এ commit হয় না, আগের টেস্টের (একই company id) ক্যাশ বাদ
+        cache.clear()
+        self.company = Company.objects.create(name="Acme")
+        dept = Department.objects.create(company=self.company, name="HQ", weekly_off_day='Friday',
+                                         in_time=time(9, 0), out_time=time(17, 0))
+        self.user = User.objects.create_user("boss")
+        UserProfile.objects.create(user=self.user, company=self.company)
+
+        self.part = Employee.objects.create(company=self.company, department=dept, name="Part", device_user_id=1)
+        self.full = Employee.objects.create(company=self.company, department=dept, name="Full", device_user_id=2)
+        EmployeeSalary.objects.create(employee=self.part, base_salary=Decimal('31234.56'))
+        EmployeeSalary.objects.create(employee=self.full, base_salary=Decimal('45000'),
+                                      bank_transfer_amount=Decimal('20000'))
+
+        Holiday.objects.create(company=self.company, title="Holiday",
+                               start_date=date(2025, 11, 20), end_date=date(2025, 11, 20))
+        LeaveRequest.objects.create(company=self.company, employee=self.part, leave_type='Casual',
+                                    start_date=date(2025, 11, 10), end_date=date(2025, 11, 11),
+                                    status='Approved')
+
+        punches = [
+            ('1', _at(date(2025, 11, 3), 9, 15)), ('1', _at(date(2025, 11, 3), 18)),
+            ('1', _at(date(2025, 11, 4), 9)), ('1', _at(date(2025, 11, 4), 17)),
+            ('1', _at(date(2025, 11, 7), 10)), ('1', _at(date(2025, 11, 7), 14)),   # Friday
+            ('1', _at(date(2025, 11, 20), 9)), ('1', _at(date(2025, 11, 20), 13)),  # Holiday
+        ]
+        for n in range(30):
+            day = date(2025, 11, 1) + timedelta(days=n)
+            if day.weekday() != 4 and day.day != 20:
+                punches += [('2', _at(day, 8)), ('2', _at(day, 19))]
+        ingest_punches(self.company, punches)
+
+    def _summary(self):
+        request = RequestFactory().get('/summary/')
+        request.user = self.user
+        data = get_salary_summary_data(request, '2025-11')
+        return data, {row['employee'].id: row for row in data['summaries']}
+
+    def test_fixture_month_figures(self):
+        data, rows = self._summary()
+        part, full = rows[self.part.id], rows[self.full.id]
+
+        for field, expected in (('present_days', 4), ('leave_days', 2), ('absent_days', 21),
+                                ('weekly_off_days', 4), ('holiday_days', 1),
+                                ('late_time', '00:15'), ('over_time', '08:45'),
+                                ('expected_hours', '200:00'), ('total_work_hours', '40:45'),
+                                ('time_difference_str', '-159:15')):
+            self.assertEqual(part[field], expected, field)
+        for field, expected in (('present_days', 25), ('absent_days', 0), ('over_time', '50:00'),
+                                ('total_work_hours', '250:00'), ('time_difference_str', '+50:00')):
+            self.assertEqual(full[field], expected, field)
+
+        # আগের Decimal পাথের ফিগার (6364.0416, 61875) পয়সা পর্যন্ত
+        self.assertEqual(part['earned_salary'], Decimal('6364.04'))
+        self.assertEqual(full['earned_salary'], Decimal('61875.00'))
+        self.assertEqual(full['payable_cash'], Decimal('41875.00'))
+        self.assertEqual(data['total_final_salary'], Decimal('68239.04'))
+
+    @skipUnless(engine.np is not None, "numpy not installed")
+    def test_numpy_backend_matches_python(self):
+        employees = Employee.objects.select_related('department', 'employeesalary').order_by('id')
+        _, day_map = build_day_status(employees, date(2025, 11, 1), date(2025, 11, 30))
+        bases = {emp.id: emp.employeesalary.base_salary for emp in employees}
+
+        self.assertEqual(engine.payroll_figures(day_map, bases, use_numpy=True),
+                         engine.payroll_figures(day_map, bases, use_numpy=False))
+
+    def _post(self, view):
+        request = RequestFactory().post('/summary/close/', {'month': '2025-11'})
+        request.user = self.user
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return view(request)
+
+    def test_closed_month_is_served_from_salary_summary(self):
+        _, live = self._summary()
+        self.assertEqual(self._post(close_payroll_month).status_code, 302)
+        self.assertTrue(PayrollMonth.objects.filter(company=self.company, month='2025-11').exists())
+        self.assertEqual(SalarySummary.objects.filter(month='2025-11').count(), 2)
+
+        # close এর পর attendance বদলালেও ফিগার বদলাবে না
+        Attendance.objects.filter(employee=self.full).delete()
+        with self.assertNumQueries(2):
+            data, stored = self._summary()
+        for emp_id, row in live.items():
+            for key, value in row.items():
+                if key not in ('employee', 'figures'):
+                    self.assertEqual(stored[emp_id][key], value, key)
+        self.assertEqual(data['payroll_month'].month, '2025-11')
+
+        # আবার close করলে ডুপ্লিকেট রো হয় না
+        self._post(close_payroll_month)
+        self.assertEqual(SalarySummary.objects.filter(month='2025-11').count(), 2)
+
+        self._post(reopen_payroll_month)
+        self.assertFalse(SalarySummary.objects.filter(month='2025-11').exists())
+        data, rows = self._summary()
+        self.assertIsNone(data['payroll_month'])
+        self.assertEqual(rows[self.full.id]['present_days'], 0)
+
+    def test_csv_export_matches_summary(self):
+        _, rows = self._summary()
+        request = RequestFactory().get('/salary-summary/export/', {'month': '2025-11', 'format': 'csv'})
+        request.user = self.user
+        response = export_salary_summary(request)
+        lines = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+        self.assertEqual(len(lines), 3)
+        exported = {line[1]: dict(zip(lines[0], line)) for line in lines[1:]}
+        self.assertEqual(exported['Part']['Earned'], str(rows[self.part.id]['earned_salary']))
+        self.assertEqual(exported['Full']['Payable Cash'], '41875.00')
+        self.assertEqual(exported['Part']['Difference'], '-159:15')
@@ -8,5 +8,8 @@ urlpatterns = [
     path('summary/', views.salary_summary_list, name='salary_summary_list'),
     path('add-summary/', views.set_base_salaries, name='add_salary'),
     path('salary-summary/pdf/', views.export_salary_summary_pdf, name='salary_summary_pdf'),
+    path('salary-summary/export/', views.export_salary_summary, name='salary_summary_export'),
+    path('summary/close/', views.close_payroll_month, name='close_payroll_month'),
+    path('summary/reopen/', views.reopen_payroll_month, name='reopen_payroll_month'),
 
 ]
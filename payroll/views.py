@@ -1,10 +1,9 @@
-from io import BytesIO
 import os
 import re
 import tempfile
-from collections import defaultdict
+from itertools import islice
 from calendar import month_name
-from datetime import datetime, timedelta, date, time
+from datetime import datetime, timedelta, date
 from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
@@ -12,22 +11,20 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import HttpResponseBadRequest
 from django.shortcuts import render, redirect
 from django.template.loader import get_template
+from django.urls import reverse
 from django.utils import timezone
-from django.utils.timezone import is_naive, make_aware
 from weasyprint import HTML
 from attendance_app.models import *
-from .models import EmployeeSalary
+from .models import EmployeeSalary, PayrollMonth, SalarySummary
 from django.http import HttpResponseForbidden
-from io import BytesIO
 import os
 import re
 import tempfile
-from collections import defaultdict
 from calendar import month_name
-from datetime import datetime, timedelta, date, time
+from datetime import datetime, timedelta, date
 from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
@@ -35,23 +32,137 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.models import Q, Prefetch
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.template.loader import get_template
 from django.utils import timezone
-from django.utils.timezone import is_naive, make_aware
 from weasyprint import HTML
 from attendance_app.models import *
+from attendance_app.utils.day_status import build_day_status
+from attendance_app.utils.pdf_jobs import pdf_response
+from attendance_app.utils.exports import export_response, queryset_batches
+from .engine import payroll_figures
 from .models import EmployeeSalary
 
+EXPORT_BATCH = 200
+
 def is_not_attendance_group(user):
     return not user.groups.filter(name='attendance').exists()
 
 from decimal import Decimal
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 from django.utils import timezone
-from django.utils.timezone import is_naive, make_aware
-from collections import defaultdict
+
+def fmt_hhmm(seconds):
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}"
+
+def month_range(month_str):
+    year, month = map(int, month_str.split('-'))
+    start_date = datetime(year, month, 1).date()
+    next_month = start_date.replace(day=28) + timedelta(days=4)
+    end_date = next_month - timedelta(days=next_month.day)
+    return start_date, end_date
+
+def _salary_row(emp, month_str, base_salary, bank_transfer, fig, earned_salary, bonus_amount):
+    """টেমপ্লেট/PDF এর এক রো; লাইভ হিসাব আর close করা SalarySummary দুটোই এখান দিয়ে যায়।"""
+    final_salary = earned_salary + bonus_amount
+    # Time Difference Calculation (+/- HH:MM)
+    diff_seconds = fig['work_seconds'] - fig['expected_seconds']
+    sign = "+" if diff_seconds >= 0 else "-"
+
+    return {
+        'employee': emp,
+        'month': month_str,
+        'base_salary': base_salary,
+        'bank_transfer': bank_transfer,
+        # Cash cannot be negative
+        'cash_amount': max(base_salary - bank_transfer, Decimal(0)),
+        
+        'present_days': fig['present_days'],
+        'leave_days': fig['leave_days'],
+        'absent_days': fig['absent_days'],
+        'weekly_off_days': fig['weekly_off_days'],
+        'holiday_days': fig['holiday_days'],
+        
+        'late_time': fmt_hhmm(fig['late_seconds']),
+        'over_time': fmt_hhmm(fig['over_seconds']),
+        
+        # --- PDF Specific Logic Data ---
+        'expected_hours': f"{fig['expected_seconds'] // 3600:02d}:00", # Display
+        'total_work_hours': fmt_hhmm(fig['work_seconds']), # Display
+        
+        # Raw value for Color Logic (Red if negative)
+        'time_difference_val': diff_seconds, 
+        # String for Display (+05:00 or -02:00)
+        'time_difference_str': f"{sign}{fmt_hhmm(abs(diff_seconds))}",
+        
+        'earned_salary': earned_salary,
+        'bonus_amount': bonus_amount,
+        'final_salary': final_salary,
+        'payable_cash': max(final_salary - bank_transfer, Decimal(0)),
+        
+        # Salary Difference
+        'salary_difference': final_salary - base_salary,
+
+        # close করার সময় SalarySummary তে লেখার জন্য
+        'figures': fig,
+    }
+
+def live_salary_rows(employees, month_str):
+    """attendance থেকে মাসের হিসাব (salary সেট করা employee দের জন্য)।"""
+    year, month = map(int, month_str.split('-'))
+    start_date, end_date = month_range(month_str)
+
+    # দিন-ভিত্তিক হিসাব (attendance_app.utils.day_status; রিপোর্টের সাথে একই নিয়ম)
+    employees = [emp for emp in employees if hasattr(emp, 'employeesalary')]
+    _, day_map = build_day_status(employees, start_date, end_date)
+    # সব employee এর টোটাল/earned salary এক সাথে (numpy থাকলে vectorized)
+    figures = payroll_figures(day_map, {emp.id: emp.employeesalary.base_salary for emp in employees})
+
+    rows = []
+    for emp in employees:
+        sal = emp.employeesalary
+        fig = figures[emp.id]
+        rows.append(_salary_row(emp, month_str, sal.base_salary, sal.bank_transfer_amount,
+                                fig, fig['earned_salary'], sal.bonus_for_month(year, month)))
+    return rows
+
+def stored_salary_rows(summaries):
+    """close করা মাস: SalarySummary থেকেই রো, attendance আর ছোঁয়া হয় না।"""
+    rows = []
+    for s in summaries:
+        fig = {
+            'present_days': s.present_days,
+            'leave_days': s.leave_days,
+            'absent_days': s.absent_days,
+            'weekly_off_days': s.weekly_off_days,
+            'holiday_days': s.holiday_days,
+            'expected_seconds': int(s.expected_work_hours.total_seconds()),
+            'work_seconds': int(s.total_work_hours.total_seconds()),
+            'late_seconds': int(s.late_time.total_seconds()),
+            'over_seconds': int(s.over_time.total_seconds()),
+            'less_seconds': int(s.early_leave_time.total_seconds()),
+        }
+        rows.append(_salary_row(s.employee, s.month, s.base_salary, s.bank_transfer_amount,
+                                fig, s.earned_salary, s.bonus_amount))
+    return rows
+
+def _salary_querysets(user_company, month_str, department_id=None, employee_id=None):
+    """(PayrollMonth বা None, লাইভ হিসাবের employee qs, close করা মাসের SalarySummary qs)"""
+    payroll_month = PayrollMonth.objects.filter(company=user_company, month=month_str).first()
+
+    employees_qs = Employee.objects.filter(company=user_company).select_related('department', 'employeesalary', 'company').order_by('id')
+    summaries = (SalarySummary.objects
+                 .filter(company=user_company, month=month_str)
+                 .select_related('employee__department')
+                 .order_by('employee_id'))
+    if department_id:
+        employees_qs = employees_qs.filter(department__id=department_id)
+        summaries = summaries.filter(employee__department__id=department_id)
+    if employee_id:
+        employees_qs = employees_qs.filter(id=employee_id)
+        summaries = summaries.filter(employee_id=employee_id)
+    return payroll_month, employees_qs, summaries
 
 def get_salary_summary_data(request, month_str, department_id=None, employee_id=None):
     user_company = getattr(getattr(request.user, "profile", None), "company", None)
@@ -59,241 +170,24 @@ def get_salary_summary_data(request, month_str, department_id=None, employee_id=
         raise PermissionError("User has no company assigned")
 
     summary_data = []
+    payroll_month = None
 
     # Dropdowns
     departments = Department.objects.filter(company=user_company)
-    employees_qs = Employee.objects.filter(company=user_company).select_related('department', 'employeesalary', 'company').order_by('id')
-
-    if department_id:
-        employees_qs = employees_qs.filter(department__id=department_id)
-    if employee_id:
-        employees_qs = employees_qs.filter(id=employee_id)
-
-    # Accumulators
-    total_base_salary = Decimal(0)
-    total_final_salary = Decimal(0)
-    total_payable_cash = Decimal(0)
-    
-    # Extra Totals needed for Footer
-    total_earned = Decimal(0)
-    total_bonus = Decimal(0)
 
     if month_str:
-        year, month = map(int, month_str.split('-'))
-        start_date = datetime(year, month, 1).date()
-        next_month = start_date.replace(day=28) + timedelta(days=4)
-        end_date = next_month - timedelta(days=next_month.day)
-
-        # Fetch Data
-        all_attendance = Attendance.objects.filter(
-            employee__in=employees_qs,
-            timestamp__date__range=(start_date, end_date)
-        ).order_by('timestamp')
-
-        all_leaves = LeaveRequest.objects.filter(
-            company=user_company, status='Approved',
-            start_date__lte=end_date, end_date__gte=start_date
-        )
-
-        # Optimization Maps
-        att_map = defaultdict(list)
-        for att in all_attendance:
-            att_map[(att.employee_id, att.timestamp.date())].append(att)
-
-        leave_map = set()
-        for lv in all_leaves:
-            s = max(lv.start_date, start_date)
-            e = min(lv.end_date, end_date)
-            curr = s
-            while curr <= e:
-                leave_map.add((lv.employee_id, curr))
-                curr += timedelta(days=1)
-
-        holidays = Holiday.objects.filter(company=user_company, start_date__lte=end_date, end_date__gte=start_date)
-        holiday_dates = set()
-        for h in holidays:
-            s = max(h.start_date, start_date)
-            e = min(h.end_date, end_date)
-            curr = s
-            while curr <= e:
-                holiday_dates.add(curr)
-                curr += timedelta(days=1)
-
-        DEFAULT_IN = time(10, 30)
-        DEFAULT_OUT = time(20, 30)
-
-        for emp in employees_qs:
-            if not hasattr(emp, 'employeesalary'):
-                continue
-            
-            sal = emp.employeesalary
-            base_salary = sal.base_salary
-            bank_transfer = sal.bank_transfer_amount
-            # Cash cannot be negative
-            cash = max(base_salary - bank_transfer, Decimal(0))
-
-            dep = emp.department
-            off_day = dep.weekly_off_day if dep else None
-            in_t = dep.in_time if dep and dep.in_time else DEFAULT_IN
-            out_t = dep.out_time if dep and dep.out_time else DEFAULT_OUT
-            
-            # Shift Calculation
-            dt_in = datetime.combine(start_date, in_t)
-            dt_out = datetime.combine(start_date, out_t)
-            if out_t < in_t:
-                dt_out += timedelta(days=1)
-            regular = dt_out - dt_in
-            
-            # Counters
-            present_days = 0
-            leave_days = 0
-            weekly_off = 0
-            pub_holiday = 0
-            absent_days = 0
-            
-            total_work_time = timedelta()
-            total_late_time = timedelta()
-            total_over_time = timedelta()
-
-            total_days = (end_date - start_date).days + 1
-            working_days_count = 0
-
-            for n in range(total_days):
-                curr = start_date + timedelta(days=n)
-                wd = curr.strftime('%A')
-
-                is_holiday = curr in holiday_dates
-                is_off = (off_day and wd == off_day)
-                is_leave = (emp.id, curr) in leave_map
-                recs = att_map.get((emp.id, curr), [])
-
-                if is_holiday:
-                    pub_holiday += 1
-                    if not recs: # পাঞ্চ না থাকলে স্কিপ করবে
-                        continue
-                elif is_off:
-                    weekly_off += 1
-                    if not recs: # পাঞ্চ না থাকলে স্কিপ করবে
-                        continue
-                else:
-                    working_days_count += 1 # Expected working day
-
-                # 🟢 আপনার অরিজিনাল লিভ লজিক (কোনো হাত দেওয়া হয়নি)
-                if is_leave:
-                    leave_days += 1
-                    total_work_time += regular # Credit for leave
-                    continue
+        payroll_month, employees_qs, summaries = _salary_querysets(user_company, month_str, department_id, employee_id)
+        if payroll_month:
+            # Closed মাস: একটা ইনডেক্সড রিড
+            summary_data = stored_salary_rows(summaries)
+        else:
+            summary_data = live_salary_rows(employees_qs, month_str)
 
-                if recs:
-                    timestamps = [r.timestamp for r in recs]
-                    first_in = min(timestamps)
-                    last_out = max(timestamps) if len(timestamps) > 1 else None
-                    present_days += 1
-                    
-                    # Late Logic
-                    exp_in = datetime.combine(curr, in_t)
-                    if is_naive(exp_in): exp_in = make_aware(exp_in)
-                    if is_naive(first_in): first_in = make_aware(first_in)
-                    
-                    if first_in > exp_in:
-                        total_late_time += (first_in - exp_in)
-
-                    # Work Duration
-                    if last_out:
-                        if is_naive(last_out): last_out = make_aware(last_out)
-                        actual_start = max(first_in, exp_in) 
-                        if last_out > actual_start:
-                            duration = last_out - actual_start
-                            total_work_time += duration
-                            
-                            # 🟢 শুধু ওভারটাইম লজিক আপডেটেড
-                            if is_holiday or is_off:
-                                total_over_time += duration
-                            elif duration > regular:
-                                total_over_time += (duration - regular)
-                else:
-                    absent_days += 1
-
-            # --- Calculations ---
-            # 1. Expected Hours
-            hours_per_day = regular.total_seconds() / 3600
-            expected_hours_float = working_days_count * hours_per_day
-            expected_td = timedelta(hours=expected_hours_float)
-            
-            # 2. Actual Hours
-            actual_hours_float = total_work_time.total_seconds() / 3600
-            
-            # 3. Time Difference Calculation (+/- HH:MM)
-            diff_seconds = total_work_time.total_seconds() - expected_td.total_seconds()
-            
-            # Format Logic for Difference
-            abs_seconds = abs(diff_seconds)
-            h = int(abs_seconds // 3600)
-            m = int((abs_seconds % 3600) // 60)
-            sign = "+" if diff_seconds >= 0 else "-"
-            time_diff_str = f"{sign}{h:02d}:{m:02d}"  # Example: "+05:30" or "-02:15"
-
-            # Salary Logic
-            hourly_rate = (base_salary / Decimal(expected_hours_float)) if expected_hours_float > 0 else Decimal(0)
-
-            if actual_hours_float <= expected_hours_float:
-                earned_salary = Decimal(actual_hours_float) * hourly_rate
-            else:
-                extra = actual_hours_float - expected_hours_float
-                earned_salary = (Decimal(expected_hours_float) * hourly_rate) + (Decimal(extra) * hourly_rate * Decimal('1.5'))
-
-            bonus_amount = sal.bonus_for_month(year, month)
-            final_salary = earned_salary + bonus_amount
-            payable_cash = max(final_salary - bank_transfer, Decimal(0))
-            
-            # Difference Logic
-            salary_diff = final_salary - base_salary
-
-            # Totals
-            total_base_salary += base_salary
-            total_final_salary += final_salary
-            total_payable_cash += payable_cash
-            total_earned += earned_salary
-            total_bonus += bonus_amount
-
-            # Helper for formatting plain timedeltas
-            def fmt_td(td):
-                s = int(td.total_seconds())
-                return f"{s//3600:02d}:{(s%3600)//60:02d}"
-
-            summary_data.append({
-                'employee': emp,
-                'month': month_str,
-                'base_salary': base_salary,
-                'bank_transfer': bank_transfer,
-                'cash_amount': cash,
-                
-                'present_days': present_days,
-                'leave_days': leave_days,
-                'absent_days': absent_days,
-                'weekly_off_days': weekly_off,
-                'holiday_days': pub_holiday,
-                
-                'late_time': fmt_td(total_late_time),
-                'over_time': fmt_td(total_over_time),
-                
-                # --- PDF Specific Logic Data ---
-                'expected_hours': f"{int(expected_hours_float):02d}:00", # Display
-                'total_work_hours': fmt_td(total_work_time), # Display
-                
-                # Raw value for Color Logic (Red if negative)
-                'time_difference_val': diff_seconds, 
-                # String for Display (+05:00 or -02:00)
-                'time_difference_str': time_diff_str,
-                
-                'earned_salary': earned_salary,
-                'bonus_amount': bonus_amount,
-                'final_salary': final_salary,
-                'payable_cash': payable_cash,
-                
-                # Salary Difference
-                'salary_difference': salary_diff
-            })
+    # Totals
+    total_base_salary = sum((row['base_salary'] for row in summary_data), Decimal(0))
+    total_final_salary = sum((row['final_salary'] for row in summary_data), Decimal(0))
+    total_earned = sum((row['earned_salary'] for row in summary_data), Decimal(0))
+    total_bonus = sum((row['bonus_amount'] for row in summary_data), Decimal(0))
 
     # Footer Totals
     total_salary_difference = total_final_salary - total_base_salary
@@ -311,6 +205,7 @@ def get_salary_summary_data(request, month_str, department_id=None, employee_id=
         'selected_month': month_str,
         'selected_department': int(department_id) if department_id else None,
         'selected_employee': int(employee_id) if employee_id else None,
+        'payroll_month': payroll_month,
         
         'total_base_salary': round(total_base_salary, 2),
         'total_bank_transfer': round(total_bank_sum, 2),
@@ -358,35 +253,166 @@ def export_salary_summary_pdf(request):
     except (TypeError, ValueError):
         return HttpResponseBadRequest("Invalid department/employee id.")
 
-    # 3. Fetch Data (সব লজিক এখন get_salary_summary_data এর ভেতরে)
-    try:
-        context = get_salary_summary_data(request, month_str, department_id, employee_id)
-    except PermissionError:
+    if not getattr(getattr(request.user, "profile", None), "company", None):
         return HttpResponseForbidden("আপনার কোম্পানি সেট করা নেই।")
-    except Exception as e:
-        return HttpResponseBadRequest(f"Data Generation Error: {str(e)}")
 
-    # 4. Context Enhancements for PDF
+    # 3. রেন্ডার ব্যাকগ্রাউন্ড ওয়ার্কারে (attendance_app.utils.pdf_jobs), ক্যাশ থাকলে সাথে সাথে ফাইল
+    return pdf_response(request, 'salary_summary')
+
+
+def render_salary_summary_pdf(request):
+    month_str = request.GET.get('month') or timezone.localdate().strftime('%Y-%m')
+    department_id = request.GET.get('department') or None
+    employee_id = request.GET.get('employee') or None
+
+    # Fetch Data (সব লজিক এখন get_salary_summary_data এর ভেতরে)
+    context = get_salary_summary_data(request, month_str, department_id, employee_id)
+
+    # Context Enhancements for PDF
     context["print_mode"] = True
     context["logo_url"] = request.build_absolute_uri('/static/images/logo.png')
     context["generated_at"] = timezone.now()
 
-    # 5. Render Template
+    # Render Template
     template = get_template('payroll/salary_summary_pdf.html')
     html_string = template.render(context)
 
-    # 6. Generate PDF
+    # Generate PDF
     if 'HTML' not in globals():
-        return HttpResponse("WeasyPrint library is missing.", status=500)
+        raise RuntimeError("WeasyPrint library is missing.")
+
+    pdf = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
+    return pdf, f"Salary_Summary_{month_str}.pdf"
+
+SALARY_EXPORT_HEADER = [
+    'Employee ID', 'Employee', 'Department', 'Month', 'Base Salary', 'Bank Transfer',
+    'Present', 'Leave', 'Absent', 'Weekly Off', 'Holiday', 'Late', 'Overtime',
+    'Expected Hours', 'Worked Hours', 'Difference', 'Earned', 'Bonus', 'Final Salary', 'Payable Cash',
+]
+
+def iter_salary_rows(user_company, month_str, department_id=None, employee_id=None):
+    """
+    এক্সপোর্টের রো, ব্যাচে: close করা মাস SalarySummary থেকে, নাহলে EXPORT_BATCH জন
+    employee করে লাইভ হিসাব। পুরো মাসের সব রো একসাথে মেমোরিতে থাকে না।
+    """
+    payroll_month, employees_qs, summaries = _salary_querysets(user_company, month_str, department_id, employee_id)
+    if payroll_month:
+        summary_iter = summaries.iterator(chunk_size=EXPORT_BATCH)
+        batches = iter(lambda: stored_salary_rows(islice(summary_iter, EXPORT_BATCH)), [])
+    else:
+        batches = (live_salary_rows(employees, month_str)
+                   for employees in queryset_batches(employees_qs, EXPORT_BATCH))
+
+    for rows in batches:
+        for row in rows:
+            emp = row['employee']
+            fig = row['figures']
+            yield [
+                emp.device_user_id, emp.name, emp.department.name if emp.department else '-', month_str,
+                row['base_salary'], row['bank_transfer'],
+                row['present_days'], row['leave_days'], row['absent_days'],
+                row['weekly_off_days'], row['holiday_days'], row['late_time'], row['over_time'],
+                row['expected_hours'], row['total_work_hours'], row['time_difference_str'],
+                row['earned_salary'], row['bonus_amount'], row['final_salary'], row['payable_cash'],
+            ]
+
+@login_required
+@user_passes_test(is_not_attendance_group)
+def export_salary_summary(request):
+    """Salary summary -> CSV/XLSX (?format=csv|xlsx), স্ট্রিম করে।"""
+    month_str = request.GET.get('month') or timezone.localdate().strftime('%Y-%m')
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", month_str):
+        return HttpResponseBadRequest("Invalid month format. Use YYYY-MM.")
+
+    dep_raw = request.GET.get('department')
+    emp_raw = request.GET.get('employee')
+    try:
+        department_id = int(dep_raw) if dep_raw else None
+        employee_id = int(emp_raw) if emp_raw else None
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid department/employee id.")
+
+    user_company = getattr(getattr(request.user, "profile", None), "company", None)
+    if not user_company:
+        return HttpResponseForbidden("আপনার কোম্পানি সেট করা নেই।")
+
+    return export_response(request.GET.get('format', 'csv'), f"Salary_Summary_{month_str}",
+                           SALARY_EXPORT_HEADER,
+                           iter_salary_rows(user_company, month_str, department_id, employee_id))
+
+# ---------------- Payroll month close / reopen ----------------
+from django.views.decorators.http import require_POST
+
+def _payroll_redirect(month_str):
+    return redirect(f"{reverse('payroll:salary_summary_list')}?month={month_str}")
+
+def _salary_summary(row, company):
+    fig = row['figures']
+    return SalarySummary(
+        employee=row['employee'], company=company, month=row['month'],
+        base_salary=row['base_salary'], bank_transfer_amount=row['bank_transfer'],
+        present_days=fig['present_days'], absent_days=fig['absent_days'],
+        leave_days=fig['leave_days'], weekly_off_days=fig['weekly_off_days'],
+        holiday_days=fig['holiday_days'],
+        expected_work_hours=timedelta(seconds=fig['expected_seconds']),
+        total_work_hours=timedelta(seconds=fig['work_seconds']),
+        late_time=timedelta(seconds=fig['late_seconds']),
+        early_leave_time=timedelta(seconds=fig['less_seconds']),
+        over_time=timedelta(seconds=fig['over_seconds']),
+        earned_salary=row['earned_salary'], bonus_amount=row['bonus_amount'],
+        final_salary=row['final_salary'], payable_cash=row['payable_cash'],
+    )
+
+@login_required
+@user_passes_test(is_not_attendance_group)
+@require_POST
+def close_payroll_month(request):
+    """মাসের হিসাব একবার করে SalarySummary তে লিখে মাসটা lock করে।"""
+    user_company = getattr(getattr(request.user, "profile", None), "company", None)
+    if not user_company:
+        return HttpResponseForbidden("আপনার কোম্পানি সেট করা নেই।")
+
+    month_str = request.POST.get('month') or ''
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", month_str):
+        return HttpResponseBadRequest("Invalid month format. Use YYYY-MM.")
+    if month_range(month_str)[1] >= timezone.localdate():
+        messages.error(request, f"{month_str} মাস এখনো শেষ হয়নি, close করা যাবে না।")
+        return _payroll_redirect(month_str)
+
+    employees = (Employee.objects.filter(company=user_company)
+                 .select_related('department', 'employeesalary').order_by('id'))
+    with transaction.atomic():
+        # একই মাস দুইবার close রোধ (দুই ট্যাব থেকে একসাথে ক্লিক)
+        payroll_month, created = PayrollMonth.objects.get_or_create(
+            company=user_company, month=month_str, defaults={'closed_by': request.user})
+        if not created:
+            messages.info(request, f"{month_str} আগেই close করা আছে।")
+            return _payroll_redirect(month_str)
+
+        rows = live_salary_rows(employees, month_str)
+        SalarySummary.objects.bulk_create(
+            [_salary_summary(row, user_company) for row in rows], batch_size=500)
+
+    messages.success(request, f"{month_str} payroll closed ({len(rows)} employees).")
+    return _payroll_redirect(month_str)
+
+@login_required
+@user_passes_test(is_not_attendance_group)
+@require_POST
+def reopen_payroll_month(request):
+    """Close করা মাস খুলে দেয়; এরপর আবার attendance থেকে লাইভ হিসাব হবে।"""
+    user_company = getattr(getattr(request.user, "profile", None), "company", None)
+    if not user_company:
+        return HttpResponseForbidden("আপনার কোম্পানি সেট করা নেই।")
 
-    pdf_io = BytesIO()
-    HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf(target=pdf_io)
-    pdf_io.seek(0)
+    month_str = request.POST.get('month') or ''
+    with transaction.atomic():
+        deleted, _ = PayrollMonth.objects.filter(company=user_company, month=month_str).delete()
+        SalarySummary.objects.filter(company=user_company, month=month_str).delete()
 
-    filename = f"Salary_Summary_{month_str}.pdf"
-    resp = HttpResponse(pdf_io.read(), content_type='application/pdf')
-    resp['Content-Disposition'] = f'inline; filename="{filename}"'
-    return resp
+    if deleted:
+        messages.success(request, f"{month_str} payroll reopened.")
+    return _payroll_redirect(month_str)
 
 # def is_not_attendance_group(user): ...
 
@@ -1,4 +1,9 @@
 :: Auto sync attendance every hour
+:: (--loop drift-corrected scheduler চালায়; Task Scheduler থেকে চালালে --loop বাদ দিন)
 cd /d D:\YourProjectPath
 call venv\Scripts\activate
-python manage.py shell -c "from attendance_app.utils.zk_import import import_attendance; import_attendance()"
+:: Push API queue worker (আলাদা উইন্ডোতে চলবে)
+start "push-queue" python manage.py drain_push_queue --loop
+:: PDF রিপোর্ট রেন্ডার ওয়ার্কার (আলাদা উইন্ডোতে)
+start "pdf-jobs" python manage.py render_pdf_jobs --loop
+python manage.py sync_devices --parallel 4 --loop --interval 3600
@@ -6,6 +6,7 @@ from django.db import transaction
 from django.utils import timezone
 
 from .models import Subscription, UserSubscription, SubscriptionPlan
+from .utils import invalidate_subscription_cache
 
 
 def _calc_period(
@@ -142,4 +143,6 @@ def handle_payment_success(
     """
     company_sub = activate_or_renew_subscription(company, plan, start_at=start_at, extra_days=extra_days)
     user_sub = activate_user_subscription(user, plan, start_at=start_at, extra_days=extra_days, carry_over=True)
+    # ক্যাশ করা সাবস্ক্রিপশন স্টেট বাতিল (commit এর পর, যাতে পুরনো স্টেট আবার ক্যাশে না ঢোকে)
+    transaction.on_commit(lambda: invalidate_subscription_cache(user))
     return company_sub, user_sub
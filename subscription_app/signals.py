@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import UserSubscription
+from .utils import invalidate_subscription_cache
+
+
+@receiver([post_save, post_delete], sender=UserSubscription, dispatch_uid='subscription_state_invalidate')
+def invalidate_subscription_state(sender, instance, **kwargs):
+    """অ্যাডমিন/পেমেন্ট যেখান থেকেই বদলাক, ইউজারের ক্যাশড সাবস্ক্রিপশন স্টেট বাতিল।"""
+    user_id = instance.user_id
+    # commit এর পরে, যাতে মাঝখানে অন্য রিকোয়েস্ট পুরনো স্টেট আবার ক্যাশে না রাখে
+    transaction.on_commit(lambda: invalidate_subscription_cache(user_id))
@@ -2,15 +2,30 @@ from django.utils import timezone
 from .models import UserSubscription
 
 from typing import Optional
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
 from .models import UserSubscription
 
+SUBSCRIPTION_CACHE_TTL = getattr(settings, "SUBSCRIPTION_CACHE_TTL", 60)
+_REQUEST_ATTR = "_subscription_state"
+
+
+def _cache_key(user_id):
+    return f"subscription-state:{user_id}"
+
+
+def _user_company(user, request=None):
+    return getattr(request, "current_company", None) or getattr(user, "current_company", None) \
+        or getattr(user, "company", None)
+
+
 def get_effective_subscription(user):
     """
     company.subscription থাকলে সেটাই; না থাকলে ইউজারের latest active UserSubscription।
     """
-    company = getattr(user, "current_company", None) or getattr(user, "company", None)
+    company = _user_company(user)
     sub = getattr(company, "subscription", None) if company else None
     if sub:
         return sub
@@ -24,14 +39,90 @@ def get_effective_subscription(user):
         .first()
     )
 
+
+class SubscriptionState:
+    """
+    এক রিকোয়েস্টের সাবস্ক্রিপশন অবস্থা; middleware, decorator আর ভিউ সবাই এটাই পড়ে।
+    active: company সাবস্ক্রিপশন (থাকলে) নাহলে active UserSubscription এর end_date আজ বা পরে।
+    last_end_date: ইউজারের সর্বশেষ সাবস্ক্রিপশনের end_date (expired পেজের জন্য)।
+    """
+    __slots__ = ("active", "company_expired", "has_plan", "last_end_date")
+
+    def __init__(self, active, company_expired, has_plan, last_end_date):
+        self.active = active
+        self.company_expired = company_expired
+        self.has_plan = has_plan
+        self.last_end_date = last_end_date
+
+    @property
+    def expired(self):
+        return not self.active
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, "date") else value
+
+
+def _user_state(user):
+    """ইউজার-লেভেলের অংশ (একটা কোয়েরি), SUBSCRIPTION_CACHE_TTL সেকেন্ড ক্যাশে থাকে।"""
+    key = _cache_key(user.pk)
+    state = cache.get(key)
+    if state is None:
+        today = timezone.localdate()
+        subs = list(UserSubscription.objects.filter(user=user)
+                    .order_by("-end_date").values_list("end_date", "active")[:20])
+        # extend করলে নতুন রো এর start_date ভবিষ্যতে হতে পারে, তাই শুধু end_date দেখা হয়
+        state = {
+            "active": any(active and end and end >= today for end, active in subs),
+            "has_plan": bool(subs),
+            "last_end_date": subs[0][0] if subs else None,
+        }
+        cache.set(key, state, SUBSCRIPTION_CACHE_TTL)
+    return state
+
+
+def resolve_subscription(user, request=None):
+    """
+    SubscriptionState; request দিলে request এর উপর memoize হয় (এক রিকোয়েস্টে একবারই হিসাব)।
+    """
+    if request is not None:
+        memo = getattr(request, _REQUEST_ATTR, None)
+        if memo is not None:
+            return memo
+
+    company = _user_company(user, request)
+    try:
+        company_sub = getattr(company, "subscription", None) if company else None
+    except ObjectDoesNotExist:
+        company_sub = None
+
+    if company_sub is not None:
+        company_expired = bool(getattr(company_sub, "is_expired", False))
+        end = getattr(company_sub, "end_date", None) or getattr(company_sub, "expires_at", None)
+        state = SubscriptionState(active=not company_expired, company_expired=company_expired,
+                                  has_plan=True, last_end_date=_as_date(end) if end else None)
+    else:
+        user_state = _user_state(user)
+        state = SubscriptionState(active=user_state["active"], company_expired=False,
+                                  has_plan=user_state["has_plan"], last_end_date=user_state["last_end_date"])
+
+    if request is not None:
+        setattr(request, _REQUEST_ATTR, state)
+    return state
+
+
+def get_subscription_state(request):
+    return resolve_subscription(request.user, request)
+
+
+def invalidate_subscription_cache(user):
+    """পেমেন্ট/রিনিউ বা অ্যাডমিন থেকে সাবস্ক্রিপশন বদলালে।"""
+    user_id = getattr(user, "pk", user)
+    cache.delete(_cache_key(user_id))
+
+
 def is_subscription_active_for(user) -> bool:
-    sub = get_effective_subscription(user)
-    if not sub:
-        return False
-    today = timezone.localdate()
-    start_date = sub.start_date.date() if hasattr(sub.start_date, "date") else sub.start_date
-    end_date   = sub.end_date.date()   if hasattr(sub.end_date, "date")   else sub.end_date
-    return bool(getattr(sub, "active", True)) and start_date <= today <= end_date
+    return resolve_subscription(user).active
 
 def is_subscription_expired_for(user) -> bool:
     return not is_subscription_active_for(user)
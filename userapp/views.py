@@ -11,8 +11,7 @@ from django.http import HttpResponse
 from django.template.loader import render_to_string
 import weasyprint
 
-from subscription_app.models import UserSubscription
-from django.utils import timezone
+from subscription_app.utils import resolve_subscription
 
 from django.contrib.auth.decorators import login_required
 from .forms import EmployeeProfileForm   # form আমরা নিচে বানাবো
@@ -21,16 +20,11 @@ from .forms import EmployeeProfileForm   # form আমরা নিচে বা
 from django.core.paginator import Paginator
 from django.db.models import Q
 from .models import EmployeeProfile
+from attendance_app.utils.pdf_jobs import pdf_response
 
 def _is_expired(user):
-    company = getattr(user, "current_company", None) or getattr(user, "company", None)
-    sub = getattr(company, "subscription", None) or \
-          UserSubscription.objects.filter(user=user).order_by("-end_date").first()
-    if not sub:
-        return True  # প্ল্যানই না থাকলে expired-এর মত আচরণ করতে চাইলে True রাখুন
-    today = timezone.localdate()
-    end_date = sub.end_date.date() if hasattr(sub.end_date, "date") else sub.end_date
-    return end_date < today or getattr(sub, "is_expired", False)
+    # subscription_app.utils এর resolver (middleware/decorator এর সাথে একই নিয়ম, ক্যাশড)
+    return resolve_subscription(user).expired
 
 
 def _safe_next(request):
@@ -99,6 +93,11 @@ import os
 
 @login_required
 def employee_profile_list_pdf(request):
+    # রেন্ডার ব্যাকগ্রাউন্ড ওয়ার্কারে (attendance_app.utils.pdf_jobs)
+    return pdf_response(request, 'employee_profiles')
+
+
+def render_employee_profile_list_pdf(request):
     search_query = request.GET.get("q", "")
     profiles = EmployeeProfile.objects.select_related("employee").all()
 
@@ -117,13 +116,9 @@ def employee_profile_list_pdf(request):
         "search_query": search_query
     })
 
-    # Response as PDF
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'filename="employee_profiles.pdf"'
-
     # Just render PDF directly (no external CSS file)
-    weasyprint.HTML(string=html, base_url=request.build_absolute_uri()).write_pdf(response)
-    return response
+    pdf = weasyprint.HTML(string=html, base_url=request.build_absolute_uri()).write_pdf()
+    return pdf, "employee_profiles.pdf"
 
     
 